@@ -1,7 +1,23 @@
+import io
 import locale
 import os
 import numpy as np
 
+import xxcache as xxc
+
+
+## Строки текстового файла: файл читается один раз, текст декодируется как utf-8,
+#  при ошибке - в кодировке системы
+def read_lines(path):
+    with open(rf'{path}', 'rb') as file:
+        data = file.read()
+    try:
+        data.decode('utf-8')
+        encoding = 'utf-8'
+    except UnicodeDecodeError:
+        encoding = locale.getpreferredencoding()
+    return io.TextIOWrapper(io.BytesIO(data), encoding=encoding).readlines()
+
 
 def check_folder(path):
     prj_name = []
@@ -11,13 +27,7 @@ def check_folder(path):
     if len(prj_name) == 0:
         return
 
-    try:
-        with open(os.path.join(path, rf'{prj_name[0]}'), 'r', encoding='utf-8') as file:
-            lines = file.readlines()
-    except UnicodeDecodeError:
-        with open(os.path.join(path, rf'{prj_name[0]}'), 'r',
-                  encoding=locale.getpreferredencoding()) as file:
-            lines = file.readlines()
+    lines = read_lines(os.path.join(path, rf'{prj_name[0]}'))
 
     out = {}
     for i in range(len(lines)):
@@ -58,12 +68,7 @@ class DataParcer:
         }
 
     def par_decoder(self):
-        try:
-            with open(rf'{self.path}', 'r', encoding=f'{self.decoding}') as file:
-                lines = file.readlines()
-        except UnicodeDecodeError:
-            with open(rf'{self.path}', 'r', encoding=f'{self.decoding_def}') as file:
-                lines = file.readlines()
+        lines = read_lines(self.path)
 
         # L[0] '<Количество типов частиц>'
         L = []
@@ -107,17 +112,7 @@ class DataParcer:
 
     def lay_decoder(self):
         #### .LAY DECODER
-        decoding_def = locale.getpreferredencoding()
-        decoding = 'utf-8'
-        path = self.path
-
-        try:
-            with open(rf'{path}', 'r', encoding=f'{decoding}') as file:
-                lines = file.readlines()
-        except UnicodeDecodeError:
-
-            with open(rf'{path}', 'r', encoding=f'{decoding_def}') as file:
-                lines = file.readlines()
+        lines = read_lines(self.path)
 
         try:
 
@@ -170,13 +165,7 @@ class DataParcer:
 
     def pl_decoder(self):
         #### .PL DECODER
-        try:
-            with open(rf'{self.path}', 'r', encoding=f'{self.decoding}') as file:
-                lines_pl = file.readlines()
-        except UnicodeDecodeError:
-
-            with open(rf'{self.path}', 'r', encoding=f'{self.decoding_def}') as file:
-                lines_pl = file.readlines()
+        lines_pl = read_lines(self.path)
         try:
             particle_count = int(lines_pl[2])
             layers = int(lines_pl[6])
@@ -226,6 +215,60 @@ class DataParcer:
             return
 
 
+## Проект РЭМП: файл PRJ и описания слоёв (LAY), частиц в слоях (PL) и частиц (PAR),
+#  считанные один раз
+class Project:
+    def __init__(self, path):
+        self.path = path
+        self.files = check_folder(path)
+
+        par_dir = os.path.join(path, self.files['PAR'])
+        lay_dir = os.path.join(path, self.files['LAY'])
+        pl_dir = os.path.join(path, self.files['PL'])
+        self.stamp = project_stamp(path, self.files)
+
+        self.part_list, self.part_types = DataParcer(par_dir).par_decoder()
+        self.move, self.io_brake, self.layers_numbers = DataParcer(pl_dir).pl_decoder()
+        self.layers_data, conductivity = DataParcer(lay_dir).lay_decoder()
+        self.conductivity = np.array(conductivity, dtype=int)
+
+        self.conductivity_dict = {}
+        for i in range(len(self.layers_data)):
+            self.conductivity_dict.update({int(self.layers_data[i][0]): conductivity[i]})
+
+        self.io_brake_dict = {}
+        self.move_dict = {}
+        for i in range(self.layers_numbers.shape[0]):
+            self.io_brake_dict.update({self.layers_numbers[i]: self.io_brake[:, i]})
+            self.move_dict.update({self.layers_numbers[i]: self.move[:, i]})
+
+
+## Размер и время изменения файлов проекта (PRJ, LAY, PL, PAR) или None, если
+#  какого-то файла нет
+def project_stamp(path, files):
+    prj_name = [f for f in os.listdir(path) if f.endswith(".PRJ") or f.endswith(".prj")]
+    names = prj_name[:1] + [files.get(ky) for ky in ('LAY', 'PL', 'PAR')]
+    try:
+        st = [os.stat(os.path.join(path, nm)) for nm in names]
+    except (OSError, TypeError):
+        return None
+    return tuple((nm, s.st_mtime_ns, s.st_size) for nm, s in zip(names, st))
+
+
+## Считанные проекты
+xMemo = xxc.Memo(8)
+
+
+## Проект из каталога path. Проект читается заново, только если файлы
+#  проекта изменились после предыдущего чтения
+def load_project(path):
+    ky_ = os.path.abspath(path)
+    prj = xMemo.get(ky_)
+    if prj is not None and prj.stamp is not None and prj.stamp == project_stamp(path, prj.files):
+        return prj
+    return xMemo.put(ky_, Project(path))
+
+
 if __name__ == '__main__':
     x, y = DataParcer(r'C:\Work\Test_projects\wpala\shpala_new.PAR').par_decoder()
     # x = DataParcer(r'C:\Work\Test_projects\wpala\shpala_new.PL').pl_decoder()
@@ -7,12 +7,18 @@
 # -------------------------------------------------------------------------------
 
 import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
 import numpy as np
 import yaml
 
 import interface as xItf
 import xtb_electron as xel
 import xtb_photon as xph
+import xtb_plan as xpl
+import xxcache as xxc
 
 import cfg
 
@@ -64,13 +70,73 @@ def read_layer(ss, nmfl='layers'):
     return nnv
 
 
+## Расчёт распределений для одного элемента (может выполняться в отдельном процессе)
+#  task - (вид частицы, параметры элемента и сеток, заряд иона)
+def calc_element(task):
+    """
+    """
+    prtkl_, xin_, ion_ = task
+    if prtkl_ == 'ph':
+        return xph.calc_element(xin_)
+    return xel.calc_element(xin_, ion_)
+
+
+## Хранилище рассчитанных элементов и ключ для задачи task
+def element_memo(task):
+    """
+    """
+    prtkl_, xin_, ion_ = task
+    if prtkl_ == 'ph':
+        return xph.xMemo, xph.element_key(xin_)
+    return xel.xMemo, xel.element_key(xin_, ion_)
+
+
+## Расчёт распределений для элементов, входящих в композит.
+#  tasks - список (вид частицы, элемент, заряд иона), каждый элемент рассчитывается один раз.
+#  Элементы, рассчитанные при предыдущих вызовах с теми же сетками, берутся из памяти.
+#  Если задан pool (ProcessPoolExecutor), остальные элементы рассчитываются
+#  параллельно в нескольких процессах
+def calc_elements(xI, tasks, pool=None):
+    """
+    """
+    res_ = {}
+    todo_ = []
+    args_ = []
+    for ky in tasks:
+        prtkl_, name_, ion_ = ky
+        ar_ = (prtkl_, dict(xI.def_element(name_)), ion_)
+        memo_, mk_ = element_memo(ar_)
+        rr_ = memo_.get(mk_)
+        if rr_ is None:
+            todo_.append(ky)
+            args_.append(ar_)
+        else:
+            res_[ky] = rr_
+    if pool is not None and len(todo_) > 1:
+        try:
+            for ky, ar_, rr_ in zip(todo_, args_, pool.map(calc_element, args_)):
+                memo_, mk_ = element_memo(ar_)
+                res_[ky] = memo_.put(mk_, rr_)
+            return res_
+        except (BrokenProcessPool, OSError):
+            print('Параллельный расчёт не удался, элементы рассчитываются последовательно')
+    for ky, ar_ in zip(todo_, args_):
+        res_[ky] = calc_element(ar_)
+    return res_
+
+
 def main(db):  # setk_, matfile):
     """
     """
     idir = os.getcwd()
+    ##    Каталог хранилища рассчитанных данных (param.golb, '' - каталог пользователя)
+    cache_ = xxc.set_cache_root(db.get('cache', ''))
     print(("Файл с параметрами выходных сеток - {0}".format(db['par'])))
     ##    Считываем информацию о параметрах выходных сеток
     xI = xItf.Init(nExePath=db['tab'], nFile=db['par'])
+    ##    Режим расчёта фотонных таблиц по блокам энергий (ограничение памяти)
+    xI.xin['ph_block'] = int(db.get('ph_block', 0))
+    xI.xin['ph_float32'] = bool(db.get('ph_float32', False))
     print(("Файл с описанием оболочек - {0}".format(db['lay'])))
     matfile = read_layer(db['lay'], nmfl='')
     ##    print(matfile)
@@ -80,58 +146,116 @@ def main(db):  # setk_, matfile):
             ##            print(mm)
             ff.write('{0:s}\n'.format(os.path.splitext(mm)[0]))
 
+    ##    Считываем информацию о заданных композитах и составляем списки элементов для расчёта.
+    ##    Таблицы композита, входные данные которых не изменились после предыдущего
+    ##    расчёта (xtb_plan), не пересчитываются (db['rebuild'] - пересчитать все)
+    rebuild_ = bool(db.get('rebuild', False))
+    objs_ = []
+    last_ = {}  # номер последнего композита, для которого нужен элемент
+    nc_ = 0
+    nt_ = 0
     for matFie_ in matfile:
-        print(("Обрабатывается файл - {0}".format(matFie_)))
         matFile = os.path.join(db['mat'], matFie_)
         layers = os.path.abspath(db['lay'])
-        ##    Считываем информацию о заданных композитах
         Obt = xItf.Object(matFile, xI.sN, matFie_, layers)
-        ##    Сохраняем информацию о композитах и и оболочках
-        ##        Obt.Ro2file(os.path.join(idir, 'ro.txt'))
-        ##        Obt.Sh2file(os.path.join(idir, 'surfaces'))
-        ##        Obt.Mt2file(os.path.join(db['tab'], 'materials'))
+        plans_ = []
+        for k, mt in enumerate(Obt.vv):
+            pl_ = xpl.Plan(os.path.join(db['tab'], xItf.Material(mt[k]).OutName))
+            todo_ = {}
+            for kind_, on_ in (('photon', bPhoton and db['photon']), ('electron', db['electron'] and iMat)):
+                if on_:
+                    fp_ = xpl.fingerprint(xI, kind_, mt[k], matFile)
+                    if rebuild_ or not pl_.fresh(kind_, fp_):
+                        todo_[kind_] = fp_
+            tasks_ = []
+            for el in mt[k]['Element']:
+                if 'photon' in todo_ and ('ph', el[0], 0) not in tasks_:
+                    tasks_.append(('ph', el[0], 0))
+                if 'electron' in todo_ and ('el', el[0], el[2]) not in tasks_:
+                    tasks_.append(('el', el[0], el[2]))
+            for ky in tasks_:
+                last_[ky] = nc_
+            plans_.append((pl_, todo_, tasks_))
+            nc_ += 1
+            nt_ = max(nt_, len(tasks_))
+        objs_.append((matFie_, matFile, Obt, plans_))
 
-        path, nmFile = os.path.split(matFile)
-        NmFile, ExtFile = os.path.splitext(nmFile)
+    ##    Распределения для элементов рассчитываются перед расчётом композита
+    ##    (каждый элемент - один раз) и хранятся, пока нужны следующим композитам
+    jobs_ = int(db.get('jobs', 0))
+    if jobs_ <= 0:
+        jobs_ = os.cpu_count() or 1
+    pool_ = None
+    if jobs_ > 1 and nt_ > 1:
+        # процессы запускаются заново (spawn), а не копией вызывающего процесса:
+        # в окне tables к этому времени работают другие потоки
+        pool_ = ProcessPoolExecutor(max_workers=min(jobs_, nt_),
+                                    mp_context=multiprocessing.get_context('spawn'),
+                                    initializer=xxc.set_cache_root, initargs=(cache_,))
+    ##    Пул процессов завершается и при ошибке расчёта (main вызывается из окна tables)
+    try:
+        xdata_ = {}
+        nc_ = 0
 
-        # tBegin = time.clock()
-        ##    Цикл по заданным композита
-        for k, mt in enumerate(Obt.vv):
-            Mt = xItf.Material(mt[k])
-            if bPhoton:
-                print('Вычисляем таблицы распределений для фотонов')
-                if db['photon']:
-                    ## Строим энергетические и угловые распределения для фотонов для текущего композита
-                    xph.main(xI, Mt, matFile, db['tab'])
-                ##                    module = __import__('kiadf.photon')
-                ##                    dp = {'xI': xI,'Mt':  Mt, 'mf': matFile, 'path': db['tab']}
-                ##                    print(dp['xI'].xin)
-                ##                    print(dp['Mt'])
-                ##                    Process(target=xrun, args=('photon', dp)).start()
-
-                # print((time.clock() - tBegin))
+        for matFie_, matFile, Obt, plans_ in objs_:
+            print(("Обрабатывается файл - {0}".format(matFie_)))
+            ##    Сохраняем информацию о композитах и и оболочках
+            ##        Obt.Ro2file(os.path.join(idir, 'ro.txt'))
+            ##        Obt.Sh2file(os.path.join(idir, 'surfaces'))
+            ##        Obt.Mt2file(os.path.join(db['tab'], 'materials'))
+
+            path, nmFile = os.path.split(matFile)
+            NmFile, ExtFile = os.path.splitext(nmFile)
 
+            # tBegin = time.clock()
+            ##    Цикл по заданным композита
+            for k, mt in enumerate(Obt.vv):
+                Mt = xItf.Material(mt[k])
+                pl_, todo_, tasks_ = plans_[k]
+                xdata_.update(calc_elements(xI, [ky for ky in tasks_ if ky not in xdata_], pool_))
+                if bPhoton:
+                    print('Вычисляем таблицы распределений для фотонов')
+                    if db['photon'] and 'photon' not in todo_:
+                        print('Исходные данные не изменились, таблицы для фотонов не пересчитываются')
+                    elif db['photon']:
+                        ## Строим энергетические и угловые распределения для фотонов для текущего композита
+                        xd_ = [xdata_[('ph', el[0], 0)] for el in Mt.Mat]
+                        xph.main(xI, Mt, matFile, db['tab'], xdata=xd_)
+                        pl_.done('photon', todo_['photon'])
+
+                    # print((time.clock() - tBegin))
+
+                    else:
+                        pass
+
+                if db['electron']:
+                    print('Вычисляем таблицы распределений для электронов')
+                    if iMat and 'electron' not in todo_:
+                        print('Исходные данные не изменились, таблицы для электронов не пересчитываются')
+                    elif iMat:
+                        ## Строим энергетические и угловые распределения для электронов для текущего композита
+                        xd_ = [xdata_[('el', el[0], el[2])] for el in Mt.Mat]
+                        xel.main(xI, Mt, matFile, db['tab'], xdata=xd_)
+                        pl_.done('electron', todo_['electron'])
                 else:
                     pass
+                mt[k]['Composite'] = mt[k]['Composite'].upper()
+                mt_ = 'mat-' + mt[k]['Composite']
+                fl_mat_ = os.path.join(db.get('tab', ''), mt_,
+                                       mt[k]['Composite'].lower() + '.' + cfg.val.extmat)
+                write_file_mat(fl_mat_, mt[k])
+                for ky in tasks_:
+                    if last_[ky] == nc_:
+                        del xdata_[ky]
+                nc_ += 1
 
-            if db['electron']:
-                print('Вычисляем таблицы распределений для электронов')
-                if iMat:
-                    ## Строим энергетические и угловые распределения для электронов для текущего композита
-                    xel.main(xI, Mt, matFile, db['tab'])
-            ##                    Process(target=xrun, args=('kiadf.electron', xI, Mt, matFile, db['tab'])).start()
-            else:
-                pass
-            mt[k]['Composite'] = mt[k]['Composite'].upper()
-            mt_ = 'mat-' + mt[k]['Composite']
-            fl_mat_ = os.path.join(db.get('tab', ''), mt_,
-                                   mt[k]['Composite'].lower() + '.' + cfg.val.extmat)
-            write_file_mat(fl_mat_, mt[k])
-
-        # tEnd = time.clock()
-        # print(('time = {0}'.format(tEnd - tBegin)))
-        # mb.showinfo('Информация', 'Модуль расчёта распределений закончил свою работу')
-        print('Модуль расчёта распределений закончил свою работу')
+            # tEnd = time.clock()
+            # print(('time = {0}'.format(tEnd - tBegin)))
+            # mb.showinfo('Информация', 'Модуль расчёта распределений закончил свою работу')
+            print('Модуль расчёта распределений закончил свою работу')
+    finally:
+        if pool_ is not None:
+            pool_.shutdown()
 
 
 if __name__ == '__main__':
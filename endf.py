@@ -14,6 +14,7 @@ import zipfile as z
 import numpy as np
 import phisconst as phis
 import ion_pkl as ionp
+import xxcache as xxc
 
 try:
     import matplotlib.pyplot as plt
@@ -50,7 +51,7 @@ def InitElement(name):
 def xcumtrapz(yt_, xt_):
     """ """
     tt_ = (np.trapz(yt_[j:j + 2], xt_[j:j + 2]) for j, x in enumerate(xt_[:-1]))
-    ss_ = np.cumsum(np.fromiter(tt_, np.float))
+    ss_ = np.cumsum(np.fromiter(tt_, float))
     ss_ = np.insert(ss_, 0, 0.0)
     return ss_
 
@@ -110,6 +111,48 @@ def gavno2num(ss):
     return num
 
 
+## Переводит строки ENDF файла в массив чисел (по 6 полей в строке).
+# Разбор выполняется сразу для всего блока строк: в каждое 11-символьное поле
+# перед знаком порядка вставляется "E", после чего поля переводятся в числа средствами numpy.
+# Пустые и ошибочные поля заменяются на NaN
+#
+
+def endf2float(sf_):
+    """
+    """
+    nl_ = len(sf_)
+    if nl_ == 0:
+        return np.zeros((0, 6))
+    ng = 11
+    bb_ = np.frombuffer(''.join(ss[:6 * ng].ljust(6 * ng) for ss in sf_).encode('ascii', 'replace'),
+                        dtype=np.uint8).reshape(nl_ * 6, ng)
+    ii_ = np.arange(ng + 1)
+    dg_ = (bb_ >= ord('0')) & (bb_ <= ord('9'))
+    fd_ = np.argmax(dg_, axis=1)
+    # знак порядка - знак, стоящий после первой цифры поля
+    sg_ = ((bb_ == ord('+')) | (bb_ == ord('-'))) & (ii_[None, :ng] > fd_[:, None])
+    ex_ = (bb_ == ord('E')) | (bb_ == ord('e'))
+    ip_ = sg_.any(axis=1) & ~ex_.any(axis=1)
+    ps_ = np.where(ip_, np.argmax(sg_, axis=1), ng + 1)
+    # сдвигаем символы начиная со знака порядка на одну позицию и вставляем "E"
+    bb_ = np.hstack((bb_, np.full((nl_ * 6, 1), ord(' '), dtype=np.uint8)))
+    jj_ = np.where(ii_[None, :] < ps_[:, None], ii_[None, :], ii_[None, :] - 1)
+    tt_ = np.take_along_axis(bb_, jj_, axis=1)
+    tt_[ip_, ps_[ip_]] = ord('E')
+    tt_[~dg_.any(axis=1)] = np.frombuffer(b'nan'.ljust(ng + 1), dtype=np.uint8)
+    tt_ = np.ascontiguousarray(tt_).view('S%i' % (ng + 1)).ravel()
+    try:
+        vv_ = tt_.astype(np.float64)
+    except ValueError:
+        vv_ = np.empty(len(tt_))
+        for i, ss in enumerate(tt_):
+            try:
+                vv_[i] = float(ss)
+            except ValueError:
+                vv_[i] = np.nan
+    return vv_.reshape(nl_, 6)
+
+
 ##Считывает заголовок ENDF файла
 
 def e_head(sf):
@@ -147,6 +190,67 @@ def e_head(sf):
     return (D, Shell)
 
 
+## Двумерный раздел ENDF-файла (распределения для набора энергий налетающей частицы).
+# Все распределения хранятся в общих массивах x, y; распределение с номером i
+# занимает элементы of[i]:of[i+1], энергия налетающей частицы - e[i]
+
+class Endf2D():
+    """
+    """
+
+    def __init__(self, e, of, x, y):
+        self.e = np.ascontiguousarray(e, dtype=np.float64)
+        self.of = np.ascontiguousarray(of, dtype=np.int64)
+        self.x = np.ascontiguousarray(x, dtype=np.float64)
+        self.y = np.ascontiguousarray(y, dtype=np.float64)
+
+    ## Создание раздела из списка [[e, x, y], ...]
+    @classmethod
+    def from_blocks(cls, bl_):
+        """
+        """
+        nn_ = [len(tt_[1]) for tt_ in bl_]
+        of_ = np.zeros(len(nn_) + 1, dtype=np.int64)
+        of_[1:] = np.cumsum(nn_)
+        xx_ = [np.asarray(tt_[1], dtype=np.float64) for tt_ in bl_]
+        yy_ = [np.asarray(tt_[2], dtype=np.float64) for tt_ in bl_]
+        return cls([tt_[0] for tt_ in bl_],
+                   of_,
+                   np.concatenate(xx_) if len(xx_) else np.zeros(0),
+                   np.concatenate(yy_) if len(yy_) else np.zeros(0))
+
+    def __len__(self):
+        return len(self.e)
+
+    ## Распределение с номером i: (энергия, x, y); x и y - срезы общих массивов
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self.e)
+        if i < 0 or i >= len(self.e):
+            raise IndexError(i)
+        return self.e[i], self.x[self.of[i]:self.of[i + 1]], self.y[self.of[i]:self.of[i + 1]]
+
+    ## Число точек в каждом распределении
+    def npoint(self):
+        """
+        """
+        return np.diff(self.of)
+
+
+## Приводит раздел к типизированному виду:
+#    одномерный раздел - пара массивов (x, y)
+#    двумерный раздел - Endf2D
+
+def endf_section(mft_, vv_):
+    """
+    """
+    if mft_[0] == 26 and mft_[1] != 528:
+        if isinstance(vv_, Endf2D):
+            return vv_
+        return Endf2D.from_blocks(vv_)
+    return (np.asarray(vv_[0], dtype=np.float64), np.asarray(vv_[1], dtype=np.float64))
+
+
 def read_endf(sf_, pp_, mfmt_):
     """
     Middle read data from endf file
@@ -184,38 +288,14 @@ def read_endf_1d(sf, pp, mf, mt):
 
     """
 
-    ng = 11
-    res = []
-    ShellEb = []
     k = pp[(mf, mt)][1]
     k += GetDummy(mf, mt)
-    ss = sf[k]
-    nk = int(ss[55:66])
-    nrow = int(nk / 3);
-    npurga = int((nk - nrow * 3) / 1)
-    k += 1
-
-    el = [];
-    fl = []
-    for i in range(nrow):
-        k += 1
-        ss = sf[k]
-        for j in range(0, 3):
-            e = gavno2num(ss[2 * ng * j:ng * (2 * j + 1)]);
-            el.append(e)
-            f = gavno2num(ss[ng * (2 * j + 1):2 * ng * (j + 1)]);
-            fl.append(f)
-    if npurga != 0:
-        k += 1
-        ss = sf[k]
-        ##            if iPrintS:print(ss)
-        for j in range(0, npurga):
-            e = gavno2num(ss[2 * ng * j:ng * (2 * j + 1)]);
-            el.append(e)
-            f = gavno2num(ss[ng * (2 * j + 1):2 * ng * (j + 1)]);
-            fl.append(f)
-    res.append([el, fl])
-    return el, fl  # res
+    nk = int(sf[k][55:66])
+    nrow = (2 * nk + 5) // 6
+    dd_ = endf2float(sf[k + 2:k + 2 + nrow]).ravel()[:2 * nk]
+    el = dd_[0::2].copy()
+    fl = dd_[1::2].copy()
+    return el, fl
 
 
 ##Считывает энергию связи для оболочек атома
@@ -257,63 +337,146 @@ def read_endf_2d(sf, pp, mf, mt):
     26534 ...   Electroionization Subshell Cross Sections
     """
 
-    # global nmIniData
-    iPrint = False
-    iPrintS = False
-    if iPrint: print((mt, mf))
-    ng = 11
-    k = 0
     res = []
-    ShellEb = []
-    Ef = []
     k = pp[(mf, mt)][1]
     k += GetDummy(mf, mt)
-    ss = sf[k]
-    nE = int(ss[0:11]);
-    # only for 527 read data meaning energy loss
+    nE = int(sf[k][0:11])
     k += 1
+    # находим границы блоков по заголовкам, затем разбираем все строки раздела за один раз
+    k0 = k
+    hd_ = []
     for ie in range(nE):
-        ss = sf[k]
-        eE = gavno2num(ss[11:23]);
-        nk = int(ss[55:66])
-        Ef.append([eE, nk])
-        # nk=int(ss[0:11]);nm=int(ss[11:23])
-        # nk*=nm # This is only for 523 and 528
-        nrow = int(nk / 3);
-        npurga = int((nk - nrow * 3) / 1);
-        el = [];
-        fl = []
-        for i in range(nrow):
-            k += 1
-            ss = sf[k]
-            if iPrintS: print(ss)
-            for j in range(0, 3):
-                e = gavno2num(ss[2 * ng * j:ng * (2 * j + 1)]);
-                el.append(e)
-                f = gavno2num(ss[ng * (2 * j + 1):2 * ng * (j + 1)]);
-                fl.append(f)
-                # if iPrint:print e,f
-                # res.append([pp[k][1], e, f])
-        if npurga != 0:
-            k += 1
-            ss = sf[k]
-            for j in range(0, npurga):
-                e = gavno2num(ss[2 * ng * j:ng * (2 * j + 1)]);
-                el.append(e)
-                f = gavno2num(ss[ng * (2 * j + 1) + 1:2 * ng * (j + 1) + 1]);
-                fl.append(f)
-                # if iPrint:print e,f
-        res.append([eE, el, fl])
-        k += 1
-        ss = sf[k]
-    return res
-
-
-def str2float(vv_):
-    """
-    """
-    for ky in list(vv_.keys()):
-        pass
+        nk = int(sf[k][55:66])
+        hd_.append((k - k0, nk))
+        k += (2 * nk + 5) // 6 + 1
+    dd_ = endf2float(sf[k0:k])
+    of_ = np.zeros(nE + 1, dtype=np.int64)
+    ee_ = np.zeros(nE)
+    for ie, (i, nk) in enumerate(hd_):
+        tt_ = dd_[i + 1:].ravel()[:2 * nk]
+        ee_[ie] = dd_[i, 1]
+        of_[ie + 1] = of_[ie] + nk
+        res.append(tt_)
+    tt_ = np.concatenate(res) if nE else np.zeros(0)
+    return Endf2D(ee_, of_, tt_[0::2], tt_[1::2])
+
+
+## Каталог кэша для ENDF-файла. Ключ - путь к архиву, имя файла в архиве,
+#  время изменения и размер архива. В каталоге хранится заголовок (head.npz)
+#  и по одному файлу на каждый считанный раздел
+
+def endf_cache_dir(nmzip_, nfile_):
+    """
+    """
+    if not os.path.isfile(nmzip_):
+        return ''
+    st_ = os.stat(nmzip_)
+    ky_ = xxc.cache_key(os.path.abspath(nmzip_), nfile_, st_.st_mtime_ns, st_.st_size)
+    return xxc.cache_dir('endf', os.path.splitext(nfile_)[0] + '-' + ky_[:16])
+
+
+## Упаковка раздела ENDF-файла в набор массивов для записи в кэш
+#  одномерный раздел - массивы x, y
+#  двумерный раздел - энергии e, смещения o и общие массивы x, y
+
+def section2arrays(vv_):
+    """
+    """
+    if isinstance(vv_, Endf2D):
+        return {'e': vv_.e, 'o': vv_.of, 'x': vv_.x, 'y': vv_.y}
+    return {'x': vv_[0], 'y': vv_[1]}
+
+
+## Обратное преобразование набора массивов из кэша в раздел ENDF-файла
+
+def arrays2section(dd_):
+    """
+    """
+    if 'e' in dd_:
+        return Endf2D(dd_['e'], dd_['o'], dd_['x'], dd_['y'])
+    return (dd_['x'], dd_['y'])
+
+
+## Разделы ENDF-файла одного элемента.
+# Заголовок файла считывается сразу, а каждый раздел (mf, mt) переводится в числа
+# только при первом обращении к нему: берётся из кэша на диске, а при его отсутствии
+# разбирается текст ENDF-файла (архив распаковывается только в этом случае)
+
+class EndfData(dict):
+    """
+    """
+
+    def __init__(self, nmzip_, nfile_):
+        dict.__init__(self)
+        self.nmzip_ = nmzip_
+        self.nfile_ = nfile_
+        self.ss_ = None
+        self.dir_ = endf_cache_dir(nmzip_, nfile_)
+
+        dd_ = None
+        if len(self.dir_) > 0:
+            dd_ = xxc.load_arrays(os.path.join(self.dir_, 'head.npz'))
+        if dd_ is not None:
+            self.A = float(dd_['A'])
+            self.hh_ = {(int(tt_[0]), int(tt_[1])): [int(tt_[2]), int(tt_[3])] for tt_ in dd_['head']}
+            self.ElSh_ = [int(tt_) for tt_ in dd_['shell']]
+            return
+
+        ss_ = self.lines()
+        self.A = float(gavno2num(ss_[1].split()[1])) * phis.AEM
+        self.hh_, self.ElSh_ = e_head(ss_)  # read head of ENDF-file
+        if len(self.dir_) > 0:
+            hd_ = [[ky[0], ky[1], vv_[0], vv_[1]] for ky, vv_ in self.hh_.items()]
+            xxc.save_arrays(os.path.join(self.dir_, 'head.npz'),
+                            A=np.array(self.A),
+                            head=np.array(hd_, dtype=np.int64).reshape(-1, 4),
+                            shell=np.array(self.ElSh_, dtype=np.int64))
+
+    ## Строки ENDF-файла (файл распаковывается из архива при первом обращении)
+    def lines(self):
+        """
+        """
+        if self.ss_ is None:
+            sf = None
+            if z.is_zipfile(self.nmzip_):
+                with z.ZipFile(self.nmzip_, 'r') as fl_:
+                    try:
+                        sf = fl_.read(self.nfile_)
+                    except KeyError:
+                        pass
+            if sf is None:
+                print('Oтсутствует файл элемента {0} в базе данных ENDF.'.format(self.nfile_))
+                exit(3)
+            self.ss_ = str(sf, encoding='utf-8').split('\n')
+        return self.ss_
+
+    def __missing__(self, ky):
+        if ky not in self.hh_:
+            raise KeyError(ky)
+        nm_ = os.path.join(self.dir_, '%i_%i.npz' % ky) if len(self.dir_) > 0 else ''
+        dd_ = None
+        if len(nm_) > 0:
+            dd_ = xxc.load_arrays(nm_)
+        if dd_ is not None:
+            vv_ = arrays2section(dd_)
+        else:
+            vv_ = read_endf(self.lines(), self.hh_, ky)
+            if len(nm_) > 0:
+                xxc.save_arrays(nm_, **section2arrays(vv_))
+        self[ky] = vv_
+        return vv_
+
+
+## Контрольная сумма (CRC32) файла nfile_ в архиве nmzip_, 0 - если файла нет
+
+def zip_crc(nmzip_, nfile_):
+    """
+    """
+    try:
+        with z.ZipFile(nmzip_, 'r') as fl_:
+            return fl_.getinfo(nfile_).CRC
+    except (OSError, KeyError, z.BadZipFile):
+        return 0
 
 
 ##    Определяем наименование исходного файла
@@ -350,9 +513,7 @@ class Endf():
     """
     elZip_ = "e-ENDF-VII0.endf.zip"
     phZip_ = "photoat-ENDF-VII0.endf.zip"
-    _str = {}
     prtkl_ = ""
-    sig_ = {}
 
     ##Определяем наименование исходного ENDF-файла
     # по номеру элемента или его наименованию
@@ -372,8 +533,8 @@ class Endf():
 
         """
         """
-        self.sig_['ph'] = (501, 502, 504, 516, 522)
-        self.sig_['el'] = (526, 527, 528)
+        self.sig_ = {'ph': (501, 502, 504, 516, 522),
+                     'el': (526, 527, 528)}
         print(nfile)
         xdir_ = os.path.dirname(__file__)
         if len(nfile) == 0:
@@ -399,47 +560,32 @@ class Endf():
         else:
             exit(4)
 
-        if z.is_zipfile(NmFlZip_):
-            fl_ = z.ZipFile(NmFlZip_,'r')
-            try:
-                sf = fl_.read(nfile)
-                fl_.close()
-            except KeyError:
-                print('Oтсутствует файл элемента {0} в базе данных ENDF.'.format(nfile))
-                exit(3)
-
-        sf = str(sf, encoding='utf-8')
-
-        ss_ = sf.split('\n')
-
-        self.endf_A = float(gavno2num(ss_[1].split()[1])) * phis.AEM
-        self.hh_, self.ElSh_ = e_head(ss_)  # read head of ENDF-file
-
-        # убираем последнюю оболочку, если считаем ион
-
         self.sig_shell = {}
 
-        for ky in self.hh_.keys():
-            self._str[ky] = read_endf(ss_, self.hh_, ky)
+        # разделы файла считываются по мере обращения к ним
+        self._str = EndfData(NmFlZip_, nfile)
+        self.endf_A = self._str.A
+        self.hh_ = self._str.hh_
+        self.ElSh_ = self._str.ElSh_
+
         if ion:
             # print ion, sEl
+            # разделы иона уже в типизированном виде (ion_pkl.data_endf)
             ionp.set_ion(ion, self._str, elem=self._El)
-        ##        self.str_={ky:read_endf(ss_,pp_,ky) for ky in pp_.keys()}
 
-    ## Выдача данных в старом формате, где числа заданы в виде строк
+    ## Выдача данных в старом формате: [[mt, x, y]] или [[mt, e, x, y], ...]
     # Функция добавлена для совместимости со старыми версиями
 
     def getVS(self, mft_):
         """
         """
         vv_ = []
-        if mft_[0] in (23, 27) or mft_[1] == 528:
-            vv_.append([mft_[1], self._str[mft_][0], self._str[mft_][1]])
+        dd_ = self._str[mft_]
+        if isinstance(dd_, Endf2D):
+            for ee_, xx_, yy_ in dd_:
+                vv_.append([mft_[1], ee_, xx_.copy(), yy_.copy()])
         else:
-            dd_ = self._str[mft_]
-            ln_ = len(dd_)
-            for i in range(ln_):
-                vv_.append([mft_[1], dd_[i][0], dd_[i][1], dd_[i][2]])
+            vv_.append([mft_[1], dd_[0].copy(), dd_[1].copy()])
         return vv_
 
     ##Возвращает энергию связи оболочек в атоме
@@ -449,26 +595,21 @@ class Endf():
         """
         eb_ = {}
         for mt in self.ElSh_:
-            eb_[mt] = (float(self._str[(23, mt)][0][0]))
+            eb_[mt] = float(self._str[(23, mt)][0][0])
         return eb_
 
+    ## Возвращает копию раздела:
+    #    одномерный раздел - (x, y)
+    #    двумерный раздел - [(e, x, y), ...]
     def getV(self, mft_):
         """
         """
         dd_ = self._str[mft_]
 
-        if mft_[0] == 26 and mft_[1] != 528:
-            ll_ = len(dd_)
-            vv_ = []
-            for i in range(ll_):
-                ee_ = float(dd_[i][0])
-                xx_ = [float(tt_) for tt_ in dd_[i][1]]
-                yy_ = [float(tt_) for tt_ in dd_[i][2]]
-                vv_.append((ee_, xx_, yy_))
+        if isinstance(dd_, Endf2D):
+            vv_ = [(ee_, xx_.copy(), yy_.copy()) for ee_, xx_, yy_ in dd_]
         else:
-            xx_ = [float(tt_) for tt_ in dd_[0]]
-            yy_ = [float(tt_) for tt_ in dd_[1]]
-            vv_ = (xx_, yy_)
+            vv_ = (dd_[0].copy(), dd_[1].copy())
         return vv_
 
     ## Функция для двумерных распределений плотность вероятности и средние величины
@@ -479,27 +620,17 @@ class Endf():
         """
         dd_ = self._str[mft_]
 
-        if mft_[0] == 26 and mft_[1] != 528:
-            ll_ = len(dd_)
-            ave_ = []
-            ee_ = []
+        if isinstance(dd_, Endf2D):
             xx_ = []
             yy_ = []
-            for i in range(ll_):
-                ee_.append(float(dd_[i][0]))
-                it_ = (float(tt_) for tt_ in dd_[i][1])
-                xx_.append(np.fromiter(it_, np.float))
-                it_ = (float(tt_) for tt_ in dd_[i][2])
-                yy_.append(np.fromiter(it_, np.float))
+            ave_ = []
+            for ee_, xt_, yt_ in dd_:
+                xx_.append(xt_.copy())
+                yy_.append(yt_.copy())
                 ave_.append(xcalcvave(yy_[-1], xx_[-1]))
-            e0_ = np.asarray(ee_)
-            return (e0_, xx_, yy_, ave_)
+            return (dd_.e.copy(), xx_, yy_, ave_)
         else:
-            it_ = (float(tt_) for tt_ in dd_[0])
-            xx_ = (np.fromiter(it_, np.float))
-            it_ = (float(tt_) for tt_ in dd_[1])
-            yy_ = (np.fromiter(it_, np.float))
-            return ([], xx_, yy_)
+            return ([], dd_[0].copy(), dd_[1].copy())
 
     def getCDF(self, mft_):
         """
@@ -512,26 +643,16 @@ class Endf():
             """
         dd_ = self._str[mft_]
 
-        if mft_[0] == 26 and mft_[1] != 528:
-            ll_ = len(dd_)
+        if isinstance(dd_, Endf2D):
             vv_ = []
-            ee_ = []
             xx_ = []
-            yy_ = []
             pev_ = []
             fev_ = []
 
-            for i in range(ll_):
-                ee_.append(float(dd_[i][0]))
-                it_ = (float(tt_) for tt_ in dd_[i][1])
-                xt_ = np.fromiter(it_, np.float)
-                it_ = (float(tt_) for tt_ in dd_[i][2])
-                yt_ = np.fromiter(it_, np.float)
+            for ee_, xt_, yt_ in dd_:
+                xt_ = xt_.copy()
                 pev_.append(xcalcvave(yt_, xt_))
                 ss_ = xcumtrapz(yt_, xt_)
-                ##                tt_ = (np.trapz(yt_[j:j+2], xt_[j:j+2]) for j,x in enumerate(xt_[:-1]))
-                ##                ss_ = np.cumsum(np.fromiter(tt_, np.float))
-                ##                ss_ =np.insert(ss_, 0, 0.0)
                 if mft_[1] == 526 and ss_[-1] < 1.:
                     xt_ = np.append(xt_, 1.)
                     ss_ = np.append(ss_, 1.)
@@ -543,8 +664,7 @@ class Endf():
                     xt_ += 1.
                 xx_.append(xt_)
 
-            e0_ = np.asarray(ee_)
-            return (e0_, xx_, vv_, pev_, fev_)
+            return (dd_.e.copy(), xx_, vv_, pev_, fev_)
         else:
 
             return ([])
@@ -638,6 +758,21 @@ class Endf():
             return (ee_, SigAll_)
 
 
+## Контрольные суммы исходных данных элемента: ENDF-файла nfile
+#  и, для иона с зарядом ion, файла с данными иона (ions_files.zip).
+#  Используются в ключах хранилища рассчитанных элементов
+
+def endf_checksum(nfile, ion=0):
+    """
+    """
+    xdir_ = os.path.dirname(__file__)
+    nmzip_ = Endf.phZip_ if nfile.startswith('ph') else Endf.elZip_
+    crc_ = (zip_crc(os.path.join(xdir_, nmzip_), nfile),)
+    if ion:
+        crc_ += (zip_crc(os.path.join(xdir_, 'ions_files.zip'), nfile.split('_')[1] + '.pkl'),)
+    return crc_
+
+
 class Kendf(Endf):
     """
     """
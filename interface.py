@@ -63,6 +63,10 @@ class Init():
         self.xin['nG_ion'] = int(math.pow(2,nn))
         self.xin['nG_br'] = int(math.pow(2,6))
         self.xin['nG_para'] = int(math.pow(2,nn))
+        # photons: energies per block (0 - all energies at once),
+        # float32 accumulation of the composite nE x nX tables
+        self.xin['ph_block'] = 0
+        self.xin['ph_float32'] = False
 
 
         try:
@@ -16,7 +16,10 @@ import os
 import zipfile as z
 ##import json
 import pickle
-##import numpy as np
+import numpy as np
+
+import xxcache as xxc
+import endf as ken
 
 
 def infa():
@@ -49,60 +52,74 @@ def ion_data(elem):
 ##        return False
     return ss, sp
 
+## Разделы ENDF для иона с зарядом sti в типизированном виде (как endf.endf_section):
+#    (23, mt) - пара массивов (энергия, сечение), сечение умножается на множитель оболочки;
+#    (26, mt) - endf.Endf2D, плотности распределения умножаются на 0.5.
+#  Массивы общие для всех разделов и доступны только для чтения
 def data_endf(sti, bion, bstr):
     """
         sti -  заряд иона
         bion - словарь с ионами
         bstr - словарь с ENDF
     """
-##    sk = str(sti)
-##
+    ee_ = np.asarray(bion['sig'][0], dtype=np.float64)
+    sg_ = np.asarray(bion['sig'][1], dtype=np.float64)
+    ee_.setflags(write=False)
+    dd_ = None
     for mft in list(bion[sti].keys()):
-##        mt = int(smt)
         if mft[0] == 23:
-            vv = [bion[sti][mft] * tt for tt in bion['sig'][1]]
-            bstr[mft] = [bion['sig'][0], vv]
+            vv = bion[sti][mft] * sg_
+            vv.setflags(write=False)
+            bstr[mft] = (ee_, vv)
         elif mft[0] == 26:
-            dd_ = bion['difsig']
-            ln_ = len(dd_)
-            bstr[mft] = []
-            for i in range(ln_):
-                vv = [tt * 0.5 for tt in dd_[i][:][2]]
-                pass
-                bstr[mft].append([dd_[i][0],dd_[i][1], vv])
-
-    pass
-
+            if dd_ is None:
+                dd_ = ken.Endf2D.from_blocks(bion['difsig'])
+                dd_ = ken.Endf2D(dd_.e, dd_.of, dd_.x, dd_.y * 0.5)
+                for vv in (dd_.e, dd_.of, dd_.x, dd_.y):
+                    vv.setflags(write=False)
+            bstr[mft] = dd_
 
 
-def set_ion(zi, bb, elem ='O'):
+## Данные иона атома elem из архива ions_files.zip (файл читается прямо из архива)
+#  или None, если их нет
+def load_ion(elem):
     nfile = elem + '.pkl'
     cdir = os.path.dirname(__file__)
     fp = os.path.normpath(os.path.join(cdir, "ions_files.zip"))
-    if z.is_zipfile(fp):
-        fl_ = z.ZipFile(fp,'r')
+    if not z.is_zipfile(fp):
+        return None
+    with z.ZipFile(fp, 'r') as fl_:
         try:
-            ##            dp = pickle.load(open(nfile))
-            sf = fl_.extract(nfile)
-            ##            ss_ = sf.split('\n')
-            ##            dp = pickle.load(fl_.open(nfile,'r'))
-            #print(sf)
-            o_pkl = open(sf,'rb')
-            dp = pickle.load(o_pkl)
-            o_pkl.close()
-            os.remove(sf)
-            fl_.close()
-            print('Обрабатывается информация об ионе атома %s. Заряд иона - %d' % (elem, zi))
+            return pickle.loads(fl_.read(nfile))
         except KeyError:
-            print('Oтсутствует информация об ионе атома %s' % elem)
-            return False
+            return None
+
 
-##    dp = {}
-##    dp = pickle.load(open( fp))
-##    pass
+## Разделы ENDF для иона (elem, zi), уже приведённые к типизированному виду
+xMemo = xxc.Memo(16)
 
-    data_endf(zi, dp, bb)
-    pass
+
+def ion_sections(zi, elem):
+    ky_ = (elem, zi)
+    dd_ = xMemo.get(ky_)
+    if dd_ is not None:
+        return dd_
+    dp = load_ion(elem)
+    if dp is None:
+        return None
+    dd_ = {}
+    data_endf(zi, dp, dd_)
+    return xMemo.put(ky_, dd_)
+
+
+## Замена разделов ENDF bb разделами для иона атома elem с зарядом zi
+def set_ion(zi, bb, elem ='O'):
+    dd_ = ion_sections(zi, elem)
+    if dd_ is None:
+        print('Oтсутствует информация об ионе атома %s' % elem)
+        return False
+    print('Обрабатывается информация об ионе атома %s. Заряд иона - %d' % (elem, zi))
+    bb.update(dd_)
     return True
 
 if __name__ == '__main__':
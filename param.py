@@ -18,6 +18,11 @@ import yaml
 golb = """
 electron: true
 photon: true
+jobs: 0
+rebuild: false
+ph_block: 0
+ph_float32: false
+cache: ''
 mat: mat_files
 par: xrb_parameters.ini
 """
@@ -0,0 +1,180 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+## @package prtk_output
+# Данный модуль предназначен для записи выходных таблиц программы переноса РЭМП
+#   - таблица записывается один раз (через временный файл, атомарно);
+#   - для остальных слоёв с тем же материалом создаются жёсткие ссылки на неё
+#     (если файловая система их не поддерживает - reflink или обычная копия);
+#   - манифест каталога (prtk_manifest.txt) хранит хеш, размер и время изменения
+#     записанных файлов: при повторном запуске неизменённые таблицы не перезаписываются
+
+import io
+import os
+import shutil
+import hashlib
+import contextlib
+
+## Имя файла манифеста в каталоге проекта
+xManifest = 'prtk_manifest.txt'
+
+## Создавать жёсткие ссылки (False - всегда копировать)
+xLink = True
+
+## Код ioctl FICLONE (Linux): копия с общими блоками данных (copy-on-write)
+xFiClone = 0x40049409
+
+
+## Хеш содержимого таблицы
+def text_hash(text):
+    """
+    """
+    return hashlib.sha1(text.encode('utf-8', 'surrogateescape')).hexdigest()
+
+
+## Атомарная запись текста в файл nfl: временный файл переименовывается в nfl.
+#  Существующий файл заменяется, а не перезаписывается, поэтому связанные с ним
+#  жёсткими ссылками файлы других слоёв не меняются
+def write_text(nfl, text):
+    """
+    """
+    tmp_ = nfl + '.tmp'
+    try:
+        with open(tmp_, 'w') as ff:
+            ff.write(text)
+        os.replace(tmp_, nfl)
+    except OSError:
+        if os.path.exists(tmp_):
+            os.remove(tmp_)
+        raise
+
+
+## Копия файла src в dst (dst не должен существовать): reflink там, где он
+#  поддерживается, иначе обычное копирование
+def copy_file(src, dst):
+    """
+    """
+    try:
+        import fcntl
+    except ImportError:
+        fcntl = None
+    if fcntl is not None:
+        try:
+            with open(src, 'rb') as fs_, open(dst, 'wb') as fd_:
+                fcntl.ioctl(fd_.fileno(), xFiClone, fs_.fileno())
+            return 'copy'
+        except OSError:
+            pass
+    shutil.copyfile(src, dst)
+    return 'copy'
+
+
+## Файл dst с содержимым src: жёсткая ссылка, при невозможности - копия.
+#  Существующий dst удаляется, а не перезаписывается
+def link_file(src, dst):
+    """
+    """
+    if os.path.exists(dst):
+        if os.path.samefile(src, dst):
+            return 'skip'
+        os.remove(dst)
+    if xLink:
+        try:
+            os.link(src, dst)
+            return 'link'
+        except OSError:
+            pass
+    return copy_file(src, dst)
+
+
+## Считывание манифеста: {имя файла: (хеш, размер, время изменения в нс)}
+def read_manifest(nfl):
+    """
+    """
+    dd_ = {}
+    try:
+        with open(nfl, 'r', encoding='utf-8') as ff:
+            for ss_ in ff:
+                ll_ = ss_.split('\t')
+                if len(ll_) == 4:
+                    dd_[ll_[0]] = (ll_[1], int(ll_[2]), int(ll_[3]))
+    except (OSError, ValueError):
+        return {}
+    return dd_
+
+
+## Запись выходных таблиц в каталог dir_ с учётом манифеста
+class Output:
+    """
+    """
+
+    def __init__(self, dir_):
+        self.dir = dir_
+        self.fl = os.path.join(dir_, xManifest)
+        self.files = read_manifest(self.fl)
+        self.stat = {'write': 0, 'skip': 0, 'link': 0, 'copy': 0}
+
+    def path(self, name):
+        return os.path.join(self.dir, name)
+
+    ## Файл name есть, имеет содержимое с хешем hh и не менялся после записи в манифест
+    def unchanged(self, name, hh):
+        rec_ = self.files.get(name)
+        if rec_ is None or rec_[0] != hh:
+            return False
+        try:
+            st_ = os.stat(self.path(name))
+        except OSError:
+            return False
+        return (st_.st_size, st_.st_mtime_ns) == rec_[1:]
+
+    def remember(self, name, hh):
+        st_ = os.stat(self.path(name))
+        self.files[name] = (hh, st_.st_size, st_.st_mtime_ns)
+
+    ## Записать таблицу name с текстом text (если она изменилась)
+    def write(self, name, text):
+        hh_ = text_hash(text)
+        if self.unchanged(name, hh_):
+            self.stat['skip'] += 1
+            return False
+        write_text(self.path(name), text)
+        self.remember(name, hh_)
+        self.stat['write'] += 1
+        return True
+
+    ## Запись таблицы name через файловый объект:
+    #  with out.open(name) as out_: out_.write(...)
+    @contextlib.contextmanager
+    def open(self, name):
+        buf_ = io.StringIO()
+        yield buf_
+        self.write(name, buf_.getvalue())
+
+    ## Таблица dst - та же, что записанная ранее таблица src
+    def link(self, src, dst):
+        hh_ = self.files[src][0]
+        if self.unchanged(dst, hh_):
+            self.stat['skip'] += 1
+            return
+        kk_ = link_file(self.path(src), self.path(dst))
+        self.remember(dst, hh_)
+        self.stat[kk_] += 1
+
+    ## Таблицы nf + номер слоя для слоёв im: записана для im[0], для остальных - ссылки
+    def copy(self, nf, im):
+        src_ = nf + '{0:03d}'.format(im[0])
+        for i in im[1:]:
+            self.link(src_, nf + '{0:03d}'.format(i))
+
+    ## Запись манифеста (записи об удалённых файлах не сохраняются)
+    def save(self):
+        ss_ = ''.join(['{0}\t{1}\t{2}\t{3}\n'.format(nm_, *rec_)
+                       for nm_, rec_ in sorted(self.files.items())
+                       if os.path.isfile(self.path(nm_))])
+        try:
+            write_text(self.fl, ss_)
+        except OSError:
+            print('Не удалось записать манифест %s' % self.fl)
+
+    def report(self):
+        return 'Записано {write}, без изменений {skip}, ссылок {link}, копий {copy}'.format(**self.stat)
@@ -17,6 +17,8 @@ import yaml
 import zipfile as z
 import numpy as np
 
+import xxcache as xxc
+
 s_templ = "FBB_P_"
 
 head = """Сила торможения протонов в {0:s}
@@ -76,44 +78,116 @@ def read_lib(dr, fl_nist, ptkl='p', proc=['NIST', 'NUCLEAR'], ):
 
     if z.is_zipfile(nmflzip):
 
-        fl_ = z.ZipFile(nmflzip)
-
-        sf = fl_.read('el_z.txt')
-        et = str(sf, encoding='utf-8').split('\n')
-        en = list(map(int, et))
-
-        if fl_nist > en[-1]: fl_nist = en[-1]
-
-        if fl_nist in en:
-            try:
-                sf = fl_.read(str(fl_nist))
-                fl_.close()
-                v_nist = read_nist(sf)
-                return v_nist
-
-            except KeyError:
-                print(u'Проблема c данными')
-                exit(3)
-        else:
-            for i, n1 in enumerate(en[0:-1]):
-                dn1 = fl_nist - n1
-                dn2 = fl_nist - en[i + 1]
-                tt = dn1 * dn2
-                ##                    print(tt)
-                if tt < 0:
-                    n2 = en[i + 1]
-                    break
-            sf1 = fl_.read(str(n1))
-            sf2 = fl_.read(str(n2))
-            fl_.close()
-            dn = float(n2 - n1)
-            dv = dn1 / dn
-            ##                    dn2 *= -1
-            ##                    dv2 = dn2 / dn
-            v1 = read_nist(sf1)[:, 0:4]
-            v2 = read_nist(sf2)[:, 0:4]
-            v = v2 * (1.0 - dv) + v1 * dv
-            return v
+        with z.ZipFile(nmflzip) as fl_:
+            en = read_list(fl_, 'el_z.txt', int)
+            return read_z(fl_, en, fl_nist)
+
+
+## Список чисел (тип tp) из текстового файла nm архива fl_
+def read_list(fl_, nm, tp=float):
+    """
+    """
+    sf = fl_.read(nm)
+    et = str(sf, encoding='utf-8').split('\n')
+    return list(map(tp, et))
+
+
+## Тормозные способности для элемента fl_nist из открытого архива fl_ (en - номера
+#  элементов в архиве). Для элемента, которого нет в архиве, - линейная
+#  интерполяция по соседним элементам
+def read_z(fl_, en, fl_nist):
+    """
+    """
+    if fl_nist > en[-1]: fl_nist = en[-1]
+
+    if fl_nist in en:
+        try:
+            sf = fl_.read(str(fl_nist))
+            v_nist = read_nist(sf)
+            return v_nist
+
+        except KeyError:
+            print(u'Проблема c данными')
+            exit(3)
+    else:
+        for i, n1 in enumerate(en[0:-1]):
+            dn1 = fl_nist - n1
+            dn2 = fl_nist - en[i + 1]
+            tt = dn1 * dn2
+            ##                    print(tt)
+            if tt < 0:
+                n2 = en[i + 1]
+                break
+        sf1 = fl_.read(str(n1))
+        sf2 = fl_.read(str(n2))
+        dn = float(n2 - n1)
+        dv = dn1 / dn
+        ##                    dn2 *= -1
+        ##                    dv2 = dn2 / dn
+        v1 = read_nist(sf1)[:, 0:4]
+        v2 = read_nist(sf2)[:, 0:4]
+        v = v2 * (1.0 - dv) + v1 * dv
+        return v
+
+
+## Библиотека тормозных способностей stpw-<ptkl>.zip, приведённая к общей сетке
+#  энергий (energy.txt): таблица tab (nZ x nE), строка i - элемент z[i].
+#  Таблица строится один раз и хранится рядом с архивом (stpw-<ptkl>.npz)
+class StopLib:
+    """
+    """
+    xAttr = ['z', 'energy', 'tab', 'stamp']
+
+    def __init__(self, dr, ptkl='p'):
+        nmflzip = os.path.join(dr, 'stpw-' + ptkl + '.zip')
+        self.stamp = zip_stamp(nmflzip)
+        nfl_ = os.path.splitext(nmflzip)[0] + '.npz'
+        dd_ = xxc.load_arrays(nfl_)
+        if dd_ is not None and sorted(dd_.keys()) == sorted(self.xAttr) and \
+                np.array_equal(dd_['stamp'], self.stamp):
+            for ky in self.xAttr:
+                setattr(self, ky, dd_[ky])
+            return
+
+        with z.ZipFile(nmflzip) as fl_:
+            en = read_list(fl_, 'el_z.txt', int)
+            self.energy = np.array(read_list(fl_, 'energy.txt'))
+            self.z = np.arange(en[0], en[-1] + 1)
+            self.tab = np.zeros((len(self.z), len(self.energy)))
+            for i, iz in enumerate(self.z):
+                vv = read_z(fl_, en, iz)
+                self.tab[i] = np.interp(self.energy, vv[:, 0], vv[:, 3])
+        xxc.save_arrays(nfl_, **{ky: getattr(self, ky) for ky in self.xAttr})
+
+    ## Тормозная способность смеси: elem - [(номер элемента, массовая доля)].
+    #  Вклады элементов суммируются последовательно, в порядке elem
+    def mix(self, elem):
+        iz_ = np.minimum([int(c[0]) for c in elem], self.z[-1]) - self.z[0]
+        w_ = np.array([c[1] for c in elem], dtype=float)
+        return np.cumsum(w_[:, None] * self.tab[iz_], axis=0)[-1]
+
+
+## Размер и время изменения архива
+def zip_stamp(nmflzip):
+    """
+    """
+    st_ = os.stat(nmflzip)
+    return np.array([st_.st_size, st_.st_mtime_ns], dtype=np.int64)
+
+
+## Загруженные библиотеки тормозных способностей
+xLib = xxc.Memo(4)
+
+
+## Библиотека тормозных способностей из каталога dr (StopLib)
+def stop_lib(dr, ptkl='p'):
+    """
+    """
+    ky_ = (os.path.abspath(dr), ptkl)
+    lib_ = xLib.get(ky_)
+    if lib_ is not None and np.array_equal(lib_.stamp, zip_stamp(os.path.join(dr, 'stpw-' + ptkl + '.zip'))):
+        return lib_
+    return xLib.put(ky_, StopLib(dr, ptkl))
 
 
 ## Класс для работы с входной информацией о композитах
@@ -243,21 +317,13 @@ def make_prtk_prt(spr, sly):
     sb_ = os.path.dirname(spr)
     elx = read_el(sp_)
     drmat = os.path.join(sp_, 'mat_files')
-    nmflzip = 'stpw-p.zip'
-    nmflzip = os.path.join(sp_, nmflzip)
-
-    if z.is_zipfile(nmflzip):
-        fl_ = z.ZipFile(nmflzip)
-
-        sf = fl_.read('energy.txt')
-        et = str(sf, encoding='utf-8').split('\n')
-        ehp = list(map(float, et))
+    lib_ = stop_lib(sp_)
+    ehp = lib_.energy
 
     sb = os.path.dirname(spr)
 
     dly = read_layer(sly, nmfl='')
     for mat_, ro in dly.keys():
-        st_pow_ = np.zeros((len(ehp),))
         mt = mat_.upper()
         lmat = dly[(mat_, ro)]
         print(mat_, ro)
@@ -267,15 +333,9 @@ def make_prtk_prt(spr, sly):
         comp = Compozit(fmt)
         ev = comp.conver()
 
-        for it_, tt in enumerate(ev[list(ev.keys())[0]]['elem']):
-            ##            am += int(tt['A']) * tt['p']
-            print(tt)
-            nme = tt[0]
-            print(nme)
-            num = elx[nme]['NN']
-            vv = read_lib(sp_, num, )
-            sx = np.interp(ehp, vv[:, 0], vv[:, 3])
-            st_pow_ += tt[1] * sx
+        elem_ = ev[list(ev.keys())[0]]['elem']
+        print(elem_)
+        st_pow_ = lib_.mix([(elx[tt[0]]['NN'], tt[1]) for tt in elem_])
 
         for nmb in lmat:
 
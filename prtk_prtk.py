@@ -23,6 +23,8 @@ import numpy as np
 
 import compoz_read as cord
 import Project_reader_tables
+import prtk_output
+import xxcache as xxc
 
 ## Функция для считывания материалов, для которых
 # необходимо пересчитать таблицы
@@ -35,145 +37,107 @@ prc = ['REC', ]
 prc1 = ['REC']
 
 
-def ff_rec(fl, kf):
-    try:
-        with open(fl, 'r', encoding='utf-8') as infl:
-            ls = infl.readlines()
-    except IOError:
-        print(("такого файла наверное нет.\n%s" % fl))
-        return []
-
-    return ls
-
-
-def ff_ela(fl, kf):
-    try:
-        with open(fl, 'r', encoding='utf-8') as infl:
-            ls = infl.readlines()
-    except IOError:
-        print(("такого файла наверное нет.\n%s" % fl))
-        return []
-    nn = int(ls[5])
-    fs = ls[:10]
-
+## Шаблон таблицы РЭМП (prtk_files/<MAT>/_XXX_<MAT>): текст таблицы с местами для
+#  значений, которые пересчитываются по плотности. Шаблон разбирается один раз,
+#  таблица для новой плотности - умножение массива значений и одно форматирование
+class Template:
+    """
+    """
+    xAttr = ['fmt', 'val', 'pw']
+
+    def __init__(self):
+        self.fmt = []
+        self.val = []
+        self.pw = []
+
+    ## Неизменяемый текст
+    def add(self, ss):
+        self.fmt.append(ss.replace('%', '%%'))
+
+    ## Значение v, которое умножается на kf ** pw и записывается в формате vf
+    def value(self, v, pw=1, vf='%13.4e '):
+        self.fmt.append(vf)
+        self.val.append(v)
+        self.pw.append(pw)
+
+    def close(self):
+        self.fmt = ''.join(self.fmt)
+        self.val = np.array(self.val, dtype=float)
+        self.pw = np.array(self.pw, dtype=int)
+        return self
+
+    ## Текст таблицы для коэффициента пересчёта плотности kf
+    def render(self, kf):
+        kk_ = np.where(self.pw == 2, kf * kf, kf)
+        return self.fmt % tuple((self.val * kk_).tolist())
+
+    def save(self, nfl):
+        return xxc.save_arrays(nfl, fmt=np.frombuffer(self.fmt.encode('utf-8'), np.uint8),
+                               val=self.val, pw=self.pw)
+
+    @classmethod
+    def load(cls, nfl):
+        dd_ = xxc.load_arrays(nfl)
+        if dd_ is None or sorted(dd_.keys()) != sorted(cls.xAttr):
+            return None
+        tp_ = cls()
+        tp_.fmt = dd_['fmt'].tobytes().decode('utf-8')
+        tp_.val = dd_['val']
+        tp_.pw = dd_['pw']
+        return tp_
+
+
+## Разбор шаблонов: ls - строки файла, tp - Template.
+#  Пересчитывается второй столбец (позиции 12:25) строк данных
+def ff_rec(ls, tp):
+    tp.add(''.join(ls))
+
+
+def ff_ela(ls, tp):
+    tp.add(''.join(ls[:10]))
     for ll in ls[10:]:
-        tt = '{0:13.4e} '.format(float(ll[12:25]) * kf)
-        ll = ll[:12] + tt + ll[25:]
-        fs.append(ll)
-
-    return fs
+        tp.add(ll[:12])
+        tp.value(float(ll[12:25]))
+        tp.add(ll[25:])
 
 
-def ff_att(fl, kf):
-    try:
-        with open(fl, 'r', encoding='utf-8') as infl:
-            ls = infl.readlines()
-    except IOError:
-        print(("такого файла наверное нет.\n%s" % fl))
-        return []
-    kf2 = kf * kf
+def ff_att(ls, tp):
     nb = 8
-    na = int(ls[5])
-    fs = ls[:nb]
-
+    tp.add(''.join(ls[:nb]))
     for i, ll in enumerate(ls[nb:]):
-        if i < 35:
-            kk = kf2
-        else:
-            kk = kf
-
-        tt = '{0:13.4e} '.format(float(ll[12:25]) * kk)
-        ll = ll[:12] + tt + '\n'
-        fs.append(ll)
-
-    return fs
-
-
-def ff_ion(fl, kf):
-    try:
-        with open(fl, 'r', encoding='utf-8') as infl:
-            ls = infl.readlines()
-    except IOError:
-        print(("такого файла наверное нет.\n%s" % fl))
-        return []
-    fs = []
-    nn = int(ls[4])
-
-    nb = 7
-    nh = 8
-    fs = ls[:nb]
-
-    for i in range(nn):
-        [fs.append(ss) for ss in ls[nb:nb + nh]]
-        nl = int(ls[nb + nh - 2])
-        for ll in ls[nb + nh:nb + nh + nl]:
-            tt = '{0:13.4e} '.format(float(ll[12:25]) * kf)
-            ll = ll[:12] + tt + ll[25:]
-            fs.append(ll)
-        nb += nh + nl
-
-    return fs
-
-
-def ff_exc(fl, kf):
-    try:
-        with open(fl, 'r', encoding='utf-8') as infl:
-            ls = infl.readlines()
-    except IOError:
-        print(("такого файла наверное нет.\n%s" % fl))
-        return []
-    fs = []
-    nn = int(ls[4])
+        tp.add(ll[:12])
+        tp.value(float(ll[12:25]), 2 if i < 35 else 1)
+        tp.add('\n')
 
-    nb = 5
-    nh = 8
-    fs = ls[:nb]
 
+## Таблицы из блоков: заголовок блока nh строк, в строке nh-2 - число строк данных.
+#  eol - добавка в конце строки данных
+def ff_blocks(ls, tp, nn, nb, nh, eol=''):
+    tp.add(''.join(ls[:nb]))
     for i in range(nn):
-        [fs.append(ss) for ss in ls[nb:nb + nh]]
+        tp.add(''.join(ls[nb:nb + nh]))
         nl = int(ls[nb + nh - 2])
         for ll in ls[nb + nh:nb + nh + nl]:
-            tt = '{0:13.4e} '.format(float(ll[12:25]) * kf)
-            ll = ll[:12] + tt + ll[25:] + '\n'
-            fs.append(ll)
+            tp.add(ll[:12])
+            tp.value(float(ll[12:25]))
+            tp.add(ll[25:] + eol)
         nb += nh + nl
 
-    return fs
 
+def ff_ion(ls, tp):
+    ff_blocks(ls, tp, int(ls[4]), 7, 8)
 
-def ff_rot(fl, kf):
-    try:
-        with open(fl, 'r', encoding='utf-8') as infl:
-            ls = infl.readlines()
-    except IOError:
-        print(("такого файла наверное нет.\n%s" % fl))
-        return []
-    fs = []
-    nn = int(ls[3])
 
-    nb = 4
-    nh = 6
-    fs = ls[:nb]
+def ff_exc(ls, tp):
+    ff_blocks(ls, tp, int(ls[4]), 5, 8, '\n')
 
-    for i in range(nn):
-        [fs.append(ss) for ss in ls[nb:nb + nh]]
-        nl = int(ls[nb + nh - 2])
-        for ll in ls[nb + nh:nb + nh + nl]:
-            tt = '{0:13.4e} '.format(float(ll[12:25]) * kf)
-            ll = ll[:12] + tt + ll[25:]
-            fs.append(ll)
-        nb += nh + nl
 
-    return fs
+def ff_rot(ls, tp):
+    ff_blocks(ls, tp, int(ls[3]), 4, 6)
 
 
-def ff_elt(fl, kf):
-    with open(fl, 'r', encoding='utf-8') as infl:
-        ls = infl.readlines()
-
-    description = ls[:10]
-
-    fs = description
+def ff_elt(ls, tp):
+    tp.add(''.join(ls[:10]))
 
     array = []
     for ll in ls[10:]:
@@ -182,20 +146,53 @@ def ff_elt(fl, kf):
     array = np.array(array, dtype=float)
 
     for i in range(array.shape[0]):
-        string = '{:6.5E}  {:6.5E}  '.format(array[i, 0], array[i, 1] * kf)
+        tp.add('{:6.5E}  '.format(array[i, 0]))
+        tp.value(array[i, 1], vf='%6.5E  ')
         fu = ''
         for j in range(2, array.shape[1]):
             fu += '{:6.5E}'.format(array[i, j]) + '  '
-
-        fs.append(string + fu + '\n')
-
-    return fs
+        tp.add(fu + '\n')
 
 
 prt = {'ELA': ff_ela, 'EXC': ff_exc, 'ION': ff_ion,
        'ROT': ff_rot, 'ATT': ff_att, 'REC': ff_rec,
        'ELT': ff_elt}
 
+## Версия разбора шаблонов. Увеличивается при изменении Template или ff_*
+xVersion = 1
+
+## Разобранные шаблоны
+xMemo = xxc.Memo(32)
+
+
+## Шаблон pp из файла fl: из памяти, из хранилища на диске или разбором файла.
+#  Если файла нет - None
+def read_template(fl, pp):
+    """
+    """
+    try:
+        st_ = os.stat(fl)
+    except OSError:
+        print(("такого файла наверное нет.\n%s" % fl))
+        return None
+    ky_ = ('prtk', xVersion, pp, os.path.abspath(fl), st_.st_size, st_.st_mtime_ns)
+    tp_ = xMemo.get(ky_)
+    if tp_ is not None:
+        return tp_
+    dr_ = xxc.cache_dir('prtk')
+    nfl_ = os.path.join(dr_, '%s-%s.npz' % (pp, xxc.cache_key(*ky_))) if len(dr_) > 0 else ''
+    if len(nfl_) > 0:
+        tp_ = Template.load(nfl_)
+    if tp_ is None:
+        with open(fl, 'r', encoding='utf-8') as infl:
+            ls = infl.readlines()
+        tp_ = Template()
+        prt[pp](ls, tp_)
+        tp_.close()
+        if len(nfl_) > 0:
+            tp_.save(nfl_)
+    return xMemo.put(ky_, tp_)
+
 
 def read_ro(fl):
     try:
@@ -208,7 +205,7 @@ def read_ro(fl):
     return ro
 
 
-def prtk_copy_file(dir, dirin, mt, ro, im, dg, exist_list):
+def prtk_copy_file(dir, dirin, mt, ro, im, dg, exist_list, out=None):
     fs = os.path.join(dirin, mt)
     fl = os.path.join(fs, 'RO_' + mt)
     ro_t = read_ro(fl)
@@ -218,14 +215,12 @@ def prtk_copy_file(dir, dirin, mt, ro, im, dg, exist_list):
     nf = [os.path.split(ff)[-1] for ff in tt]
     prc = [ff.split('_')[1] for ff in nf]
 
-    path_dict = Project_reader_tables.check_folder(dir)
-    lay_dir = os.path.join(dir, path_dict['LAY'])
-    layers_data, conductivity = Project_reader_tables.DataParcer(lay_dir).lay_decoder()
-
-    lay_conductivity_dict = {}
-    for i in range(len(layers_data)):
-        lay_conductivity_dict.update({int(layers_data[i][0]): conductivity[i]})
+    lay_conductivity_dict = Project_reader_tables.load_project(dir).conductivity_dict
 
+    wr = out if out is not None else prtk_output.Output(dir)
+    # пересчитанные таблицы одинаковы для всех слоёв материала:
+    # каждая пишется один раз, для остальных слоёв - ссылки на неё
+    done = {}
     for i in im:
 
         if lay_conductivity_dict[i] == 6:
@@ -237,27 +232,33 @@ def prtk_copy_file(dir, dirin, mt, ro, im, dg, exist_list):
         for pp in prc:
             if f'_{pp}_' in exist_list.keys() or cond_six:
                 if cond_six:
-                    write_prtk_files(pp, mt, fs, kf, ie, dg, dir)
+                    write_prtk_files(pp, mt, fs, kf, ie, dg, wr, done)
 
                 elif int(exist_list.get(f'_{pp}_')) != 0:
-                    write_prtk_files(pp, mt, fs, kf, ie, dg, dir)
+                    write_prtk_files(pp, mt, fs, kf, ie, dg, wr, done)
 
             # elif lay_conductivity_dict[i] == 6:
             #     if pp == 'ELA':
-            #         write_prtk_files('ELT', mt, fs, kf, ie, dg, dir)
+            #         write_prtk_files('ELT', mt, fs, kf, ie, dg, wr, done)
             #     else:
-            #         write_prtk_files(pp, mt, fs, kf, ie, dg, dir)
+            #         write_prtk_files(pp, mt, fs, kf, ie, dg, wr, done)
+
+    if out is None:
+        wr.save()
 
 
-def write_prtk_files(pp, mt, fs, kf, ie, dg, dir):
+## Запись пересчитанной таблицы pp для слоя ie через wr (prtk_output.Output).
+#  done - уже записанные таблицы {pp: имя файла}, для них создаётся ссылка
+def write_prtk_files(pp, mt, fs, kf, ie, dg, wr, done):
     f_old = '_' + pp + '_' + mt
-    fsp = os.path.join(fs, f_old)
-    ls = prt[pp](fsp, kf)
     f_new = '_' + pp + '_' + ie
-    fd = os.path.join(dir, f_new)
     dg.write(' {0} => {1} \n'.format(f_old, f_new))
-    with open(fd, 'w') as ff:
-        ff.writelines(ls)
+    if pp in done:
+        wr.link(done[pp], f_new)
+        return
+    tp_ = read_template(os.path.join(fs, f_old), pp)
+    wr.write(f_new, tp_.render(kf) if tp_ is not None else '')
+    done[pp] = f_new
 
 
 ## Функция для пересчета таблиц
@@ -267,6 +268,7 @@ def main(dp):
     """
     k = 1
 
+    xxc.set_cache_root(dp.get('cache', ''))
     dly = cord.read_layer(dp['lay'], nmfl='')
     idir_ = os.path.dirname(dp.get('rmp', ''))
     pdir = os.path.join(os.path.dirname(__file__), dir_file)
@@ -279,19 +281,13 @@ def main(dp):
     fllog = os.path.join(idir_, 'log_table_prtk.txt')
 
     dlog = open(fllog, 'w')
+    wr = prtk_output.Output(idir_)
     print(fllog)
 
-    path_dict = Project_reader_tables.check_folder(idir_)
-
-    par_dir = os.path.join(os.path.join(idir_, path_dict['PAR']))
-    pl_dir = os.path.join(idir_, path_dict['PL'])
-
-    part_list, part_types = Project_reader_tables.DataParcer(par_dir).par_decoder()
-    move, io_brake, layers_numbers = Project_reader_tables.DataParcer(pl_dir).pl_decoder()
+    prj = Project_reader_tables.load_project(idir_)
 
-    move_dict = {}
-    for i in range(layers_numbers.shape[0]):
-        move_dict.update({layers_numbers[i]: move[:, i]})
+    part_list, part_types = prj.part_list, prj.part_types
+    move_dict = prj.move_dict
 
     # print(exist_dict)
 
@@ -320,7 +316,7 @@ def main(dp):
         #     shutil.copyfile(pattern_file_path, save_path)
 
         if mt in pmat:
-            prtk_copy_file(idir_, pdir, mt, ro, lmat, dlog, exist_dict)
+            prtk_copy_file(idir_, pdir, mt, ro, lmat, dlog, exist_dict, wr)
 
             sx = 'For {material} Density = {density} {lay}'.format(material=mat_, density=ro, lay=lmat)
             print(sx)
@@ -329,6 +325,8 @@ def main(dp):
     if True:
         pass
 
+    wr.save()
+    dlog.write(wr.report() + '\n')
     dlog.close()
 
 
@@ -14,7 +14,6 @@
 import os
 import shutil
 import numpy as np
-from functools import reduce
 
 Debug_ = False
 
@@ -43,6 +42,7 @@ import xxfun as xox
 import phisconst as phis
 import Project_reader_tables
 import prtk_proton
+import prtk_output
 
 import compoz_read as cord
 
@@ -172,30 +172,15 @@ parot_['.526']['head'] = """\
 k2r = 0.99
 
 
-def copy_file(dir, nf, im):
-    if len(im) == 1:
-        return
-    fs = os.path.join(dir, nf + '{0:03d}'.format(im[0]))
-
-    for i in im[1:]:
-        fd = os.path.join(dir, nf + '{0:03d}'.format(i))
-        shutil.copyfile(fs, fd)
-        pass
-
-    pass
-
-
-def prtk_copy_file(dir, nf, im):
-    if len(im) == 1:
-        return
-    fs = os.path.join(dir, nf + '{0:03d}'.format(im[0]))
-
-    for i in im[1:]:
-        fd = os.path.join(dir, nf + '{0:03d}'.format(i))
-        shutil.copyfile(fs, fd)
-        pass
-
-    pass
+## Запись строк таблицы РЭМП в файл out_: строка k - начало ss[k] (шаблон 'data'
+#  из parot_) и значения vv[k, :] в формате fmt (ширина столбцов как в исходных
+#  таблицах). Строка форматируется одним вызовом format, блок пишется целиком
+def write_rows(out_, ss, vv, fmt='{0:12.5E}'):
+    """
+    """
+    vv = np.atleast_2d(vv)
+    fr_ = fmt.replace('{0', '{') * vv.shape[1] + '\n'
+    out_.write(''.join([s_ + fr_.format(*v_) for s_, v_ in zip(ss, vv.tolist())]))
 
 
 def get_list_material(mat_fl_):
@@ -217,27 +202,15 @@ def main(dp):
     idir_ = os.path.dirname(dp.get('rmp', ''))
     fllog = os.path.join(idir_, 'log_table.txt')
     dlog = open(fllog, 'w')
+    wr_ = prtk_output.Output(idir_)
     print(fllog)
 
-    path_dict = Project_reader_tables.check_folder(idir_)
-
-    par_dir = os.path.join(os.path.join(idir_, path_dict['PAR']))
-    lay_dir = os.path.join(idir_, path_dict['LAY'])
-    pl_dir = os.path.join(idir_, path_dict['PL'])
+    prj_ = Project_reader_tables.load_project(idir_)
 
-    part_list, part_types = Project_reader_tables.DataParcer(par_dir).par_decoder()
-    move, io_brake, layers_numbers = Project_reader_tables.DataParcer(pl_dir).pl_decoder()
-    layers_data, conductivity = Project_reader_tables.DataParcer(lay_dir).lay_decoder()
-
-    lay_conductivity_dict = {}
-    for i in range(len(layers_data)):
-        lay_conductivity_dict.update({int(layers_data[i][0]): conductivity[i]})
-
-    io_brake_dict = {}
-    move_dict = {}
-    for i in range(layers_numbers.shape[0]):
-        io_brake_dict.update({layers_numbers[i]: io_brake[:, i]})
-        move_dict.update({layers_numbers[i]: move[:, i]})
+    part_list, part_types = prj_.part_list, prj_.part_types
+    lay_conductivity_dict = prj_.conductivity_dict
+    io_brake_dict = prj_.io_brake_dict
+    move_dict = prj_.move_dict
 
     # print(f'io br  {io_brake_dict}')
     # print(f'move  {move_dict}')
@@ -260,10 +233,10 @@ def main(dp):
         dir_mat_el_ = os.path.join(dir_mat_, 'electron')
         dir_mat_ph_ = os.path.join(dir_mat_, 'photon')
 
-        cs_el_, heap_el_ = xox.read_kiam_file(os.path.join(dir_mat_el_, 'xtbl.23p'))
-        xx_ = heap_el_[7].split()
-        Am_ = float(xx_[1])
-        ##        Ro_ = float(xx_[2])
+        tb_ = xox.read_kiam(os.path.join(dir_mat_el_, 'xtbl.23p'))
+        cs_el_ = tb_.data
+        Am_ = tb_.A
+        ##        Ro_ = tb_.Ro
         log_E_ = np.array(cs_el_[:, 0])
         Eev_ = np.power(10, log_E_)
         E_ = Eev_ * 10 ** (-6)
@@ -301,68 +274,50 @@ def main(dp):
                 vz_ = zip(E_, ttl_, ttl_st_)
 
             # данные по шаманству fbb тут нужная строка в vz_[2]
-            for imat in imat_list:
-                if np.any(io_brake_dict.get(int(imat)) == 1):
-                    with open(os.path.join(idir_, ff_ + '{0:03d}'.format(imat)), 'w') as out_:
-                        out_.write(parot_[key_]['head'].format(material=mat_, nE=nE_, density=Ro_))
-                        for v_ in vz_:
-                            out_.write(parot_[key_]['data'].format(v_[0], v_[1], v_[2]))
-                    copy_file(idir_, ff_, [imat])
-
-        for imat in imat_list:
-            if any([i == 4 for i in part_types.values()]):  # если есть тип частиц протон в PAR
-                if np.any(io_brake_dict.get(int(imat))[:] == 1):
-                    import zipfile as z
-
-                    sly = dp['lay']
-                    spr = dp['proj']
-
-                    sp_ = os.path.dirname(__file__)
-                    sb_ = os.path.dirname(spr)
-                    elx = prtk_proton.read_el(sp_)
-                    drmat = os.path.join(sp_, 'mat_files')
-                    nmflzip = 'stpw-p.zip'
-                    nmflzip = os.path.join(sp_, nmflzip)
-
-                    if z.is_zipfile(nmflzip):
-                        fl_ = z.ZipFile(nmflzip)
-
-                        sf = fl_.read('energy.txt')
-                        et = str(sf, encoding='utf-8').split('\n')
-                        ehp = list(map(float, et))
-
-                    sb = os.path.dirname(spr)
-
-                    st_pow_ = np.zeros((len(ehp),))
-                    mt = mat_.upper()
-                    lmat = dly[(mat_, Ro_)]
-                    # print(mat_, Ro_)
-
-                    fmt = os.path.join(drmat, mat_.lower() + '.mrat')
-                    # print(fmt)
-                    comp = prtk_proton.Compozit(fmt)
-                    ev = comp.conver()
-
-                    for it_, tt in enumerate(ev[list(ev.keys())[0]]['elem']):
-                        ##            am += int(tt['A']) * tt['p']
-                        print(tt)
-                        nme = tt[0]
-                        print(nme)
-                        num = elx[nme]['NN']
-                        vv = prtk_proton.read_lib(sp_, num, )
-                        sx = np.interp(ehp, vv[:, 0], vv[:, 3])
-                        st_pow_ += tt[1] * sx
-
-                    for nmb in lmat:
-
-                        sfl = prtk_proton.s_templ + '{0:03d}'.format(nmb)
-
-                        fot = os.path.join(dp['proj'], sfl)
-                        with open(fot, 'w') as fotf:
-                            fotf.write(prtk_proton.head.format(mat_, len(ehp)))
-                            tt = zip(ehp, Ro_ * st_pow_)
-                            for ee, sv in tt:
-                                fotf.write('{0:e}\t{1:e}\n'.format(ee, sv))
+            # таблица формируется один раз и записывается для всех слоёв с торможением
+            ss_ = parot_[key_]['head'].format(material=mat_, nE=nE_, density=Ro_)
+            ss_ += ''.join([parot_[key_]['data'].format(v_[0], v_[1], v_[2]) for v_ in vz_])
+            im_ = [imat for imat in imat_list if np.any(io_brake_dict.get(int(imat)) == 1)]
+            if im_:
+                wr_.write(ff_ + '{0:03d}'.format(im_[0]), ss_)
+                wr_.copy(ff_, im_)
+
+        # таблица торможения протонов одна для всех слоёв композита
+        if any([i == 4 for i in part_types.values()]):  # если есть тип частиц протон в PAR
+            if any(np.any(io_brake_dict.get(int(imat))[:] == 1) for imat in imat_list):
+                sly = dp['lay']
+                spr = dp['proj']
+
+                sp_ = os.path.dirname(__file__)
+                sb_ = os.path.dirname(spr)
+                elx = prtk_proton.read_el(sp_)
+                drmat = os.path.join(sp_, 'mat_files')
+                lib_ = prtk_proton.stop_lib(sp_)
+                ehp = lib_.energy
+
+                sb = os.path.dirname(spr)
+
+                mt = mat_.upper()
+                lmat = dly[(mat_, Ro_)]
+                # print(mat_, Ro_)
+
+                fmt = os.path.join(drmat, mat_.lower() + '.mrat')
+                # print(fmt)
+                comp = prtk_proton.Compozit(fmt)
+                ev = comp.conver()
+
+                # тормозная способность композита по таблице всех элементов
+                elem_ = ev[list(ev.keys())[0]]['elem']
+                print(elem_)
+                st_pow_ = lib_.mix([(elx[tt[0]]['NN'], tt[1]) for tt in elem_])
+
+                sx = prtk_proton.head.format(mat_, len(ehp))
+                sx += ''.join(['{0:e}\t{1:e}\n'.format(ee, sv) for ee, sv in zip(ehp, Ro_ * st_pow_)])
+                # таблица пишется для первого слоя, для остальных - ссылки на неё
+                fot = [os.path.join(dp['proj'], prtk_proton.s_templ + '{0:03d}'.format(nmb)) for nmb in lmat]
+                prtk_output.write_text(fot[0], sx)
+                for ff in fot[1:]:
+                    prtk_output.link_file(fot[0], ff)
 
         exist_dict = {}
         for imat in imat_list:
@@ -378,276 +333,250 @@ def main(dp):
                                 exist_dict.update({item[0]: item[1][0]})
         print(exist_dict)
         # ---------------------------------------------------------------------------------
-        for imat in imat_list:
-            key_ = '.ann'
-            xt_ = cs_el_[:, -1]
-            xg_ = (phis.E0 + Eev_) / phis.E0
-            sl_c = 29979245800.0  # cm/s
-            xv_ = sl_c * np.sqrt(1.0 - (1. / xg_) ** 2)
-            vz_ = zip(E_, xt_ * xv_)
-            ff_ = parot_[key_]['name_out']
-            if ff_ in exist_dict.keys() or cond_six is True:
-
-                with open(os.path.join(idir_, ff_ + '{0:03d}'.format(imat)), 'w') as out_:
-                    out_.write(parot_[key_]['head'].format(material=mat_, nE=nE_))
-                    for v_ in vz_:
-                        out_.write(parot_[key_]['data'].format(v_[0], v_[1]))
-                copy_file(idir_, ff_, dly[(mat_, Ro_)])
-
-            # ---------------------------------------------------------------------------------
-            key_ = '.528'
-            xer_, heap_ = xox.read_kiam_file(os.path.join(dir_mat_el_, 'xtbl' + key_))
-            xer_ = np.array(xer_)
-            ##        xer_ = Ro_ * np.power(10, xer_[:, 1:]) * 10**(-6)
-            ##        ttl_ = np.sum(xer_, axis=1)
-            ##        ttl_st_ = ttl_ - xer_[:,-1]
-            vz_ = zip(E_, cs_el_[:, 2], np.power(10, xer_[:, 1]) * 10 ** (-6))
-            ff_ = parot_[key_]['name_out']  # _EXC_
-
-            # if mat_ == 'air' or mat_ == 'vozduch':
-            #     set_example_section('EXC', idir_)
-
-            if ff_ in exist_dict.keys() or cond_six is True:
-
-                with open(os.path.join(idir_, ff_ + '{0:03d}'.format(imat)), 'w') as out_:
-                    out_.write(parot_[key_]['head'].format(material=mat_, Emin=E_[0], nE=nE_))
-                    for v_ in vz_:
-                        out_.write(parot_[key_]['data'].format(v_[0], v_[1], v_[2]))
-                copy_file(idir_, ff_, dly[(mat_, Ro_)])
-
-            # ---------------------------------------------------------------------------------
-            key_ = '.526'
-            rr_, heap_ = xox.read_kiam_file(os.path.join(dir_mat_el_, 'xtbl' + key_))
-            rr_ = np.transpose(rr_)
-            gamma_ = np.linspace(float(heap_[7].split()[0]), 0, int(heap_[7].split()[1]) - 1)
-            p_rr_ = -1.0 * np.ones((nE_, nG_))
-            gg_lg = np.log10(gg_[1:])
-            ##        gamma_lg = np.log10(gamma_[1:])
-            for k_ in range(nE_):
-                p_rr_[k_, 1:] = np.interp(gg_lg, gamma_, rr_[k_, 1:])
-            p_rr_[:, 1:] = np.power(10, p_rr_[:, 1:]) - 1
-            ##        for k_ in xrange(nE_):
-            ##            p_rr_[k_, :] = np.interp(gg_, gamma_, rr_[k_, :])
-            ##        p_rr_[:, 1:] = np.power(10,p_rr_[:, 1:])-1
-            ##        p_rr_ = np.power(10, p_rr_) * 10 **(-6)
-            vz_ = zip(E_, cs_el_[:, 0])
-            ff_ = parot_[key_]['name_out']  # _ELA_
-
-            # if mat_ == 'air' or mat_ == 'vozduch':
-            #     set_example_section('ELA', idir_)
-
-            if ff_ in exist_dict.keys() or cond_six is True:
-
-                with open(os.path.join(idir_, ff_ + '{0:03d}'.format(imat)), 'w') as out_:
-                    # исправление количества строк с учётом 2х новых строчек
-                    out_.write(
-                        parot_[key_]['head'].format(material=mat_, nE=nE_ + 2, Epp=2.0 * phis.ms_el_gr / Am_, nG=nG_))
-
-                    vv_ = p_rr_[0, ::-1]
-                    ss_ = parot_[key_]['data'].format(0.0, 0.0)
-                    mm_ = ['{0:12.5E}'.format(0.0) for c_ in vv_]
-                    out_.write(ss_ + reduce(lambda a, b: a + b, mm_) + '\n')
-                    ss_ = parot_[key_]['data'].format(E_[0] * 0.99, 0.0, 0.0)
-                    mm_ = ['{0:12.5E}'.format(0.0) for c_ in vv_]
-                    out_.write(ss_ + reduce(lambda a, b: a + b, mm_) + '\n')
-
-                    for k_, v_ in enumerate(vz_):
-                        ss_ = parot_[key_]['data'].format(v_[0], v_[1])
-                        vv_ = p_rr_[k_, :]
-                        ##                vv_= np.arccos(vv_[::-1])
-                        vv_ = vv_[::-1]
-                        tt = vv_[-2] + (vv_[-2] - vv_[-3])  # /(gg_[-2]-gg_[-3])
-                        vv_[-1] = max(tt, -1.)
-                        vv_[0] = 1.0
-                        vv_ = np.arccos(vv_)
-
-                        ##                vv_[0] = 0.0
-                        mm_ = ['{0:12.5E} '.format(c_) for c_ in vv_]
-                        out_.write(ss_ + reduce(lambda a, b: a + b, mm_) + '\n')
-                ##
-                copy_file(idir_, ff_, dly[(mat_, Ro_)])
-
-            # ---------------------------------------------------------------------------------
-            key_ = '.527'
-            rr_, heap_ = xox.read_kiam_file(os.path.join(dir_mat_el_, 'xtbl' + key_))
-            rr_ = np.transpose(rr_)
-            gamma_ = np.linspace(0., 1., rr_.shape[1])
-            p_rr_ = np.zeros((nE_, nG_))
-            for k_ in range(nE_):
-                p_rr_[k_, :] = np.interp(gg_, gamma_, rr_[k_, :])
-            p_rr_ = np.power(10, p_rr_) * 10 ** (-6)
-            vz_ = zip(E_, cs_el_[:, 1])
-            ff_ = parot_[key_]['name_out']  # _BRM_
-            if ff_ in exist_dict.keys() or cond_six is True:
-
-                with open(os.path.join(idir_, ff_ + '{0:03d}'.format(imat)), 'w') as out_:
-                    # исправление количества строк с учётом 2х новых строчек
-                    out_.write(parot_[key_]['head'].format(material=mat_, nE=nE_, nG=nG_))
-
-                    vv_ = p_rr_[0, ::-1]
-                    ss_ = parot_[key_]['data'].format(0.0, 0.0)
-                    mm_ = ['{0:12.5E}'.format(0.0) for c_ in vv_]
-                    out_.write(ss_ + reduce(lambda a, b: a + b, mm_) + '\n')
-                    ss_ = parot_[key_]['data'].format(E_[0] * 0.99, 0.0, 0.0)
-                    mm_ = ['{0:12.5E}'.format(0.0) for c_ in vv_]
-                    out_.write(ss_ + reduce(lambda a, b: a + b, mm_) + '\n')
-
-                    for k_, v_ in enumerate(vz_):
-                        ss_ = parot_[key_]['data'].format(v_[0], v_[1])
-                        vv_ = p_rr_[k_, :]
-                        vv_ = vv_[::-1]
-                        vv_[0] = 0.0
-                        mm_ = ['{0:12.5E}'.format(c_) for c_ in vv_]
-                        out_.write(ss_ + reduce(lambda a, b: a + b, mm_) + '\n')
-                copy_file(idir_, ff_, dly[(mat_, Ro_)])
-
-            # ---------------------------------------------------------------------------------
-
-            cs_ph_, heap_ph_ = xox.read_kiam_file(os.path.join(dir_mat_ph_, 'xtbl.23'))
-            cs_ph_ = Ro_ * np.power(10, cs_ph_[:, 1:])
-            # ---------------------------------------------------------------------------------
-
-            key_ = '.522'
-            eb_ph_, heap__ = xox.read_kiam_file(os.path.join(dir_mat_ph_, 'xtbl.eb'))
-            eb_ph_ = eb_ph_[:, -1] * 10 ** (-6)
-            vz_ = zip(E_, cs_ph_[:, -1], eb_ph_)
-            ff_ = parot_[key_]['name_out']  # _FOT_
-            if ff_ in exist_dict.keys() or cond_six is True:
-
-                with open(os.path.join(idir_, ff_ + '{0:03d}'.format(imat)), 'w') as out_:
-                    out_.write(parot_[key_]['head'].format(material=mat_, nE=nE_, bE=eb_ph_[-1]))
-                    for v_ in vz_:
-                        out_.write(parot_[key_]['data'].format(v_[0], v_[1], v_[2]))
-                copy_file(idir_, ff_, dly[(mat_, Ro_)])
-
-            # ---------------------------------------------------------------------------------
-
-            key_ = '.ive'
-            ive_, heap_ = xox.read_kiam_file(os.path.join(dir_mat_ph_, 'xtbl.ive'))
-            ive_ = np.transpose(ive_)
-            gamma_ = np.linspace(0., 1., ive_.shape[1])
-            p_ive_ = np.zeros((nE_, nG_))
-            for k_ in range(nE_):
-                p_ive_[k_, :] = np.interp(gg_, gamma_, ive_[k_, :]) * 10 ** (-6)
-            vz_ = zip(E_, cs_ph_[:, 2])
-            ff_ = parot_[key_]['name_out']  # _KOM_
-            if ff_ in exist_dict.keys() or cond_six is True:
-
-                with open(os.path.join(idir_, ff_ + '{0:03d}'.format(imat)), 'w') as out_:
-                    # исправление количества строк с учётом 2х новых строчек
-                    out_.write(parot_[key_]['head'].format(material=mat_, nE=nE_ + 2, nG=nG_))
-
-                    vv_ = p_rr_[0, ::-1]
-                    ss_ = parot_[key_]['data'].format(0.0, 0.0)
-                    mm_ = ['{0:12.5E}'.format(0.0) for c_ in vv_]
-                    out_.write(ss_ + reduce(lambda a, b: a + b, mm_) + '\n')
-                    ss_ = parot_[key_]['data'].format(E_[0] * 0.99, 0.0, 0.0)
-                    mm_ = ['{0:12.5E}'.format(0.0) for c_ in vv_]
-                    out_.write(ss_ + reduce(lambda a, b: a + b, mm_) + '\n')
-
-                    for k_, v_ in enumerate(vz_):
-                        ss_ = parot_[key_]['data'].format(v_[0], v_[1])
-                        mm_ = ['{0:12.5E}'.format(c_) for c_ in p_ive_[k_, :]]
-                        out_.write(ss_ + reduce(lambda a, b: a + b, mm_) + '\n')
-                copy_file(idir_, ff_, dly[(mat_, Ro_)])
-
-            # ---------------------------------------------------------------------------------
-
-            key_ = '.516'
-            rr_, heap_ = xox.read_kiam_file(os.path.join(dir_mat_ph_, 'xtbl' + key_))
-            rr_ = np.transpose(rr_)
-            gamma_ = np.linspace(float(heap_[7].split()[0]), 0, int(heap_[7].split()[1]) - 1)
-            p_rr_ = np.zeros((nE_, nG_))
-            gl_ = np.log10(gg_[1:])
-            for k_ in range(nE_):
-                p_rr_[k_, 1:] = np.interp(gl_, gamma_, rr_[k_, 1:])
-            p_rr_[:, 1:] = np.power(10, p_rr_[:, 1:]) * 10 ** (-6)
-            i_rr_ = (p_rr_ < 1.E-16)
-            E2_ = 2 * phis.E0 / 10 ** 6
-            nE_ = sum(E_ > E2_) + 1
-            p_rr_[i_rr_] = 0.0
-            vz_ = zip(E_, cs_ph_[:, 3])
-            ff_ = parot_[key_]['name_out']  # _PAR_
-            if ff_ in exist_dict.keys() or cond_six is True:
-
-                with open(os.path.join(idir_, ff_ + '{0:03d}'.format(imat)), 'w') as out_:
-                    out_.write(parot_[key_]['head'].format(material=mat_, nE=nE_, nG=nG_))
-                    ##            ss_ = parot_[key_]['data'].format(1.0, 0.0)
-                    ss_ = parot_[key_]['data'].format(E2_, 0.0)
-                    vt_ = 0.0 * np.ones(nG_)
-                    mm_ = ['{0:12.5E}'.format(c_) for c_ in vt_]
-                    out_.write(ss_ + reduce(lambda a, b: a + b, mm_) + '\n')
-
-                    for k_, v_ in enumerate(vz_):
-                        if E_[k_] >= E2_:
-                            vv_ = p_rr_[k_, :]
-                            dd_ = v_[0] - E2_ - vv_[-1]
-                            dlog.write('E = {0}: Delta ={1}\n'.format(v_[0], dd_) + '\n')
-                            if dd_ < 0.:
-                                dlog.write('Vend = {0} '.format(v_[-1]) + '\n')
-
-                                vv_[-1] = v_[0] - E2_
-                                dlog.write('Change on Vend = {0}\n'.format(v_[-1]) + '\n')
-
-                            ss_ = parot_[key_]['data'].format(v_[0], v_[1])
-                            mm_ = ['{0:12.5E}'.format(c_) for c_ in p_rr_[k_, :]]
-                            out_.write(ss_ + reduce(lambda a, b: a + b, mm_) + '\n')
-                copy_file(idir_, ff_, dly[(mat_, Ro_)])
-
-            # ---------------------------------------------------------------------------------
-
-            key_ = '.555'
-            eb_el_, heap__ = xox.read_kiam_file(os.path.join(dir_mat_el_, 'xtbl.eb'))
-            eb_el_ = eb_el_[:, -1] * 10 ** (-6)
-
-            ra_, ha_ = xox.read_kiam_file(os.path.join(dir_mat_el_, 'xtbl' + '.awe'))
-            p_ra_ = np.power(10, ra_[:, 1]) * 10 ** (-6)
-            rr_, heap_ = xox.read_kiam_file(os.path.join(dir_mat_el_, 'xtbl' + key_))
-            nE_ = rr_.shape[1]
-            rr_ = np.transpose(rr_)
-            rrv_ = np.power(10, rr_)
-            gamma_ = np.logspace(float(heap_[7].split()[0]), 0, int(heap_[7].split()[1]) - 1)
-            p_rr_ = np.zeros((nE_, nG_))
-            gl_ = np.log10(gg_[1:])
-            for k_ in range(nE_):
-                # p_rr_[k_, 1:] = np.interp(gl_, gamma_, rr_[k_, 1:])
-                p_rr_[k_, 1:] = np.interp(gg_[1:], gamma_, rrv_[k_, 1:])
-                p_rr_[k_, -1] = 0.0
-
-            p_rr_ *= 1e-6
-            ##        p_rr_ = np.power(10, p_rr_) * 10 **(-6)
-            xeb_ = (E_ - eb_el_) / 2.
-            p_rr_[:, 0] = xeb_
-            vz_ = zip(E_, cs_el_[:, 3])
-            ff_ = parot_[key_]['name_out']  # _ION_
+        # таблицы зависят только от композита и плотности: они строятся и
+        # записываются один раз (для первого слоя) и копируются для остальных слоёв
+        imat = imat_list[0]
+        key_ = '.ann'
+        xt_ = cs_el_[:, -1]
+        xg_ = (phis.E0 + Eev_) / phis.E0
+        sl_c = 29979245800.0  # cm/s
+        xv_ = sl_c * np.sqrt(1.0 - (1. / xg_) ** 2)
+        vz_ = zip(E_, xt_ * xv_)
+        ff_ = parot_[key_]['name_out']
+        if ff_ in exist_dict.keys() or cond_six is True:
+
+            with wr_.open(ff_ + '{0:03d}'.format(imat)) as out_:
+                out_.write(parot_[key_]['head'].format(material=mat_, nE=nE_))
+                for v_ in vz_:
+                    out_.write(parot_[key_]['data'].format(v_[0], v_[1]))
+            wr_.copy(ff_, dly[(mat_, Ro_)])
 
-            if mat_ == 'air' or mat_ == 'vozduch':
-                set_example_section('ION', idir_)
+        # ---------------------------------------------------------------------------------
+        key_ = '.528'
+        xer_, heap_ = xox.read_kiam_file(os.path.join(dir_mat_el_, 'xtbl' + key_))
+        xer_ = np.array(xer_)
+        ##        xer_ = Ro_ * np.power(10, xer_[:, 1:]) * 10**(-6)
+        ##        ttl_ = np.sum(xer_, axis=1)
+        ##        ttl_st_ = ttl_ - xer_[:,-1]
+        vz_ = zip(E_, cs_el_[:, 2], np.power(10, xer_[:, 1]) * 10 ** (-6))
+        ff_ = parot_[key_]['name_out']  # _EXC_
+
+        # if mat_ == 'air' or mat_ == 'vozduch':
+        #     set_example_section('EXC', idir_)
+
+        if ff_ in exist_dict.keys() or cond_six is True:
+
+            with wr_.open(ff_ + '{0:03d}'.format(imat)) as out_:
+                out_.write(parot_[key_]['head'].format(material=mat_, Emin=E_[0], nE=nE_))
+                for v_ in vz_:
+                    out_.write(parot_[key_]['data'].format(v_[0], v_[1], v_[2]))
+            wr_.copy(ff_, dly[(mat_, Ro_)])
+
+        # ---------------------------------------------------------------------------------
+        key_ = '.526'
+        tb_ = xox.read_kiam(os.path.join(dir_mat_el_, 'xtbl' + key_))
+        rr_ = np.transpose(tb_.data)
+        gamma_ = np.linspace(tb_.lG0, 0, tb_.nG - 1)
+        p_rr_ = -1.0 * np.ones((nE_, nG_))
+        gg_lg = np.log10(gg_[1:])
+        ##        gamma_lg = np.log10(gamma_[1:])
+        for k_ in range(nE_):
+            p_rr_[k_, 1:] = np.interp(gg_lg, gamma_, rr_[k_, 1:])
+        p_rr_[:, 1:] = np.power(10, p_rr_[:, 1:]) - 1
+        ##        for k_ in xrange(nE_):
+        ##            p_rr_[k_, :] = np.interp(gg_, gamma_, rr_[k_, :])
+        ##        p_rr_[:, 1:] = np.power(10,p_rr_[:, 1:])-1
+        ##        p_rr_ = np.power(10, p_rr_) * 10 **(-6)
+        vz_ = zip(E_, cs_el_[:, 0])
+        ff_ = parot_[key_]['name_out']  # _ELA_
+
+        # if mat_ == 'air' or mat_ == 'vozduch':
+        #     set_example_section('ELA', idir_)
+
+        if ff_ in exist_dict.keys() or cond_six is True:
+
+            with wr_.open(ff_ + '{0:03d}'.format(imat)) as out_:
+                # исправление количества строк с учётом 2х новых строчек
+                out_.write(
+                    parot_[key_]['head'].format(material=mat_, nE=nE_ + 2, Epp=2.0 * phis.ms_el_gr / Am_, nG=nG_))
+
+                ss_ = [parot_[key_]['data'].format(0.0, 0.0),
+                       parot_[key_]['data'].format(E_[0] * 0.99, 0.0, 0.0)]
+                write_rows(out_, ss_, np.zeros((2, nG_)))
+
+                ss_ = [parot_[key_]['data'].format(v_[0], v_[1]) for v_ in vz_]
+                vv_ = p_rr_[:len(ss_), ::-1]
+                tt = vv_[:, -2] + (vv_[:, -2] - vv_[:, -3])  # /(gg_[-2]-gg_[-3])
+                vv_[:, -1] = np.maximum(tt, -1.)
+                vv_[:, 0] = 1.0
+                write_rows(out_, ss_, np.arccos(vv_), '{0:12.5E} ')
+            ##
+            wr_.copy(ff_, dly[(mat_, Ro_)])
+
+        # ---------------------------------------------------------------------------------
+        key_ = '.527'
+        rr_, heap_ = xox.read_kiam_file(os.path.join(dir_mat_el_, 'xtbl' + key_))
+        rr_ = np.transpose(rr_)
+        gamma_ = np.linspace(0., 1., rr_.shape[1])
+        p_rr_ = np.zeros((nE_, nG_))
+        for k_ in range(nE_):
+            p_rr_[k_, :] = np.interp(gg_, gamma_, rr_[k_, :])
+        p_rr_ = np.power(10, p_rr_) * 10 ** (-6)
+        vz_ = zip(E_, cs_el_[:, 1])
+        ff_ = parot_[key_]['name_out']  # _BRM_
+        if ff_ in exist_dict.keys() or cond_six is True:
+
+            with wr_.open(ff_ + '{0:03d}'.format(imat)) as out_:
+                # исправление количества строк с учётом 2х новых строчек
+                out_.write(parot_[key_]['head'].format(material=mat_, nE=nE_, nG=nG_))
+
+                ss_ = [parot_[key_]['data'].format(0.0, 0.0),
+                       parot_[key_]['data'].format(E_[0] * 0.99, 0.0, 0.0)]
+                write_rows(out_, ss_, np.zeros((2, nG_)))
+
+                ss_ = [parot_[key_]['data'].format(v_[0], v_[1]) for v_ in vz_]
+                vv_ = p_rr_[:len(ss_), ::-1]
+                vv_[:, 0] = 0.0
+                write_rows(out_, ss_, vv_)
+            wr_.copy(ff_, dly[(mat_, Ro_)])
+
+        # ---------------------------------------------------------------------------------
+
+        cs_ph_, heap_ph_ = xox.read_kiam_file(os.path.join(dir_mat_ph_, 'xtbl.23'))
+        cs_ph_ = Ro_ * np.power(10, cs_ph_[:, 1:])
+        # ---------------------------------------------------------------------------------
+
+        key_ = '.522'
+        eb_ph_, heap__ = xox.read_kiam_file(os.path.join(dir_mat_ph_, 'xtbl.eb'))
+        eb_ph_ = eb_ph_[:, -1] * 10 ** (-6)
+        vz_ = zip(E_, cs_ph_[:, -1], eb_ph_)
+        ff_ = parot_[key_]['name_out']  # _FOT_
+        if ff_ in exist_dict.keys() or cond_six is True:
 
-            if ff_ in exist_dict.keys() or cond_six is True:
+            with wr_.open(ff_ + '{0:03d}'.format(imat)) as out_:
+                out_.write(parot_[key_]['head'].format(material=mat_, nE=nE_, bE=eb_ph_[-1]))
+                for v_ in vz_:
+                    out_.write(parot_[key_]['data'].format(v_[0], v_[1], v_[2]))
+            wr_.copy(ff_, dly[(mat_, Ro_)])
 
-                with open(os.path.join(idir_, ff_ + '{0:03d}'.format(imat)), 'w') as out_:
-                    # исправление количества строк с учётом 2х новых строчек
-                    out_.write(parot_[key_]['head'].format(material=mat_, nE=nE_ + 2, Emin=E_[0], nG=nG_))
+        # ---------------------------------------------------------------------------------
 
-                    ss_ = parot_[key_]['data'].format(0.0, 0.0, 0.0)
-                    vv_ = p_rr_[0, ::-1]
-                    mm_ = ['{0:12.5E}'.format(0.0) for c_ in vv_]
-                    out_.write(ss_ + reduce(lambda a, b: a + b, mm_) + '\n')
-                    ss_ = parot_[key_]['data'].format(E_[0] * k2r, 0.0, 0.0)
-                    mm_ = ['{0:12.5E}'.format(0.0) for c_ in vv_]
-                    out_.write(ss_ + reduce(lambda a, b: a + b, mm_) + '\n')
+        key_ = '.ive'
+        ive_, heap_ = xox.read_kiam_file(os.path.join(dir_mat_ph_, 'xtbl.ive'))
+        ive_ = np.transpose(ive_)
+        gamma_ = np.linspace(0., 1., ive_.shape[1])
+        p_ive_ = np.zeros((nE_, nG_))
+        for k_ in range(nE_):
+            p_ive_[k_, :] = np.interp(gg_, gamma_, ive_[k_, :]) * 10 ** (-6)
+        vz_ = zip(E_, cs_ph_[:, 2])
+        ff_ = parot_[key_]['name_out']  # _KOM_
+        if ff_ in exist_dict.keys() or cond_six is True:
+
+            with wr_.open(ff_ + '{0:03d}'.format(imat)) as out_:
+                # исправление количества строк с учётом 2х новых строчек
+                out_.write(parot_[key_]['head'].format(material=mat_, nE=nE_ + 2, nG=nG_))
+
+                ss_ = [parot_[key_]['data'].format(0.0, 0.0),
+                       parot_[key_]['data'].format(E_[0] * 0.99, 0.0, 0.0)]
+                write_rows(out_, ss_, np.zeros((2, nG_)))
+
+                ss_ = [parot_[key_]['data'].format(v_[0], v_[1]) for v_ in vz_]
+                write_rows(out_, ss_, p_ive_[:len(ss_)])
+            wr_.copy(ff_, dly[(mat_, Ro_)])
+
+        # ---------------------------------------------------------------------------------
+
+        key_ = '.516'
+        tb_ = xox.read_kiam(os.path.join(dir_mat_ph_, 'xtbl' + key_))
+        rr_ = np.transpose(tb_.data)
+        gamma_ = np.linspace(tb_.lG0, 0, tb_.nG - 1)
+        p_rr_ = np.zeros((nE_, nG_))
+        gl_ = np.log10(gg_[1:])
+        for k_ in range(nE_):
+            p_rr_[k_, 1:] = np.interp(gl_, gamma_, rr_[k_, 1:])
+        p_rr_[:, 1:] = np.power(10, p_rr_[:, 1:]) * 10 ** (-6)
+        i_rr_ = (p_rr_ < 1.E-16)
+        E2_ = 2 * phis.E0 / 10 ** 6
+        nE_ = sum(E_ > E2_) + 1
+        p_rr_[i_rr_] = 0.0
+        vz_ = zip(E_, cs_ph_[:, 3])
+        ff_ = parot_[key_]['name_out']  # _PAR_
+        if ff_ in exist_dict.keys() or cond_six is True:
+
+            with wr_.open(ff_ + '{0:03d}'.format(imat)) as out_:
+                out_.write(parot_[key_]['head'].format(material=mat_, nE=nE_, nG=nG_))
+                ##            ss_ = parot_[key_]['data'].format(1.0, 0.0)
+                ss_ = [parot_[key_]['data'].format(E2_, 0.0)]
+                k_rr_ = []
+
+                for k_, v_ in enumerate(vz_):
+                    if E_[k_] >= E2_:
+                        vv_ = p_rr_[k_, :]
+                        dd_ = v_[0] - E2_ - vv_[-1]
+                        dlog.write('E = {0}: Delta ={1}\n'.format(v_[0], dd_) + '\n')
+                        if dd_ < 0.:
+                            dlog.write('Vend = {0} '.format(v_[-1]) + '\n')
+
+                            vv_[-1] = v_[0] - E2_
+                            dlog.write('Change on Vend = {0}\n'.format(v_[-1]) + '\n')
+
+                        ss_.append(parot_[key_]['data'].format(v_[0], v_[1]))
+                        k_rr_.append(k_)
+                # первая строка - нулевая
+                vt_ = np.zeros((len(k_rr_) + 1, nG_))
+                vt_[1:] = p_rr_[k_rr_]
+                write_rows(out_, ss_, vt_)
+            wr_.copy(ff_, dly[(mat_, Ro_)])
+
+        # ---------------------------------------------------------------------------------
 
-                    for k_, v_ in enumerate(vz_):
-                        ss_ = parot_[key_]['data'].format(v_[0], v_[1], p_ra_[k_])
-                        vv_ = p_rr_[k_, ::-1]
-                        mm_ = ['{0:12.5E}'.format(c_) for c_ in vv_]
-                        out_.write(ss_ + reduce(lambda a, b: a + b, mm_) + '\n')
-                copy_file(idir_, ff_, dly[(mat_, Ro_)])
+        key_ = '.555'
+        eb_el_, heap__ = xox.read_kiam_file(os.path.join(dir_mat_el_, 'xtbl.eb'))
+        eb_el_ = eb_el_[:, -1] * 10 ** (-6)
+
+        ra_, ha_ = xox.read_kiam_file(os.path.join(dir_mat_el_, 'xtbl' + '.awe'))
+        p_ra_ = np.power(10, ra_[:, 1]) * 10 ** (-6)
+        tb_ = xox.read_kiam(os.path.join(dir_mat_el_, 'xtbl' + key_))
+        nE_ = tb_.data.shape[1]
+        rr_ = np.transpose(tb_.data)
+        rrv_ = np.power(10, rr_)
+        gamma_ = np.logspace(tb_.lG0, 0, tb_.nG - 1)
+        p_rr_ = np.zeros((nE_, nG_))
+        gl_ = np.log10(gg_[1:])
+        for k_ in range(nE_):
+            # p_rr_[k_, 1:] = np.interp(gl_, gamma_, rr_[k_, 1:])
+            p_rr_[k_, 1:] = np.interp(gg_[1:], gamma_, rrv_[k_, 1:])
+            p_rr_[k_, -1] = 0.0
+
+        p_rr_ *= 1e-6
+        ##        p_rr_ = np.power(10, p_rr_) * 10 **(-6)
+        xeb_ = (E_ - eb_el_) / 2.
+        p_rr_[:, 0] = xeb_
+        vz_ = zip(E_, cs_el_[:, 3])
+        ff_ = parot_[key_]['name_out']  # _ION_
+
+        if mat_ == 'air' or mat_ == 'vozduch':
+            set_example_section('ION', idir_)
+
+        if ff_ in exist_dict.keys() or cond_six is True:
+
+            with wr_.open(ff_ + '{0:03d}'.format(imat)) as out_:
+                # исправление количества строк с учётом 2х новых строчек
+                out_.write(parot_[key_]['head'].format(material=mat_, nE=nE_ + 2, Emin=E_[0], nG=nG_))
+
+                ss_ = [parot_[key_]['data'].format(0.0, 0.0, 0.0),
+                       parot_[key_]['data'].format(E_[0] * k2r, 0.0, 0.0)]
+                write_rows(out_, ss_, np.zeros((2, nG_)))
+
+                ss_ = [parot_[key_]['data'].format(v_[0], v_[1], p_ra_[k_]) for k_, v_ in enumerate(vz_)]
+                write_rows(out_, ss_, p_rr_[:len(ss_), ::-1])
+            wr_.copy(ff_, dly[(mat_, Ro_)])
 
     if True:
         pass
 
+    wr_.save()
+    dlog.write(wr_.report() + '\n')
     dlog.close()
     print(u'Модуль пересчета распределений для РЭМП закончил свою работу')
 
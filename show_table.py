@@ -95,9 +95,9 @@ def plot_file(matFile_, fig_):
     elif particle_ == 'photon':
         ptkl_ = 'ph'
     ##        Считываются данные из файла
-    rr_, hp=xox.read_kiam_file(matFile_)
-    tt_ = hp[4].split()
-    ee_ = np.logspace(float(tt_[0]), float(tt_[1]), int(tt_[2]))
+    tb_ = xox.read_kiam(matFile_)
+    rr_ = np.array(tb_.data)
+    ee_ = tb_.energy()
 
     opis_ = {}
     opis_['.23'] = {'ylabel':r'$\Sigma, \frac{см^2}{г}$', 'bxlog': True,
@@ -181,7 +181,7 @@ def plot_file(matFile_, fig_):
 
         elif fext_ in ['.23', '.23p']:
             ## Получаем плотность композита
-            Ro = float(hp[7].split()[2])
+            Ro = tb_.Ro
 
             if ptkl_ == 'el' :
                 ful_ = np.sum(yy_, axis=1)
@@ -22,7 +22,7 @@ import json
 import shutil
 import yaml
 
-from multiprocessing import set_executable
+from multiprocessing import set_executable, freeze_support
 from multiprocessing.dummy import Process
 # from multiprocessing import Process
 import logging
@@ -460,7 +460,10 @@ class Example(Frame):
         except:
             pass
 
-        shutil.copytree(self._bd['tab'], os.path.join(self._bd['proj'], 'materials'))
+        # двоичные копии таблиц (xxfun.read_kiam) и манифесты расчёта (xtb_plan)
+        # в проект не переносятся
+        shutil.copytree(self._bd['tab'], os.path.join(self._bd['proj'], 'materials'),
+                        ignore=shutil.ignore_patterns('*.kbin', 'xtb_manifest.txt'))
 
         messagebox.showinfo('Информация', 'Модуль расчёта распределений закончил свою работу')
 
@@ -644,6 +647,7 @@ class Example(Frame):
 
 
 if __name__ == '__main__':
+    freeze_support()
 
     er = Tk()
     ##    er.overrideredirect(True)
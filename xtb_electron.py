@@ -28,7 +28,9 @@ import numpy as np
 
 import interface as xItf
 import xxfun as xox
+import xxnum as xn
 import endf as ken
+import xxcache as xxc
 
 #import xxplot as xxp
 import phisconst as phis
@@ -67,8 +69,8 @@ class electron(ken.Kendf):
 
 
     xFigShow=True
-    # if False - calculate always
-    xxCalc=False
+    # if False - calculate always (do not use the store of calculated elements)
+    xxCalc=True
     xPrintDistrib=False
     xPrintElement=True
 
@@ -129,6 +131,7 @@ class electron(ken.Kendf):
         self.Eave_527=[]
         self.Eave_528=[]
         self.Eave_666=[]
+        self.mtx=[]
 #
 #        self.DS_526
 #        self.SA_526
@@ -202,14 +205,14 @@ class electron(ken.Kendf):
             self.d=self.getVS((mf,mt))
 
             #print self.d
-            if mt>528 or self.d[0][2][0].find('0.00')>=0:
-                self.d[0][2][0]='1.0E-16';# very importatnt, change 0
+            if mt>528 or self.d[0][2][0]==0.0:
+                self.d[0][2][0]=1.0E-16;# very importatnt, change 0
 
             #print self.d
             d = self.d
-            ee = [math.log10(float(c)) for c in d[0][1]]
+            ee = [math.log10(c) for c in d[0][1].tolist()]
             ec = ee[:];
-            ff = [math.log10(float(c)) for c in d[0][2]]
+            ff = [math.log10(c) for c in d[0][2].tolist()]
             u = xox.xxInterp1(ec,ff,self.E_log)
             u = [math.pow(10,c)/self.A for c in u];
             #print(ee);print(self.E_log);print(u);
@@ -240,36 +243,25 @@ class electron(ken.Kendf):
         """
         """
         nmFL=self.El_NameFile_Out['23']
-        if os.path.isfile(nmFL) and self.xxCalc:
-            t=xox.read_kiam_file_2(nmFL)
-            d=np.array(t).transpose()
-            d_526=d[1,:];self.d_23_526=np.power(10,d_526)
-            d_527=d[2,:];self.d_23_527=np.power(10,d_527)
-            d_528=d[3,:];self.d_23_528=np.power(10,d_528)
-            d_666=d[4,:];self.d_23_666=np.power(10,d_666)
-            d_23=d[1:4,:]
-
-        else:
+        d=self.get_endf_shell_23()
+        for k_, dd_ in enumerate(self.d_23_666):
+            if dd_ == 0.0:
+                self.d_23_666[k_] = 1.E-16
 
-            d=self.get_endf_shell_23()
-            for k_, dd_ in enumerate(self.d_23_666):
-                if dd_ == 0.0:
-                    self.d_23_666[k_] = 1.E-16
+        d_666=[math.log10(c) for c in self.d_23_666]
+        self.d_23_526=self.get_endf_23(23,526)
+        d_526=[math.log10(c) for c in self.d_23_526];
 
-            d_666=[math.log10(c) for c in self.d_23_666]
-            self.d_23_526=self.get_endf_23(23,526)
-            d_526=[math.log10(c) for c in self.d_23_526];
+        self.d_23_527=self.get_endf_23(23,527)
+        d_527=[math.log10(c) for c in self.d_23_527]
+        self.d_23_528=self.get_endf_23(23,528)
+        for k_, dd_ in enumerate(self.d_23_528):
+            if dd_ == 0.0:
+                self.d_23_528[k_] = 1.E-16
 
-            self.d_23_527=self.get_endf_23(23,527)
-            d_527=[math.log10(c) for c in self.d_23_527]
-            self.d_23_528=self.get_endf_23(23,528)
-            for k_, dd_ in enumerate(self.d_23_528):
-                if dd_ == 0.0:
-                    self.d_23_528[k_] = 1.E-16
-
-            d_528=[math.log10(c) for c in self.d_23_528]
-            self.d_23=[d_526,d_527,d_528,d_666]
-            if False: self.xWrite_23(nmFL, self.d_23)
+        d_528=[math.log10(c) for c in self.d_23_528]
+        self.d_23=[d_526,d_527,d_528,d_666]
+        if False: self.xWrite_23(nmFL, self.d_23)
 
 
         d_23=np.array([d_526,d_527,d_528,d_666])
@@ -283,91 +275,45 @@ class electron(ken.Kendf):
 
     def xWrite_23(self,NameFl,d,acca='full',Density=-1):
 
-        with open(NameFl,'w')as Out:
-            # write heap
-
-            Out.write('{0} \n'.format(xox.xT['f1']))
-            Out.write((xox.xT['f1']+'\n') % (self.nE,5,2,15))
-            Out.write('{0} \n'.format(xox.xT['s1']))
-            Out.write('%s \n' % (xox.xT['fE']))
-            Out.write((xox.xT['fE']+'\n') % (self.Emin,self.Emax,self.nE,2))
-            Out.write('{0} \n'.format(xox.xT['sE']))
-            Out.write('{0} \n'.format(xox.xT['fInf']))
-            if Density<0:
-                Ro=self.Ro
-            else:
-                Ro=Density
-
-            Out.write((xox.xT['fInf']+'\n') % (self.Z,self.A,Ro,9))
-            Out.write('{0} \n'.format(xox.xT['sInf']))
-            Out.write('{0} \n'.format(xox.xT['sDB']))
-            sss="""\
+        if Density<0:
+            Ro=self.Ro
+        else:
+            Ro=Density
+        sss="""\
 # 1 column - decimal logarithm of Energy (eV)
 # 2 column - decimal logarithm of Elastic Scattering Cross Sections per massa(cm^2/gramm)
 # 3 column - decimal logarithm of Bremsstrahlung Cross Sections per massa(cm^2/gramm)
 # 4 column - decimal logarithm of Excitation Cross Sections per massa(cm^2/gramm)
 # 5 column - decimal logarithm of Summary of all Electroionization Subshell Cross Sections per massa(cm^2/gramm)"""
-            Out.write('{0} \n'.format(sss))
-            Out.write('{0} \n'.format('5(%+19.15f )'))
-            Out.write('{0} \n'.format(xox.xT['sDE']))
-            # write data
-
-            for k in range(self.nE):
-                sf='%+19.15f ' % (self.E_log[k]);#str();
-                for i in range(4):
-                    sf+='%+19.15f ' % (d[i][k])
-                sf+='\n';
-                Out.write(sf);
-#            Out.close()
+        hh=xox.xHeadKiam((self.nE,5,2,15),(self.Emin,self.Emax,self.nE,2),sss,
+                         '{0} \n'.format('5(%+19.15f )'),vInf=(self.Z,self.A,Ro,9))
+        xox.xWriteKiam(NameFl,hh,np.column_stack([self.E_log]+[d[i][:self.nE] for i in range(4)]))
 
     ## Запись таблицы с массовыми сечениями для позитрона в файл
     #
     def xWrite_23p(self,NameFl,d,acca='full',Density=-1, atomassa = -1, atomz = -1):
 
-        with open(NameFl,'w')as Out:
-            # write heap
-
-            Out.write('{0} \n'.format(xox.xT['f1']))
-            Out.write((xox.xT['f1']+'\n') % (self.nE,5,2,16))
-            Out.write('{0} \n'.format(xox.xT['s1']))
-            Out.write('%s \n' % (xox.xT['fE']))
-            Out.write((xox.xT['fE']+'\n') % (self.Emin,self.Emax,self.nE,2))
-            Out.write('{0} \n'.format(xox.xT['sE']))
-            Out.write('{0} \n'.format(xox.xT['fInf']))
-            if Density < 0:
-                Ro=self.Ro
-            else:
-                Ro=Density
-
-            if atomassa < 0:
-                atomassa = self.A
+        if Density < 0:
+            Ro=self.Ro
+        else:
+            Ro=Density
 
-            if atomz < 0:
-                atomz = self.Z
+        if atomassa < 0:
+            atomassa = self.A
 
+        if atomz < 0:
+            atomz = self.Z
 
-            Out.write((xox.xT['fInf']+'\n') % (atomz, atomassa, Ro, 10))
-            Out.write('{0} \n'.format(xox.xT['sInf']))
-            Out.write('{0} \n'.format(xox.xT['sDB']))
-            sss="""\
+        sss="""\
 # 1 column - decimal logarithm of Energy (eV)
 # 2 column - decimal logarithm of Elastic Scattering Cross Sections per massa(cm^2/gramm)
 # 3 column - decimal logarithm of Bremsstrahlung Cross Sections per massa(cm^2/gramm)
 # 4 column - decimal logarithm of Excitation Cross Sections per massa(cm^2/gramm)
 # 5 column - decimal logarithm of Summary of all Electroionization Subshell Cross Sections per massa(cm^2/gramm)
 # 6 column - decimal logarithm of Annihilation of pozitron per massa(cm^2/gramm)"""
-            Out.write('{0} \n'.format(sss))
-            Out.write('{0} \n'.format('6(%+19.15f )'))
-            Out.write('{0} \n'.format(xox.xT['sDE']))
-            # write data
-
-            for k in range(self.nE):
-                sf='%+19.15f ' % (self.E_log[k]);#str();
-                for i in range(5):
-                    sf+='%+19.15f ' % (d[i][k])
-                sf+='\n';
-                Out.write(sf);
-#            Out.close()
+        hh=xox.xHeadKiam((self.nE,5,2,16),(self.Emin,self.Emax,self.nE,2),sss,
+                         '{0} \n'.format('6(%+19.15f )'),vInf=(atomz, atomassa, Ro, 10))
+        xox.xWriteKiam(NameFl,hh,np.column_stack([self.E_log]+[d[i][:self.nE] for i in range(5)]))
 
 
     ##  Вычисление таблицы распределения для упругого рассеяния электронов
@@ -378,104 +324,61 @@ class electron(ken.Kendf):
         SAm=np.tile(self.d_23_526,(self.nG_el,1)).transpose()
         nmFlS=self.El_Setka_Out['526']
         nmFlD=self.El_Distrib_Out['526']
-        if os.path.isfile(nmFlS) and os.path.isfile(nmFlD) and self.xxCalc:
-            cs=xox.xxReadArray(nmFlS)
-            d=xox.xxReadArray(nmFlD)
-            xcF=d.transpose()
-
-        else:
-            DEL=1.0e-12
-            u=self.read_endf(26,526)
-            n=len(u)
-            e=[]
-            mt=[]
-            cs1=np.logspace(-12,math.log10(2),self.nG_el-1)
-            cs1=np.insert(cs1,0,0.0)
+        DEL=1.0e-12
+        u=self.read_endf(26,526)
+        n=len(u)
+        cs1=np.logspace(-12,math.log10(2),self.nG_el-1)
+        cs1=np.insert(cs1,0,0.0)
     #        cs1=np.logspace(-12,math.log10(2),100)
-            cs2=2.-cs1
-            cs=np.union1d(cs1,cs2)
-            ics=(cs==0.)
+        cs2=2.-cs1
+        cs=np.union1d(cs1,cs2)
+        ics=(cs==0.)
 #            cs[ics]=10**(-16)
 
-            cs=cs2[::-1]
-            cs[0]=0.
-            cs[-1]=2.
-            if self.xPrintDistrib:
-                xox.xxWriteArray(nmFlS,cs)
+        cs=cs2[::-1]
+        cs[0]=0.
+        cs[-1]=2.
+        if self.xPrintDistrib:
+            xox.xxWriteArray(nmFlS,cs)
 
-            Ncs=len(cs)
+        Ncs=len(cs)
 #            xcF=(-16.)*np.ones((self.nE,Ncs))
-            xcF=np.zeros((self.nE,Ncs))
-
-
-
-    #        self.d_526=np.zeros((self.nE,self.nG_el))
-            st_=[]
-            for k in range(n):
-                e.append(float(u[k][1]));
-                vg=[float(c) for c in u[k][2]]
-                vz=[float(c) for c in u[k][3]]
-                cziz=xox.xxCumTrapz(vg,vz)
-                if cziz[-1]<1:
-                    cziz.append(1.)
-                    vg.append(1.)
-    #            else:
-    #                cziz[-1]=1.
-    #                vg[-1]=1.
-
-                cziz=[c/cziz[-1] for c in cziz]
-                vg=[x+1. for x in vg]
-    #            if math.fabs(1-cziz[-1])>DEL:
-    #                vg.append(1.0)
-    #                cziz.append(1.0)
-                t=xox.xxInterp1(vg,cziz,cs)
-#                t2=np.interp(cs,vg,cziz)
-    #            gdc=[t[k]+1 for k in range(1,self.nG_el)]
-                mt.append(t)
-                dt=np.array(mt).transpose()
-            e_log=[math.log10(c) for c in e]
-            for ic,cc in  enumerate(cs[1:]):
-                xt=np.interp(self.E_log, e_log, np.log10(dt[ic+1,:]))
-                xt=np.power(10.,xt)
-                xcF[:,ic+1]=xt
-
-            xcF*=SAm
-            self.DS_526=xcF
-            if self.xPrintDistrib:
-                xox.xxWriteArray(nmFlD,xcF.transpose())
+        xcF=np.zeros((self.nE,Ncs))
+
+
+
+        # функции распределения для всех энергий ENDF на общей сетке cs
+        e=np.zeros(n)
+        dt=np.zeros((n,Ncs))
+        for k in range(n):
+            e[k]=u[k][1]
+            vg=u[k][2]
+            cziz=xn.cumtrapz(vg,u[k][3])
+            if cziz[-1]<1:
+                cziz=np.append(cziz,1.)
+                vg=np.append(vg,1.)
+            cziz=cziz/cziz[-1]
+            dt[k,:]=xn.interp1(vg+1.,cziz,cs)
+        # интерполяция в логарифмическом масштабе на сетку E_log
+        e_log=[math.log10(c) for c in e.tolist()]
+        xt=xn.interp_cols(self.E_log, e_log, np.log10(dt[:,1:]))
+        xcF[:,1:]=np.power(10.,xt)
+
+        xcF*=SAm
+        self.DS_526=xcF
+        if self.xPrintDistrib:
+            xox.xxWriteArray(nmFlD,xcF.transpose())
 
         self.Stk_526=cs
         return xcF,SAm
 
     def xWrite_526(self,nameFL,d,acca='full'):
         """ write 526 data"""
-
-        with open(nameFL,'w') as Out:
-            # write heap
-            Out.write('{0} \n'.format(xox.xT['f1']))
-            Out.write((xox.xT['f1']+'\n') % (self.nG_el,self.nE,2,11))
-            Out.write('{0} \n'.format(xox.xT['s1']))
-            Out.write('%s \n' % (xox.xT['fE']))
-            Out.write((xox.xT['fE']+'\n') % (self.Emin,self.Emax,self.nE,2))
-            Out.write('{0} \n'.format(xox.xT['sE']))
-            Out.write('{0} \n'.format(xox.xT['fG']))
-            Out.write((xox.xT['fG']+'\n')%(math.log10(self.Gl_el[1]), self.nG_el,5))
-            Out.write('{0} \n'.format(xox.xT['sG']))
-            Out.write('{0} \n'.format(xox.xT['sDB']))
-            sss='# Output: distribution of log10(1+cos(tet))'
-            Out.write('{0} \n'.format(sss))
-            Out.write('{0}(%+19.15f )\n'.format(self.nE))
-            Out.write('{0} \n'.format(xox.xT['sDE']))
-            # write data
-
-            # write heap
-            for k in range(self.nG_el):
-                sf='';#str();
-                for i in range(self.nE):
-                    sf+='%+19.15f ' % (d[i][k])
-                sf+='\n';
-                Out.write(sf);
-#            Out.close()
+        sss='# Output: distribution of log10(1+cos(tet))'
+        hh=xox.xHeadKiam((self.nG_el,self.nE,2,11),(self.Emin,self.Emax,self.nE,2),sss,
+                         '{0}(%+19.15f )\n'.format(self.nE),vG=(math.log10(self.Gl_el[1]), self.nG_el,5))
+        # строки файла - точки по гамме, столбцы - энергии
+        xox.xWriteKiam(nameFL,hh,np.asarray(d,dtype=float)[:self.nE,:self.nG_el].transpose())
 ## Вычисление таблиц для тормозного излучения
 
     def xox_527(self):
@@ -485,105 +388,42 @@ class electron(ken.Kendf):
         SAm=np.tile(self.d_23_527,(self.nG_br,1)).transpose()
         nmFlS=self.El_Setka_Out['527']
         nmFlD=self.El_Distrib_Out['527']
-        if os.path.isfile(nmFlS) and os.path.isfile(nmFlD) and self.xxCalc:
-            d=xox.xxReadArray(nmFlS)
-            xsEph=d.transpose()
-            xsD=xox.xxReadArray(nmFlD)
-#            xsD=d.transpose()
-        else:
+        u=self.read_endf(26,527)
+        n=len(u);
+        nEph=self.nG_br
+        xsEph=np.zeros((self.nE,nEph))
+        for ie,ee in  enumerate(self.E):
+            xsEph[ie,:] = np.logspace(math.log10(self.Eph_br_Min),math.log10(ee),nEph)
+        if self.xPrintDistrib:
+            xox.xxWriteArray(nmFlS,xsEph)
+
+        ## спектры фотонов для всех энергий ENDF (строки дополнены до одной длины)
+        eEndf = [u[k][1] for k in range(n)]
+        Eph = xn.pad_rows([u[k][2] for k in range(n)])
+        Pph = xn.pad_rows([u[k][3] for k in range(n)])
+        ## получаем кумулятивную функцию распределения
+        cP = xn.cumtrapz(Eph,Pph)
+        cP = cP/cP[:,-1:]
+        ## аппроксимируем функцию распределения на сетку по гамме
+        pF = xn.interp_rows(self.G_br, cP, Eph)
+
+        ## интерполяция в логарифмическом масштабе на сетку E_log
+        xFl = xn.interp_cols(self.E_log, np.log10(eEndf), np.log10(pF))
+        xF = np.power(10,xFl)
+        xG = self.G_br
+
+        ## функция распределения на сетке по энергии фотона xsEph
+        xsD=np.zeros((self.nE,nEph))
+        ip_ = xF.max(axis=1)>0.
+        if ip_.any():
+            xsD[ip_,:] = xn.interp_rows(xsEph[ip_,:], xF[ip_,:], xG)
+
+        self.Eave_527 = list(xsEph[:,-1] - xn.trapz(xsEph,xsD))
 
-            u=self.read_endf(26,527)
-            n=len(u);
-            e=[];
-            pEph=list()
-            Emid=[]
-            nEph=self.nG_br
-            xsD=np.zeros((self.nE,nEph))
-            xsEph=np.zeros((self.nE,nEph))
-            for ie,ee in  enumerate(self.E):
-                xsEph[ie,:] = np.logspace(math.log10(self.Eph_br_Min),math.log10(ee),nEph)
-            if self.xPrintDistrib:
-                xox.xxWriteArray(nmFlS,xsEph)
-
-            eEndf = [float(u[k][1]) for k in range(n)]
-            pE = []
-            pFx = []
-            mEendf_ = []
-            mPendf_ = []
-            mCumPendf = []
-            mT_ = []
-            xxEav = []
-            fig_ = 0
-            op_ = {'bxlog': False, 'bylog': True,
-                    'tpline1':'b-o', 'tpline2':'r-x'}
-            tEv_ = []
-            xEv_ = []
-            pG = np.tile(self.G_br, (len(eEndf), 1))
-            pF = np.zeros((len(eEndf), len(self.G_br)))
-            for k,e in enumerate(eEndf):
-                Eph = [float(c) for c in u[k][2]]
-                mEendf_.append(Eph)
-                Pph = [float(c) for c in u[k][3]]
-                mPendf_.append(Pph)
-                ## вычисляем среднюю энергию
-                EP = xox.xxCalcEav(Eph,Pph)
-                Emid.append(EP)
-                ## получаем кумулятивную функцию распределения
-                cP = xox.xxCumTrapz(Eph,Pph)
-                cP_end = cP[-1]
-                cP = [zc/cP[-1] for zc in cP]
-                mCumPendf.append(cP)
-                ## аппроксимируем функцию распределения на сетку по гамме
-                tt=xox.xxInterp1(cP,Eph,self.G_br)
-                tt_ = np.interp(self.G_br, cP, Eph)
-                pF[k,:] = tt_
-                tEv_.append(np.trapz(tt_, self.G_br))
-                xxEav.append(xox.xxTrapz(self.G_br, tt))
-
-
-                phEl = xox.xxlinspace(math.log10(self.Eph_br_Min),math.log10(Eph[-1]),nEph)
-                phE = [math.pow(10,c) for c in phEl]
-    #            xP=xox.xxInterp1(Eph,cP,phE)
-                ## создали сетку по энергии и на неё аппроксимируем функцию распределения
-                xP=xox.xxInterp1(tt,self.G_br,phE)
-                xEv_.append(np.trapz(phE, xP))
-
-
-                pE.append(phE)
-                pFx.append(xP)
-
-            if False:
-               xG, xFl = xox.xxInterp_2D(np.log10(eEndf),pG,np.log10(pF),self.E_log)
-            else:
-               xFl = np.zeros((len(self.E_log),len(self.G_br)))
-               eldf_ = np.log10(eEndf)
-               plf_ = np.log10(pF)
-
-               for ig_, gg_ in enumerate(self.G_br):
-                   tt_ = np.interp(self.E_log, eldf_, plf_[:,ig_] )
-                   xFl[:,ig_] = tt_
-
-                   pass
-
-            xF = np.power(10,xFl)
-            xG = self.G_br
-
-            for ie,ee in  enumerate(self.E):
-                if  max(xF[ie,:])>0. :
-                   xP = np.interp(xsEph[ie,:], xF[ie,:], xG)
-                   xsD[ie,:]=xP
-
-
-            Eave_527 = np.power(10, np.interp(self.E_log, np.log10(eEndf), np.log10(Emid)))
-            self.Eave_527=[]
-            for ie,ee in  enumerate(self.E):
-                et_ = xsEph[ie,-1] - np.trapz(xsD[ie,:],xsEph[ie,:])
-                self.Eave_527.append(et_)
-
-            SAm=np.tile(self.d_23_527,(self.nG_br,1)).transpose()
-            xsD *= SAm
-            if self.xPrintDistrib:
-                xox.xxWriteArray(nmFlD,xsD)
+        SAm=np.tile(self.d_23_527,(self.nG_br,1)).transpose()
+        xsD *= SAm
+        if self.xPrintDistrib:
+            xox.xxWriteArray(nmFlD,xsD)
         self.Stk_527=xsEph
         return xsD,SAm
 
@@ -593,27 +433,10 @@ class electron(ken.Kendf):
 
     def xWrite_527(self,nameFL,d,acca='full'):
         """ write 527 data for element """
-        with open(nameFL,'w') as Out:
-            # write heap
-            Out.write('{0} \n'.format(xox.xT['f1']))
-            Out.write((xox.xT['f1']+'\n') % (self.nG_br,self.nE,2,8))
-            Out.write('{0} \n'.format(xox.xT['s1']))
-            Out.write('%s \n' % (xox.xT['fE']))
-            Out.write((xox.xT['fE']+'\n') % (self.Emin,self.Emax,self.nE,5))
-            Out.write('{0} \n'.format(xox.xT['sE']))
-            Out.write('{0} \n'.format(xox.xT['sDB']))
-            sss='# Output: distribution of logarithm energy of photons'
-            Out.write('{0} \n'.format(sss))
-            Out.write('{0}(%+19.15f )\n'.format(self.nE))
-            Out.write('{0} \n'.format(xox.xT['sDE']))
-            # write data
-
-            for k in range(self.nG_br):
-                sf='';#str();
-                for i in range(self.nE):
-                    sf+='%+19.15f ' % (d[i][k])
-                sf+='\n';
-                Out.write(sf);
+        sss='# Output: distribution of logarithm energy of photons'
+        hh=xox.xHeadKiam((self.nG_br,self.nE,2,8),(self.Emin,self.Emax,self.nE,5),sss,
+                         '{0}(%+19.15f )\n'.format(self.nE))
+        xox.xWriteKiam(nameFL,hh,np.asarray(d,dtype=float)[:self.nE,:self.nG_br].transpose())
 
 
     def xox_528(self):
@@ -621,9 +444,9 @@ class electron(ken.Kendf):
             excitation
         """
         d=self.read_endf(26,528)
-        ee=[math.log10(float(c)) for c in d[0][1]]
+        ee=[math.log10(c) for c in d[0][1].tolist()]
         ec=ee[:];
-        ff=[math.log10(float(c)) for c in d[0][2]]
+        ff=[math.log10(c) for c in d[0][2].tolist()]
         d_528=xox.xxInterp1(ec,ff,self.E_log)
         self.Eave_528=[math.pow(10,c) for c in d_528]
         self.d_528=np.array(d_528)
@@ -663,144 +486,79 @@ class electron(ken.Kendf):
         SAm=np.tile(self.d_23_666,(self.nG_ion,1)).transpose()
         nmFlS=self.El_Setka_Out['555']
         nmFlD=self.El_Distrib_Out['555']
-        if os.path.isfile(nmFlS) and os.path.isfile(nmFlD) and self.xxCalc:
-            d=xox.xxReadArray(nmFlS)
-            xsE2=d.transpose()
-            xsD=xox.xxReadArray(nmFlD)
-            t=xox.read_kiam_file_2(self.El_NameFile_Out['eb'])
-            d=xox.xxTrans(t)
-            self.oEb=d[1][:]
-
+        ## сечения оболочек уже вычислены в xox_23
+        if len(self.mtx)==0:
+            self.xox_23()
+        d=self.mtx
+        SigALL=np.array(d[self.Nshell])
+        SigALL[SigALL==0.0]=1.E-16
+
+        ##  self.Kf - koefficient for sigm (sigm(k)/sum(sig(i))
+        self.Kf=np.array(d[0:-1]).reshape(-1,self.nE)/SigALL
+        xKf=self.Kf
+
+        ## средняя энергия связи
+        Eb_=self.getEb()
+        oEb=np.zeros((self.nE))
+        for ik,mt in enumerate(self.Shell_MT):  # cycle for shell
+            oEb+=Eb_[mt]*xKf[ik]
+
+        nE2=self.nG_ion
+        xsE2=np.zeros((self.nE,nE2))
+        for ie,ee in  enumerate(self.E):
+            e2=ee/2
+            cs1=np.linspace(math.log10(self.E2_ion_Min),math.log10(e2),nE2)
+            xsE2[ie,:]=np.power(10,cs1)
+
+        if self.xPrintDistrib:
+            xox.xxWriteArray(nmFlS,xsE2)
+
+        ## функции распределения для всех оболочек и всех энергий ENDF
+        ## (строки дополнены до одной длины)
+        u=[]
+        iu_=[0]
+        for mt in self.Shell_MT:
+            uu_=self.read_endf(26,mt)
+            u.extend(uu_)
+            iu_.append(len(u))
+        xF=np.zeros((len(self.Shell_MT),self.nE,nE2))
+        if len(u)>0:
+            Eph=xn.pad_rows([c[2] for c in u]) # without  binding energy
+            Pph=xn.pad_rows([c[3] for c in u])
+            cS_=xn.cumtrapz(Eph,Pph)
+            cS_/=cS_[:,-1:]
+            pF=xn.interp1(cS_,Eph,self.G_ion)
+            for ik in range(len(self.Shell_MT)):
+                ## интерполяция в логарифмическом масштабе на сетку E_log
+                e0=[c[1] for c in u[iu_[ik]:iu_[ik+1]]]
+                xFl=xn.interp_cols(self.E_log, np.log10(e0), np.log10(pF[iu_[ik]:iu_[ik+1]]))
+                xF[ik]=np.power(10.,xFl)
+
+        ## распределение энергии вторичного электрона - сумма по оболочкам
+        xsD=np.zeros((self.nE,nE2))
+        xG = self.G_ion
+        for ik in range(len(self.Shell_MT)):
+            ip_ = xF[ik].max(axis=1)>10**-16
+            if ip_.any():
+                xP = xn.interp_rows(xsE2[ip_,:], xF[ik,ip_,:], xG)
+                xP /= xP[:,-1:]
+                xsD[ip_,:] += xP * xKf[ik,ip_,np.newaxis]
+
+        Gip = np.array(self.G_ion)
+        self.d_555 = xn.inverse_cdf(xsD, xsE2, Gip, kLog=True)
+        dRc = np.power(10, self.d_555)
+        dRc = np.fliplr(dRc)
+        E2_ave = xn.trapz(self.Gl_ion,dRc)
 
-        else:
 
-            d=self.get_endf_shell_23()
-            SigALL=d[self.Nshell]
-            for k_, dd_ in enumerate(SigALL):
-                if dd_ == 0.0:
-                    SigALL[k_] = 1.E-16
-
-            Sig=d[0:-1]
-            ##  self.Kf - koefficient for sigm (sigm(k)/sum(sig(i))
-            self.Kf=[[Sig[i][j]/SigALL[j]  for j in range(len(SigALL))]for i in range(len(Sig))];
-            xKf=np.array(self.Kf)
-            oEb=np.zeros((self.nE))
-
-            self.Res=[[0.0 for k in range(self.nG_ion)]for i in range(self.nE)];
-
-            Eb_=self.getEb()
-            Eb=[]
-            for ik,mt in enumerate(self.Shell_MT):  # cycle for shell
-                # binding energy ez[] and Ez
-                Ez=Eb_[mt]
-
-                for k in range(self.nE):
-                    oEb[k]+=Ez*self.Kf[ik][k];
-
-                Eb.append(Ez);
-
-
-            self.Eave_666=[0.0 for i in range(self.nE)]
-            nE2=self.nG_ion
-            xsD=np.zeros((self.nE,nE2))
-            esD=np.zeros((len(self.Shell_MT),self.nE,nE2))
-            xsE2=np.zeros((self.nE,nE2))
-            self.d_555=np.zeros((self.nE,self.nG_ion))
-            for ie,ee in  enumerate(self.E):
-                #e2=ee/2+np.interp(ee,self.E_log,oEb)
-                e2=ee/2
-                cs1=np.linspace(math.log10(self.E2_ion_Min),math.log10(e2),nE2)
-                cs1=np.power(10,cs1)
-                cs2=e2-cs1
-                cs=np.union1d(cs1,cs2)
-                ics=(cs==0.)
-                cs[ics]=10**(-16)
-#                cs+=oEb[ie]
-                xsE2[ie,:]=cs1
-
-            if self.xPrintDistrib:
-                xox.xxWriteArray(nmFlS,xsE2)
-            Ff_=[]
-            Gion=self.G_ion
-            #Gion[0]=10**(-16)
-
-            for ik,mt in enumerate(self.Shell_MT):  # cycle for shell
-                u=self.read_endf(26,mt);
-                nE=len(u);
-                e0=[float(u[k][1]) for k in range(nE)]
-                ff_=[]
-                Emid=[]
-                pF=np.zeros((len(e0),len(self.G_ion)))
-                pG=np.tile(self.G_ion,(len(e0),1))
-
-                for k,xe in enumerate(e0):     # cycle for energy for shell in ENDF
-                    Eph=[float(c) for c in u[k][2]]; # without  binding energy
-                    Pph=[float(c) for c in u[k][3]];
-                    cS_=np.array(xox.xxCumTrapz(Eph,Pph));
-                    cS_/=cS_[-1]
-
-                    sK_=xox.xxInterp1(cS_,Eph,self.G_ion);
-                    # calc average energy
-                    Em = Eph[-1]*xox.xxTrapz(Eph,Pph)-xox.xxTrapz(Eph,xox.xxCumTrapz(Eph,Pph))
-                    Em = xox.xxCalcEav(Eph,Pph)
-                    Emid.append(Em)
-                    pF[k,:] = sK_
-                    ff_.append((e0[k],np.array(Eph),np.array(Pph),cS_,sK_ ))
-
-                if True:
-                    xFl = np.zeros((len(self.E_log),len(self.G_ion)))
-                    eEndf = np.array(e0)
-                    eldf_ = np.log10(eEndf)
-                    plf_ = np.log10(pF)
-
-                    for ig_, gg_ in enumerate(self.G_ion):
-                        tt_ = np.interp(self.E_log, eldf_, plf_[:,ig_] )
-                        xFl[:,ig_] = tt_
-
-                    xF=np.power(10.,xFl)
-                    xG = self.G_ion
-                else:
-                    xG,xF=xox.xxInterp_2D((e0),(pG),(pF),self.E)
-
-                for ie,ee in  enumerate(self.E):
-                    if  max(xF[ie,:])>10**-16:
-                        xP = np.interp(xsE2[ie,:], xF[ie,:], xG)
-                        xP = np.array(xP)
-                        xP /= xP[-1]
-                        xsD[ie,:] += xP * xKf[ik,ie]
-                        esD[ik,ie,:] = xP
-
-                e_log = np.log10(e0)
-                Emid_log = np.log10(Emid)
-                xEav = xox.xxInterp1(e0,Emid,self.E)
-                self.Eave_666 = [self.Eave_666[j] + xEav[j]*self.Kf[ik][j] for j in range(self.nE)]
-
-                Ff_.append(ff_)
-            Gip = np.array(self.G_ion)
-            self.d_555 = xox.xxGeTable(xsD, xsE2, Gip)
-            dRc = np.power(10, self.d_555)
-            dRc = np.fliplr(dRc)
-
-            E2_ave = []
-            #Gip=Gip[::-1]
-            for ie in range(self.nE):
-                ss = xox.xxTrapz(self.Gl_ion,dRc[ie,:])
-                E2_ave.append(ss)
-
-
-            E2ave = np.array(E2_ave)
-            xEb = np.tile(oEb,(self.nG_ion,1)).transpose()
-            xE = np.tile(self.E,(self.nG_ion,1)).transpose()
-
-
-            s="""\
+        s="""\
 # 1 column - decimal logarithm of Energy (eV)
 # 2 column - Binding Energy, eV"""
-            self.s['eb'] = s
-            self.oEb = oEb
-            xsD *= SAm
-            if self.xPrintDistrib:
-                xox.xxWriteArray(nmFlD,xsD)
+        self.s['eb'] = s
+        self.oEb = oEb
+        xsD *= SAm
+        if self.xPrintDistrib:
+            xox.xxWriteArray(nmFlD,xsD)
         dEb = np.array(self.oEb) * np.array(self.d_23_666)
         self.Eave_666 = E2_ave + oEb
         self.Stk_555 = xsE2
@@ -819,28 +577,9 @@ class electron(ken.Kendf):
 
 
     def xWrite_XXX(self,nameFL,d,sss,acca='full'):
-        with open(nameFL,'w') as Out:
-            # write heap
-            Out.write('{0} \n'.format(xox.xT['f1']))
-            Out.write((xox.xT['f1']+'\n') % (self.nG_ion,self.nE,2,11))
-            Out.write('{0} \n'.format(xox.xT['s1']))
-            Out.write('%s \n' % (xox.xT['fE']))
-            Out.write((xox.xT['fE']+'\n') % (self.Emin,self.Emax,self.nE,2))
-            Out.write('{0} \n'.format(xox.xT['sE']))
-            Out.write('{0} \n'.format(xox.xT['fG']))
-            Out.write((xox.xT['fG']+'\n')%(math.log10(self.Gl_ion[1]), self.nG_ion,5))
-            Out.write('{0} \n'.format(xox.xT['sG']))
-            Out.write('{0} \n'.format(xox.xT['sDB']))
-            Out.write('{0} \n'.format(sss))
-            Out.write('{0}(%+19.15f )\n'.format(self.nE))
-            Out.write('{0} \n'.format(xox.xT['sDE']))
-            # write data
-            for k in range(self.nG_ion):
-                sf='';#str();
-                for i in range(self.nE):
-                    sf+='%+19.15f ' % (d[i][k])
-                sf+='\n';
-                Out.write(sf);
+        hh=xox.xHeadKiam((self.nG_ion,self.nE,2,11),(self.Emin,self.Emax,self.nE,2),sss,
+                         '{0}(%+19.15f )\n'.format(self.nE),vG=(math.log10(self.Gl_ion[1]), self.nG_ion,5))
+        xox.xWriteKiam(nameFL,hh,np.asarray(d,dtype=float)[:self.nE,:self.nG_ion].transpose())
 
 
 
@@ -848,54 +587,45 @@ class electron(ken.Kendf):
         """
 
         """
-        nmFlEawe = self.El_Setka_Out['awe']
-        nmFlStp = self.El_Distrib_Out['stp']
-        if os.path.isfile(nmFlEawe) and os.path.isfile(nmFlStp) and self.xxCalc:
-            d = xox.xxReadArray(nmFlEawe)
-            d = d.transpose()
-            d = xox.xxReadArray(nmFlStp)
-            xcF = d.transpose()
-        else:
-
-            xRe = list(range(self.nE))
-            self.StPw_527 = [self.Eave_527[i] * self.d_23_527[i] for i in xRe]
-            self.StPw_528 = [self.Eave_528[i] * self.d_23_528[i] for i in xRe]
-            self.StPw_666 = [self.Eave_666[i] * self.d_23_666[i] for i in xRe]
-            s="""\
+        xRe = list(range(self.nE))
+        self.StPw_527 = [self.Eave_527[i] * self.d_23_527[i] for i in xRe]
+        self.StPw_528 = [self.Eave_528[i] * self.d_23_528[i] for i in xRe]
+        self.StPw_666 = [self.Eave_666[i] * self.d_23_666[i] for i in xRe]
+        s="""\
 # 1 column - decimal logarithm of Energy (eV)
 # 2 column - decimal logarithm of stopping power for Ionization, (ev*cm^2/g)
 # 3 column - decimal logarithm of stopping power for Excitation, (ev*cm^2/g)
 # 4 column - decimal logarithm of stopping power for Bremsstrahlung, (ev*cm^2/g)"""
-            self.s['xer']=s
-            StPw=np.array([self.StPw_666,self.StPw_528,self.StPw_527])
-            StPhl =[math.log10(self.StPw_527[i]+self.StPw_528[i]+self.StPw_666[i]) for i in xRe]
-            El=xox.xxlinspace(self.Emin,self.Emax,self.nE*2)
-            E=[math.pow(10,c) for c in El]
-            xStPh=xox.xxInterp1(self.E_log,StPhl,El)
-            StPh = [math.pow(10,c) for c in xStPh]
-            StPh = [1.0/c for c in StPh]
-            E.insert(0,0.0)
-            StPh.insert(0,0.0)
-            StPh = xox.xxCumTrapz(E,StPh)
-            El.insert(0, 0.0)
-            StPh = xox.xxInterp1(El, StPh, self.E_log)
-            StPh = [math.log10(c) for c in StPh]
-            self.StPh = np.array(StPh)
-            s="""\
+        self.s['xer']=s
+        StPw=np.array([self.StPw_666,self.StPw_528,self.StPw_527])
+        StPhl =[math.log10(self.StPw_527[i]+self.StPw_528[i]+self.StPw_666[i]) for i in xRe]
+        El=xox.xxlinspace(self.Emin,self.Emax,self.nE*2)
+        E=[math.pow(10,c) for c in El]
+        xStPh=xox.xxInterp1(self.E_log,StPhl,El)
+        StPh = [math.pow(10,c) for c in xStPh]
+        StPh = [1.0/c for c in StPh]
+        E.insert(0,0.0)
+        StPh.insert(0,0.0)
+        StPh = xox.xxCumTrapz(E,StPh)
+        El.insert(0, 0.0)
+        StPh = xox.xxInterp1(El, StPh, self.E_log)
+        StPh = [math.log10(c) for c in StPh]
+        self.StPh = np.array(StPh)
+        s="""\
 # 1 column - decimal logarithm of Energy, (eV)
 # 2 column - decimal logarithm of Stopping Path, (g/cm^2)"""
-            self.s['stp'] = s
+        self.s['stp'] = s
 
-            lEave_527=[math.log10(c) for c  in self.Eave_527]
-            lEave_528=[math.log10(c) for c  in self.Eave_528]
-            lEave_666=[math.log10(c) for c  in self.Eave_666]
-            self.lEave=[lEave_666,lEave_528,lEave_527]
-            s="""\
+        lEave_527=[math.log10(c) for c  in self.Eave_527]
+        lEave_528=[math.log10(c) for c  in self.Eave_528]
+        lEave_666=[math.log10(c) for c  in self.Eave_666]
+        self.lEave=[lEave_666,lEave_528,lEave_527]
+        s="""\
 # 1 column - decimal logarithm of Energy (eV)
 # 2 column - decimal logarithm of average loss of Energy for Ionization, (ev)
 # 3 column - decimal logarithm of average loss of Energy for Excitation, (ev)
 # 4 column - decimal logarithm of average loss of Energy for Bremsstrahlung, (ev)"""
-            self.s['awe']=s
+        self.s['awe']=s
         self.lEave=np.array(self.lEave)
 
         return self.StPh, StPw.transpose()
@@ -905,32 +635,10 @@ class electron(ken.Kendf):
     def xWrite_DE(self,nameFL,e,d,sss,acca='full'):
         """ write 1D data"""
         nc=sss.count('\n')-1
-#        d.insert(0,e)
-#        d=[e,d]
-#        d=np.array(d)
         ln=2
         le=len(e)
-        with open(nameFL,'w') as Out:
-            # write heap
-
-            Out.write('{0} \n'.format(xox.xT['f1']))
-            Out.write((xox.xT['f1']+'\n') % (le,ln,2,nc+9))
-            Out.write('{0} \n'.format(xox.xT['s1']))
-            Out.write('%s \n' % (xox.xT['fE']))
-            Out.write((xox.xT['fE']+'\n') % (e[0],e[-1],le,nc+6))
-            Out.write('{0} \n'.format(xox.xT['sE']))
-            Out.write('{0} \n'.format(xox.xT['sDB']))
-            Out.write('{0} \n'.format(sss))
-            Out.write('{0}(%+19.15f )\n'.format(ln))
-            Out.write('{0} \n'.format(xox.xT['sDE']))
-
-            # write data
-            for k,dv in enumerate(d):
-                 sf='%+19.15f %+19.15f\n' % (e[k],dv)
-#                 for i in range(ln):
-#                    sf+='%+19.15f ' % (d[i][k])
-#                 sf+='\n'
-                 Out.write(sf)
+        hh=xox.xHeadKiam((le,ln,2,nc+9),(e[0],e[-1],le,nc+6),sss,'{0}(%+19.15f )\n'.format(ln))
+        xox.xWriteKiam(nameFL,hh,np.column_stack((e[:len(d)],d)),['%+19.15f ','%+19.15f'])
 
     def xWrite_DE2(self,nameFL,e,d,sss,acca='full'):
         """ write 2D data"""
@@ -938,27 +646,8 @@ class electron(ken.Kendf):
         d.insert(0,e)
         ln=len(d)
         le=len(e)
-        with open(nameFL,'w') as Out:
-            # write heap
-
-            Out.write('{0} \n'.format(xox.xT['f1']))
-            Out.write((xox.xT['f1']+'\n') % (le,ln,2,nc+9))
-            Out.write('{0} \n'.format(xox.xT['s1']))
-            Out.write('%s \n' % (xox.xT['fE']))
-            Out.write((xox.xT['fE']+'\n') % (e[0],e[-1],le,nc+6))
-            Out.write('{0} \n'.format(xox.xT['sE']))
-            Out.write('{0} \n'.format(xox.xT['sDB']))
-            Out.write('{0} \n'.format(sss))
-            Out.write('{0}(%+19.15f )\n'.format(ln))
-            Out.write('{0} \n'.format(xox.xT['sDE']))
-
-            # write data
-            for k in range(le):
-                 sf=''
-                 for i in range(ln):
-                    sf+='%+19.15f ' % (d[i][k])
-                 sf+='\n'
-                 Out.write(sf)
+        hh=xox.xHeadKiam((le,ln,2,nc+9),(e[0],e[-1],le,nc+6),sss,'{0}(%+19.15f )\n'.format(ln))
+        xox.xWriteKiam(nameFL,hh,np.array([c[:le] for c in d],dtype=float).transpose())
 
 
 
@@ -978,11 +667,110 @@ def sigma_annig(T):
     return cg_
 
 
+## Результаты расчёта распределений для одного элемента.
+# Объект хранит сеточные параметры класса electron (без данных ENDF),
+# поэтому для него доступны функции записи таблиц xWrite_*.
+# Объект передаётся между процессами при параллельном расчёте
+class ElementData(electron):
+    """
+    """
+
+    xAttr = ('Z', 'A', 'Ro', 'Name', 'Emin', 'Emax', 'nE', 'E_log', 'E',
+             'nG_el', 'nG_ion', 'nG_br', 'G_el', 'Gl_el', 'G_br', 'G_ion', 'Gl_ion',
+             's', 'Stk_526', 'Stk_527', 'Stk_555')
+
+    xData = ('u_23', 'u_555', 'Sig_ion', 'u_Eb', 'u_526', 'Sig_el', 'u_527', 'Sig_br',
+             'u_528', 'u_sp', 'u_ae')
+
+    def __init__(self, A):
+        self.u_23 = A.xox_23()
+        self.u_555, self.Sig_ion, self.u_Eb = A.xox_555()
+        self.u_526, self.Sig_el = A.xox_526()
+        self.u_527, self.Sig_br = A.xox_527()
+        self.u_528 = A.xox_528()
+        self.u_sp, self.u_ae = A.xox_StopPath()
+        for nm_ in self.xAttr:
+            setattr(self, nm_, getattr(A, nm_))
+
+    ## Запись результатов в хранилище рассчитанных элементов
+    def save(self, nfl):
+        return xxc.save_attrs(nfl, self, self.xData + self.xAttr)
+
+    ## Считывание результатов из хранилища, None - если их там нет
+    @classmethod
+    def load(cls, nfl):
+        A = cls.__new__(cls)
+        if not xxc.load_attrs(nfl, A):
+            return None
+        for nm_ in cls.xData + cls.xAttr:
+            if not hasattr(A, nm_):
+                return None
+        return A
+
+
+## Параметры xin, от которых зависят результаты расчёта для элемента
+xKey = ('Z', 'Emin', 'Emax', 'nE', 'nG_el', 'nG_ion', 'nG_br')
+
+## Версия алгоритма расчёта. Увеличивается при изменении результатов расчёта
+xVersion = 1
+
+## Модули, от которых зависят результаты расчёта для элемента (входят в ключ)
+xCode = ('xtb_electron', 'interface', 'endf', 'ion_pkl', 'xxfun', 'xxnum', 'phisconst')
+
+## Последние рассчитанные элементы. Таблицы электронов велики, поэтому их
+#  хранится немного: внутри расчёта элементы передаются композитам через
+#  calc_tables.main, при следующих расчётах берутся из хранилища на диске
+xMemo = xxc.Memo(2)
+
+
+## Ключ результатов расчёта для элемента: сетки, версия кода
+#  и контрольные суммы исходных данных
+def element_key(xin, ion=0):
+    """
+    """
+    nfile_ = 'e-%03i_%s_000.endf' % (xin['Z'], xin['Name'])
+    return (('electron', xVersion, xxc.code_hash(*xCode), ion) + tuple(xin[c] for c in xKey) +
+            ken.endf_checksum(nfile_, ion))
+
+
+## Файл хранилища рассчитанных элементов для ключа ky_ ('' - хранилище недоступно)
+def element_file(xin, ky_):
+    """
+    """
+    dr_ = xxc.cache_dir('electron')
+    if len(dr_) == 0:
+        return ''
+    return os.path.join(dr_, '%s-%s.npz' % (xin['Name'], xxc.cache_key(*ky_)))
+
+
+## Расчёт распределений для одного элемента
+#  xin - параметры элемента и сеток (Init.def_element), ion - заряд иона.
+#  Если элемент с теми же сетками и исходными данными уже рассчитывался,
+#  готовые данные берутся из памяти или из хранилища на диске (electron.xxCalc)
+def calc_element(xin, ion=0):
+    """
+    """
+    ky_ = element_key(xin, ion)
+    A = xMemo.get(ky_)
+    if A is not None:
+        return A
+    nfl_ = element_file(xin, ky_) if electron.xxCalc else ''
+    if len(nfl_) > 0:
+        A = ElementData.load(nfl_)
+    if A is None:
+        A = ElementData(electron(xin, xion=ion))
+        if len(nfl_) > 0:
+            A.save(nfl_)
+    return xMemo.put(ky_, A)
+
+
 ## Программа для расчета таблиц для композитов
 #
-def main(xI,Mt,matFile, path):
+def main(xI,Mt,matFile, path, xdata=None):
     """
     программа для расчета таблиц для композитов
+    xdata - уже рассчитанные данные элементов композита (calc_element),
+            если не заданы, то рассчитываются здесь
     """
 #    import annig_pozitron as ang
 
@@ -1028,34 +816,37 @@ def main(xI,Mt,matFile, path):
         p=k[1]
         ion = k[2]
         print (name, p, ion)
-        xB=xI.def_element(name)
-        A=electron(xB, xion=ion)
+        if xdata is None:
+            xB=xI.def_element(name)
+            A=calc_element(xB, ion)
+        else:
+            A=xdata[i]
         aw_ += p * A.A
         zz_ += p * A.Z
         if i == 0:
             Sig_annih = sigma_annig(A.E)
         S_sig_annih += A.Z/A.A
-        u_23 = A.xox_23()
+        u_23 = A.u_23
 
         d_sig += p*u_23
         #
-        u_555,Sig_ion,u_Eb = A.xox_555()
+        u_555,Sig_ion,u_Eb = A.u_555, A.Sig_ion, A.u_Eb
         d_ion += p*u_555
         SSig_ion += p*Sig_ion
         d_eb += p * u_Eb
 
-        u_526, Sig_el=A.xox_526()
+        u_526, Sig_el=A.u_526, A.Sig_el
         d_el += p*u_526
         SSig_el += p*Sig_el
 
-        u_527,Sig_br = A.xox_527()
+        u_527,Sig_br = A.u_527, A.Sig_br
         d_br += p*u_527
         SSig_br += p*Sig_br
 
-        u_528=A.xox_528()
+        u_528=A.u_528
         d_ext+=p*u_528
 
-        u_sp,u_ae=A.xox_StopPath()
+        u_sp,u_ae=A.u_sp, A.u_ae
         d_awe+=p*u_ae
         d_stop+=p*np.power(10,-u_sp)
 
@@ -1073,8 +864,7 @@ def main(xI,Mt,matFile, path):
     A.xWrite_DE(FileOut+FlExt['528'],A.E_log,list(d_ext),A.s['528'])
 
     Dbl_526=u_526/Sig_el
-    tbl_526=xox.xxGeTable(Dbl_526,A.Stk_526,A.Gl_el)
-    tbl_526=np.array(tbl_526)
+    tbl_526=xn.inverse_cdf(Dbl_526,A.Stk_526,A.Gl_el)
     tbl_526[:,1:]=np.log10(tbl_526[:,1:])
 #    tbl_526=xox.xxGeTable(Dbl_526,np.log10(A.Stk_526),A.Gl_el)
 #        s='# Output:  distribution of logarithm energy of scatering electron'
@@ -1082,7 +872,7 @@ def main(xI,Mt,matFile, path):
 
     Dbl_527=u_527/Sig_br
 #    tbl_527=xox.xxGeTable(Dbl_527,A.Stk_527,A.G_br)
-    tbl_527=xox.xxGeTableBrem(Dbl_527,np.log10(A.Stk_527),A.G_br)
+    tbl_527=xn.inverse_cdf(Dbl_527,np.log10(A.Stk_527),A.G_br)
 #    tbl_527 = np.power(10, tbl_527)
 
     tbl_527=np.fliplr(tbl_527)
@@ -1099,7 +889,7 @@ def main(xI,Mt,matFile, path):
 #        ebm_=np.tile(d_eb[i],A.nG_ion)
 #        Dbl_555[i][:]+=ebm_
 #    Dbl_555=np.flipud(Dbl_555)
-    tbl_555=xox.xxGeTable(Dbl_555,A.Stk_555,A.G_ion)
+    tbl_555=xn.inverse_cdf(Dbl_555,A.Stk_555,A.G_ion,kLog=True)
     tbl_555=np.fliplr(tbl_555)
 #    tt_=np.power(10,tbl_555)
 #    for i in range(A.nE):
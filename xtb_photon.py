@@ -19,6 +19,7 @@
 
 import os
 import math
+import tempfile
 import numpy as np
 
 ##try:
@@ -32,9 +33,11 @@ import numpy as np
 xGraf = not False
 
 import xxfun as xox
+import xxnum as xn
 import interface as xItf
 import phisconst as phis
 import endf as ken
+import xxcache as xxc
 
 ##import para_photon as par
 
@@ -43,15 +46,16 @@ import endf as ken
 lGraf = True
 
 
-## Функция предназначена вычисления q
-#
+## Функция предназначена вычисления q и косинусов угла рассеяния X
+#  ee_ - энергия фотона или массив энергий (тогда результат - таблицы nE x nn_)
 def qar(ee_, nn_):
+    ee_ = np.asarray(ee_, dtype=float)
     Qmax = phis.Kph / phis.E0 * ee_ * phis.Sq2
-    qq_ = np.linspace(0.0, Qmax, nn_)
-    xx_ = 1.0 - (phis.E0 * qq_ / phis.Kph / ee_) ** 2
-    xx_ = xx_[::-1]
-    xx_[0] = -1.0
-    xx_[-1] = 1.0
+    qq_ = np.linspace(0.0, Qmax, nn_, axis=-1)
+    xx_ = 1.0 - (phis.E0 * qq_ / phis.Kph / ee_[..., None]) ** 2
+    xx_ = xx_[..., ::-1]
+    xx_[..., 0] = -1.0
+    xx_[..., -1] = 1.0
     return qq_, xx_
 
 
@@ -95,6 +99,9 @@ class photon(ken.Kendf):
     Emin = 2;
     Emax = 7;
 
+    # if False - calculate always (do not use the store of calculated elements)
+    xxCalc = True
+
     ## Функция инициализации класса photon
 
     def __init__(self, xin):
@@ -125,13 +132,8 @@ class photon(ken.Kendf):
         ##        self.X=x[::-1]
         ##        self.X[0]=-1.
         ##        self.X[-1]=1.
-        self.q = []
-        self.X = []
-        for ie, e in enumerate(self.E):
-            ##            F=[e*c/self.L for c in self.q]
-            qt_, xt_ = qar(e, self.nX)
-            self.q.append(qt_)
-            self.X.append(xt_)
+        # таблицы nE x nX рассчитываются по блокам энергий (set_block, tables)
+        self.xQ = {}
 
         self.OutDir = os.path.join(self.nmOutData, self.Name)
         self.OutDirEndf = os.path.join(self.OutDir, 'ENDF')
@@ -166,8 +168,8 @@ class photon(ken.Kendf):
             d = self.read_endf(mf, mt)
             ##            d=[c/self.A for c in self.d]
             # tuta sigma becouse divide A
-            ee = [math.log10(float(c)) for c in d[0][1]]
-            ff = [(float(c) / self.A) for c in d[0][2]]
+            ee = [math.log10(c) for c in d[0][1].tolist()]
+            ff = (d[0][2] / self.A).tolist()
             if mt in (515, 516, 517):
                 ff[0] = 1.e-16
             ff = [math.log10(c) for c in ff]
@@ -181,8 +183,8 @@ class photon(ken.Kendf):
         elif mf == 27 and mt in (502, 504):
             self.d = self.read_endf(mf, mt)
             u = []
-            x = [float(c) for c in self.d[0][1]]
-            y = [float(c) for c in self.d[0][2]]
+            x = self.d[0][1].tolist()
+            y = self.d[0][2].tolist()
 
             u.append(x)
             u.append(y)
@@ -219,81 +221,82 @@ class photon(ken.Kendf):
 
     def xWrite_23(self, NameFl, d, acca='full', Density=-1):
 
-        with open(NameFl, 'w')as Out:
-
-            # write heap
-            Out.write('{0} \n'.format(xox.xT['f1']))
-            Out.write((xox.xT['f1'] + '\n') % (self.nE, 6, 2, 16))
-            Out.write('{0} \n'.format(xox.xT['s1']))
-            Out.write('%s \n' % (xox.xT['fE']))
-            Out.write((xox.xT['fE'] + '\n') % (self.Emin, self.Emax, self.nE, 2))
-            Out.write('{0} \n'.format(xox.xT['sE']))
-            Out.write('{0} \n'.format(xox.xT['fInf']))
-            if Density < 0:
-                Ro = self.Ro
-            else:
-                Ro = Density
-            Out.write((xox.xT['fInf'] + '\n') % (self.Z, self.A, Ro, 10))
-            Out.write('{0} \n'.format(xox.xT['sInf']))
-            Out.write('{0} \n'.format(xox.xT['sDB']))
-            sss = """\
+        if Density < 0:
+            Ro = self.Ro
+        else:
+            Ro = Density
+        sss = """\
 # 1 column - decimal logarithm of Energy (eV)
 # 2 column - decimal logarithm of Total cross sections per massa(cm^2/gramm)
 # 3 column - decimal logarithm of Coherent scattering cross sections per massa(cm^2/gramm)
 # 4 column - decimal logarithm of Incoherent scattering cross sections per massa(cm^2/gramm)
 # 5 column - decimal logarithm of Total Pair production cross sections per massa (cm^2/gramm)
 # 6 column - decimal logarithm of Total photoionization cross section per massa (cm^2/gramm)"""
-            Out.write('{0} \n'.format(sss))
-            Out.write('{0} \n'.format('6(%+19.15f )'))
-            Out.write('{0} \n'.format(xox.xT['sDE']))
-
-            # write data
-            for k in range(self.nE):
-                sf = ' %+19.15f ' % (self.E_log[k])
-                for i in range(5):
-                    sf += '%+19.15f ' % (d[i][k])
-                sf += '\n';
-                Out.write(sf);
-
-    ## Функция для вычисления угловых распределений
+        hh = xox.xHeadKiam((self.nE, 6, 2, 16), (self.Emin, self.Emax, self.nE, 2), sss,
+                           '{0} \n'.format('6(%+19.15f )'), vInf=(self.Z, self.A, Ro, 10))
+        dd = np.column_stack([self.E_log] + [d[i][:self.nE] for i in range(5)])
+        xox.xWriteKiam(NameFl, hh, dd, [' %+19.15f '] + ['%+19.15f '] * 5)
+
+    ## Сетки q и X для энергий self.E[ie] (таблицы len(ie) x nX)
+    def grid(self, ie=slice(None)):
+        return qar(np.array(self.E)[ie], self.nX)
+
+    ## Выбор блока энергий ie, для которого рассчитываются таблицы
+    #  xxFactor, Factor_Rv, xxDistrb
+    def set_block(self, ie):
+        self.ie = ie
+        self.q, self.X = self.grid(ie)
+
+    ## Функции распределения косинуса для неупругого и упругого рассеяния
+    #  для блока энергий ie (2 x блок энергий x nX)
+    def tables(self, ie):
+        self.set_block(ie)
+        r_ = np.array([self.xxFactor(1), self.xxFactor(2)])
+        d_ = np.array([self.Factor_Rv(1), self.Factor_Rv(2)])
+        tt_ = self.xxDistrb(d_, r_, 0)
+        # промежуточные таблицы блока в объекте не хранятся
+        self.q = self.X = self.Fm = self.Rv = None
+        return tt_
+
+    ## Функция для вычисления угловых распределений (таблица nE x nX для блока энергий)
     #   - Кляйне-Нишина(Kv=0,1)
     #   - Томсон(Kv=2)
 
     def xxFactor(self, Kv):
-        self.Fm = []
-        for i, e in enumerate(self.E):
-
-            # ft=[1.0+e*(1.0-x) for x in self.X]
-            x = self.X[i]
-            if Kv == 1 or Kv == 0:
-                e /= self.L
-                F = (1.0 + x ** 2 + (e * (1.0 - x)) ** 2 / (1.0 + e * (1.0 - x))) / (1.0 + e * (1.0 - x)) ** 2
-            else:
-                F = 1.0 + x ** 2
-            self.Fm.append(F)
-        self.Fm = np.array(self.Fm)
+        x = self.X
+        if Kv == 1 or Kv == 0:
+            e = np.array(self.E)[self.ie, None] / self.L
+            F = (1.0 + x ** 2 + (e * (1.0 - x)) ** 2 / (1.0 + e * (1.0 - x))) / (1.0 + e * (1.0 - x)) ** 2
+        else:
+            F = 1.0 + x ** 2
+        self.Fm = F
         return self.Fm
 
     def Factor_Rv(self, Kv):
         """
-
+            функция рассеяния (Kv=1) или квадрат форм-фактора (Kv=2)
+            для блока энергий (таблица nE x nX)
         """
-        xZero_ = -24
-        if Kv == 1:
-            z = 'riv'
-        elif Kv == 2:
-            z = 'rcv'
-        self.Rv = []
-        xF = []
+        if Kv not in self.xQ:
+            self.xQ[Kv] = self.Factor_Q(Kv)
+        q, Qx = self.xQ[Kv]
+
+        # сетка q общая для всех энергий
+        Rx = np.interp(self.q, q, Qx)[:, ::-1]
+        if Kv == 2:
+            Rx = np.power(Rx, Kv)
+        self.Rv = Rx
+        return self.Rv
+
+    ## Функция рассеяния (Kv=1) или форм-фактор (Kv=2) на общей сетке q
+    def Factor_Q(self, Kv):
         mt = 504 if Kv == 1 else 502
         d = self.get_endf(27, mt)
         q_e = np.array(d[0])
         R_e = np.array(d[1])  # /self.Z
-        ##        Qx=xox.xxInterp1((q_e),(R_e),(self.q))
         qmin = np.floor(np.log10(q_e[1]))
         qmax = 9.0
 
-
         q = np.logspace(qmin, 9, int(10 * (qmax - qmin) + 1))
 
         q = np.insert(q, 0, 0.0)
@@ -303,136 +306,38 @@ class photon(ken.Kendf):
             Qx = np.insert(Qx, 0, 0.0)
         else:
             Qx = np.insert(Qx, 0, self.Z)
-        xx_ = np.array(self.X)
-        ##        if xGraf:
-        ##            kFig=Kv
-        ##            self.fig=plt.figure(kFig,figsize=(12,10))
-        ##            cx=self.fig.add_subplot(421)
-        ##            cx.loglog(R_e,q_e,'b-o',Qx,q,'r-+')
-        ##            cx.set_xlabel('FR')
-        ####            cx.xaxis.set_ticks([0+0.1*t for t in range(11)])
-        ##            cx.set_ylabel('q')
-        ##            cx.grid(True)
-
-        ##        if xGraf:
-        ##            ax=self.fig.add_subplot(422)
-        ##            ax.set_xlabel(r'$cos(\theta)$')
-        ##            ax.set_ylabel('q')
-        ##            ax.grid(True)
-        ##
-        ##            bx=self.fig.add_subplot(424)
-        ##            bx.set_xlabel(r'$cos(\theta)$')
-        ##            bx.set_ylabel('FR')
-        ##            bx.grid(True)
-
-        for ie, e in enumerate(self.E):
-            ##            F=[e*c/self.L for c in self.q]
-            ##            vv_=qar(e,self.nX)
-            Rx = np.interp((self.q[ie]), (q[:]), (Qx[:]))
-
-            Rx = Rx[::-1]
-            ##            if xGraf:
-            ##                ax.semilogy(self.X[ie],self.q[ie][::-1],'-')
-            ##
-            ##                bx.semilogy(self.X[ie],Rx,'-')
-
-            if Kv == 2:
-                Rx = np.power(Rx, Kv)
-            ##            print(len(Rx))
-            self.Rv.append((Rx))
-        ##            xF.append(F)
-        s = '# output: distribution for Kv=' + str(Kv)
-        ##        self.xWrite_3D(self.El_NameFile_Out[z],self.Rv,s)
-        return self.Rv
+        return q, Qx
 
     def xxDistrb(self, f, r, Kv):
         """
             f-form-factor(Kv=2),function of scattering(Kv=1)
             r-Kline-Nishina(Kv=1), Tomson(Kv=2)
+            f, r - таблицы nE x nX или набор таблиц (k x nE x nX),
+            например, для неупругого и упругого рассеяния сразу
         """
-        R = []
-        Rv = []
-        fM = []
-        dM = []
-        fF = []
-
-        ##        if xGraf:
-        ##            print('show grafics')
-        ##            dx=self.fig.add_subplot(426)
-        ##            dx.set_xlabel(r'$cos(\theta)$')
-        ##            if Kv == 1:
-        ##                dx.set_ylabel('KlNi')
-        ##            elif Kv == 2:
-        ##                dx.set_ylabel('Tomson')
-        ##            dx.grid(True)
-        ##            gx=self.fig.add_subplot(428)
-        ##            gx.set_xlabel(r'$cos(\theta)$')
-        ##            gx.set_ylabel('distr')
-        ##            gx.grid(True)
-
-        for k in range(self.nE):
-
-            if Kv == 1 or Kv == 0:
-                z = 'iv'
-                zd = 'div'
-                F = f[k, :] * r[k, :]
-                fF.append(F / np.max(F))
-            ##                F=1*r[k,:]
-
-            else:
-                z = 'cv'
-                zd = 'dcv'
-                F = f[k, :] * r[k, :]
-            ##            if xGraf:
-            ##                dx.semilogy(self.X[k],r[k,:],'-')
-            ##                gx.semilogy(self.X[k],F,'-')
-
-            sF = xox.xxCumTrapz(self.X[k], F)
-            # plt.semilogy(self.X,f[k,:],'r-+',self.X,r[k,:],'b-*' ,self.X,F,'k-o')
-            ##                plt.plot((self.X),np.transpose(fF))
-            SS = sF[-1]
-            cP = [c / SS for c in sF]
-            ##            fM.append(xox.xxTrapz(self.G,D))
-            D = np.interp(self.G, cP, self.X[k])
-            fM.append(xox.xxTrapz(self.G, D))
-            ##            dM.append(1-xox.xxTrapz(self.X[k],cP))
-            R.append(D)
-            Rv.append(cP)
-        # self.R=xox.xxTrans(R)
-        ##        c
-        ##        plt.plot(self.X,np.transpose(Rv)) # plt.plot(np.transpose(self.X),np.transpose(Rv),'-+')
-        self.R = R
-        self.Rv = Rv
-        ##        plt.plot((self.X),np.transpose(fF))
-        s = '# output: distribution for Kv=' + str(Kv)
-        ##        self.xWrite_3D(self.El_NameFile_Out[zd],self.Rv,s)
-        s = '# output: table(gamma) for Kv=' + str(Kv)
-        ##        self.xWrite_3D(self.El_NameFile_Out[z],self.R,s)
-        self.Rv = np.array(self.Rv)
+        F = f * r
+        sF = xn.cumtrapz(self.X, F)
+        cP = sF / sF[..., -1:]
+        # таблицы для розыгрыша (обращение функции распределения)
+        # строятся в main по смеси элементов композита
+        self.Rv = cP
         return self.Rv
 
     def xWrite_3D(self, NameFl, d, sss, acca='full'):
         """ write 3D data"""
-        nCol = len(d)
-        nRow = len(d[0])
-        with open(NameFl, 'w') as Out:
-            # write heap
-            Out.write('{0} \n'.format(xox.xT['f1']))
-            Out.write((xox.xT['f1'] + '\n') % (nRow, nCol, 2, 8))
-            Out.write('{0} \n'.format(xox.xT['s1']))
-            Out.write('%s \n' % (xox.xT['fE']))
-            Out.write((xox.xT['fE'] + '\n') % (self.Emin, self.Emax, self.nE, 5))
-            Out.write('{0} \n'.format(xox.xT['sE']))
-            Out.write('{0} \n'.format(xox.xT['sDB']))
-            Out.write('{0} \n'.format(sss))
-            Out.write('{0}(%+19.15f )\n'.format(nCol))
-            Out.write('{0} \n'.format(xox.xT['sDE']))
-            for k in range(nRow):
-                sf = '';  # str();
-                for i in range(nCol):
-                    sf += '%+19.15E ' % (d[i][k])
-                sf += '\n';
-                Out.write(sf);
+        if isinstance(d, xox.FileTable):
+            # таблица на диске, уже транспонированная (nRow x nCol)
+            nRow, nCol = d.shape
+        else:
+            nCol = len(d)
+            nRow = len(d[0])
+            if isinstance(d, np.ndarray):
+                d = d[:, :nRow].transpose()
+            else:
+                d = np.array([c[:nRow] for c in d], dtype=float).transpose()
+        hh = xox.xHeadKiam((nRow, nCol, 2, 8), (self.Emin, self.Emax, self.nE, 5), sss,
+                           '{0}(%+19.15f )\n'.format(nCol))
+        xox.xWriteKiam(NameFl, hh, d, '%+19.15E ')
 
     def xWrite_DE(self, nameFL, e, d, sss, acca='full'):
         """ write 2D data"""
@@ -440,62 +345,150 @@ class photon(ken.Kendf):
         d.insert(0, e)
         ln = len(d)
         le = len(e)
-        with open(nameFL, 'w') as Out:
-            # write heap
-
-            Out.write('{0} \n'.format(xox.xT['f1']))
-            Out.write((xox.xT['f1'] + '\n') % (le, ln, 2, nc + 9))
-            Out.write('{0} \n'.format(xox.xT['s1']))
-            Out.write('%s \n' % (xox.xT['fE']))
-            Out.write((xox.xT['fE'] + '\n') % (e[0], e[-1], le, nc + 6))
-            Out.write('{0} \n'.format(xox.xT['sE']))
-            Out.write('{0} \n'.format(xox.xT['sDB']))
-            Out.write('{0} \n'.format(sss))
-            Out.write('{0}(%%+19.15f )\n'.format(ln))
-            Out.write('{0} \n'.format(xox.xT['sDE']))
-
-            # write data
-            for k in range(le):
-                sf = ''
-                for i in range(ln):
-                    sf += '%+19.15f ' % (d[i][k])
-                sf += '\n'
-                Out.write(sf)
+        hh = xox.xHeadKiam((le, ln, 2, nc + 9), (e[0], e[-1], le, nc + 6), sss,
+                           '{0}(%%+19.15f )\n'.format(ln))
+        xox.xWriteKiam(nameFL, hh, np.array([c[:le] for c in d], dtype=float).transpose())
 
     def xWrite_DE_1(self, nameFL, e, d, sss, acca='full'):
         """ write 1D data"""
         nc = sss.count('\n') - 1
-        ##        d.insert(0,e)
-        ##        d=[e,d]
-        ##        d=np.array(d)
         ln = 2
         le = len(e)
-        with open(nameFL, 'w') as Out:
-            # write heap
-
-            Out.write('{0} \n'.format(xox.xT['f1']))
-            Out.write((xox.xT['f1'] + '\n') % (le, ln, 2, nc + 9))
-            Out.write('{0} \n'.format(xox.xT['s1']))
-            Out.write('%s \n' % (xox.xT['fE']))
-            Out.write((xox.xT['fE'] + '\n') % (e[0], e[-1], le, nc + 6))
-            Out.write('{0} \n'.format(xox.xT['sE']))
-            Out.write('{0} \n'.format(xox.xT['sDB']))
-            Out.write('{0} \n'.format(sss))
-            Out.write('{0}(%+15.11e )\n'.format(ln))
-            Out.write('{0} \n'.format(xox.xT['sDE']))
-
-            # write data
-            for k, dv in enumerate(d):
-                sf = '%+19.15f %+15.11e\n' % (e[k], dv)
-                Out.write(sf)
+        hh = xox.xHeadKiam((le, ln, 2, nc + 9), (e[0], e[-1], le, nc + 6), sss,
+                           '{0}(%+15.11e )\n'.format(ln))
+        xox.xWriteKiam(nameFL, hh, np.column_stack((e[:len(d)], d)), ['%+19.15f ', '%+15.11e'])
+
+
+## Результаты расчёта распределений для одного элемента.
+# Объект хранит сеточные параметры класса photon (без данных ENDF),
+# поэтому для него доступны функции записи таблиц xWrite_*.
+# Таблицы nE x nX не хранятся: хранятся функция рассеяния и форм-фактор
+# на сетке q (Factor_Q), таблицы для блока энергий строятся по ним (tables).
+# Объект передаётся между процессами при параллельном расчёте
+class ElementData(photon):
+    """
+    """
+
+    xAttr = ('Z', 'A', 'Ro', 'Name', 'Emin', 'Emax', 'nE', 'E_log', 'E', 'G', 'nX')
+    xData = ('Sig', 'eb_', 'q1', 'Qx1', 'q2', 'Qx2')
+
+    def __init__(self, Elem, Eph_, gm_para):
+        import para_photon as para
+
+
+        self.Sig = Elem.xox_23()
+
+        if len(Eph_) > 0:
+            # para produced
+            para_ = para.Paraep()
+            self.x_, self.pdf_, tbl_, Eave_ = para_.calc_table(Elem.Z, Eph_, gm_para, kLog=1)
+
+        self.eb_ = Elem.getEb4E()
+
+        # неупругое (Kv=1) и упругое (Kv=2) рассеяние
+        self.q1, self.Qx1 = Elem.Factor_Q(1)
+        self.q2, self.Qx2 = Elem.Factor_Q(2)
+        for nm_ in self.xAttr:
+            setattr(self, nm_, getattr(Elem, nm_))
+        self.set_q()
+
+    ## Сохранённые таблицы Factor_Q для Factor_Rv
+    def set_q(self):
+        self.xQ = {1: (self.q1, self.Qx1), 2: (self.q2, self.Qx2)}
+
+    ## Запись результатов в хранилище рассчитанных элементов
+    def save(self, nfl):
+        nm_ = self.xData + self.xAttr
+        if hasattr(self, 'x_'):
+            nm_ += ('x_', 'pdf_')
+        return xxc.save_attrs(nfl, self, nm_)
+
+    ## Считывание результатов из хранилища, None - если их там нет
+    @classmethod
+    def load(cls, nfl):
+        Elem = cls.__new__(cls)
+        if not xxc.load_attrs(nfl, Elem):
+            return None
+        for nm_ in cls.xData + cls.xAttr:
+            if not hasattr(Elem, nm_):
+                return None
+        Elem.set_q()
+        return Elem
+
+
+## Сетки по энергии фотона и по гамме для распределения позитронов при рождении пар
+def para_grid(xin):
+    """
+    """
+    Eph_ = np.logspace(xin['Emin'], xin['Emax'], xin['nE'])
+    gm_para = np.logspace(-12, 0., xin['nG_para'] - 1)
+    gm_para = np.insert(gm_para, 0, 0.0)
+    iEph_ = Eph_ > 2 * phis.E0
+    return Eph_, iEph_, gm_para
+
+
+## Параметры xin, от которых зависят результаты расчёта для элемента
+xKey = ('Z', 'Emin', 'Emax', 'nE', 'nG', 'nX', 'nG_para')
+
+## Версия алгоритма расчёта. Увеличивается при изменении результатов расчёта
+xVersion = 2
+
+## Модули, от которых зависят результаты расчёта для элемента (входят в ключ)
+xCode = ('xtb_photon', 'para_photon', 'interface', 'endf', 'xxfun', 'xxnum', 'phisconst')
+
+## Рассчитанные элементы (общие для всех композитов)
+xMemo = xxc.Memo(32)
+
+
+## Ключ результатов расчёта для элемента: сетки, версия кода
+#  и контрольная сумма исходных данных
+def element_key(xin):
+    """
+    """
+    nfile_ = 'photoat-%03i_%s_000.endf' % (xin['Z'], xin['Name'])
+    return (('photon', xVersion, xxc.code_hash(*xCode)) + tuple(xin[c] for c in xKey) +
+            ken.endf_checksum(nfile_))
+
+
+## Файл хранилища рассчитанных элементов для ключа ky_ ('' - хранилище недоступно)
+def element_file(xin, ky_):
+    """
+    """
+    dr_ = xxc.cache_dir('photon')
+    if len(dr_) == 0:
+        return ''
+    return os.path.join(dr_, '%s-%s.npz' % (xin['Name'], xxc.cache_key(*ky_)))
+
+
+## Расчёт распределений для одного элемента
+#  xin - параметры элемента и сеток (Init.def_element).
+#  Если элемент с теми же сетками и исходными данными уже рассчитывался,
+#  готовые данные берутся из памяти или из хранилища на диске (photon.xxCalc)
+def calc_element(xin):
+    """
+    """
+    ky_ = element_key(xin)
+    Elem = xMemo.get(ky_)
+    if Elem is not None:
+        return Elem
+    nfl_ = element_file(xin, ky_) if photon.xxCalc else ''
+    if len(nfl_) > 0:
+        Elem = ElementData.load(nfl_)
+    if Elem is None:
+        Eph_, iEph_, gm_para = para_grid(xin)
+        Elem = ElementData(photon(xin), Eph_[iEph_], gm_para)
+        if len(nfl_) > 0:
+            Elem.save(nfl_)
+    return xMemo.put(ky_, Elem)
 
 
 ## Программа для расчета таблиц фотонных распределений для композитов
 #
-def main(xI, Mt, matFile, path):
+def main(xI, Mt, matFile, path, xdata=None):
     """
+    xdata - уже рассчитанные данные элементов композита (calc_element),
+            если не заданы, то рассчитываются здесь
     """
-    import para_photon as para
     print((os.getcwd()))
     ##    path,nmFile = os.path.split(matFile)
     ##    path = os.getcwd()
@@ -510,8 +503,10 @@ def main(xI, Mt, matFile, path):
     nG_para = xI.xin['nG_para']
 
     d_sig = np.zeros((nE, 5))
-    d_rv1 = np.zeros((nE, nX))  # incoherent
-    d_rv2 = np.zeros((nE, nX))  # coherent
+    # таблицы nE x nX обрабатываются по блокам энергий (ph_block),
+    # смесь элементов накапливается в float32 (ph_float32)
+    blocks_ = xn.row_blocks(nE, xI.xin['ph_block'])
+    dtype_ = np.float32 if xI.xin['ph_float32'] else np.float64
 
     d_eb = np.zeros((nE,))
     #        matFile=os.path.join(path,nfile)
@@ -522,48 +517,31 @@ def main(xI, Mt, matFile, path):
     FileOut = os.path.join(DirOut, NmFile) + '.'
     spisok = Mt.Mat
     S = 0
-    Emin = xI.xin['Emin']
-    Emax = xI.xin['Emax'];
-    nE = xI.xin['nE']
-    #        self.nE=xin['En']
-    Eph_ = np.logspace(Emin, Emax, nE);
-
-    gm_para = np.logspace(-12, 0., nG_para - 1)
-    gm_para = np.insert(gm_para, 0, 0.0)
-    iEph_ = Eph_ > 2 * phis.E0
+    Eph_, iEph_, gm_para = para_grid(xI.xin)
     Eph_ = Eph_[iEph_]
     nP = len(Eph_)
     iPara_ = False
     if nP > 0:
         iPara_ = True
     #        d_para=np.zeros((nE,nP)) #para produced
+    xdata_ = []
     for i, k in enumerate(spisok):
         #            p=Mt.Mat[k]
         name = k[0]
         p = k[1]
 
-        xB = xI.def_element(name)
-        #        Elem=xPh.photon(xB)
-        Elem = photon(xB)
-
-        r1 = Elem.xxFactor(1)
-        r2 = Elem.xxFactor(2)
+        if xdata is None:
+            xB = xI.def_element(name)
+            Elem = calc_element(xB)
+        else:
+            Elem = xdata[i]
 
-        Sig = Elem.xox_23()
+        Sig = Elem.Sig
         d_sig += p * Sig
 
-        sig_rv1 = Sig[:, 2]
-        sig_rv1 = np.tile(sig_rv1, (nX, 1))
-        sig_rv1 = sig_rv1.transpose()
-
-        sig_rv2 = Sig[:, 1]
-        sig_rv2 = np.tile(sig_rv2, (nX, 1))
-        sig_rv2 = sig_rv2.transpose()
-
         if iPara_:
             # para produced
-            para_ = para.Paraep()
-            x_, pdf_, tbl_, Eave_ = para_.calc_table(Elem.Z, Eph_, gm_para, kLog=1)
+            x_, pdf_ = Elem.x_, Elem.pdf_
             if i == 0:
                 d_para = np.zeros(pdf_.shape)  # para produced
 
@@ -575,32 +553,14 @@ def main(xI, Mt, matFile, path):
 
         sig_photo = Sig[:, 4]
 
-        eb_ = Elem.getEb4E()
+        eb_ = Elem.eb_
         d_eb += p * eb_ * sig_photo
-
-        d1 = Elem.Factor_Rv(1)
-        d1 = np.array(d1)
-        t1 = Elem.xxDistrb(d1, r1, 1)
-        d_rv1 += p * sig_rv1 * t1
-
-        d2 = Elem.Factor_Rv(2)
-        d2 = np.array(d2)
-        t2 = Elem.xxDistrb(d2, r2, 2)
-        d_rv2 += p * sig_rv2 * t2
+        xdata_.append(Elem)
         print(name)
     # -------------------------------------------------------------------------------
 
     e = Elem.E_log
-    X = np.array(Elem.X)
     G = np.array(Elem.G)
-    sig_coh = d_sig[:, 1]
-    sig_coh = np.tile(d_sig[:, 1], (nX, 1))
-    sig_coh = sig_coh.transpose()
-    sig_inc = d_sig[:, 2]
-    sig_inc = np.tile(d_sig[:, 2], (nX, 1))
-    sig_inc = sig_inc.transpose()
-    d_rv1 /= sig_inc
-    d_rv2 /= sig_coh
     if iPara_:
         sum_sig_para = d_sig[iEph_, 3]
         sum_sig_para = np.tile(sum_sig_para, (nG_para, 1))
@@ -610,19 +570,50 @@ def main(xI, Mt, matFile, path):
     Sig_Out = list(np.log10(d_sig.transpose()))
     Elem.xWrite_23(FileOut + '23', Sig_Out, Density=Mt.Ro)
 
-    D1 = xox.xxGeTablePhoton((d_rv1), X, G)
-    s = '# output: distribution cos(tet) for Incoherent scattering (Klein-Nishina)'
-    Elem.xWrite_3D(FileOut + 'iv', list(D1), s)
+    # таблицы iv, ive, cv (3 x nE x nG). При расчёте по блокам энергий
+    # блоки записываются во временный файл (не отображаемый в память),
+    # при записи таблиц он считывается по частям (xox.FileTable)
+    nG_ = len(G)
+    if len(blocks_) > 1:
+        ftmp_ = tempfile.TemporaryFile(dir=DirOut)
+    else:
+        ftmp_ = None
+        D_ = np.empty((3, nE, nG_))
+    for ie in blocks_:
+        # функции распределения, взвешенные сечениями (неупругое, упругое)
+        X = Elem.grid(ie)[1]
+        d_rv1 = np.zeros(X.shape, dtype_)  # incoherent
+        d_rv2 = np.zeros(X.shape, dtype_)  # coherent
+        for k, El_ in zip(spisok, xdata_):
+            t1_, t2_ = El_.tables(ie).astype(dtype_, copy=False)
+            d_rv1 += k[1] * El_.Sig[ie, 2:3] * t1_
+            d_rv2 += k[1] * El_.Sig[ie, 1:2] * t2_
+        d_rv1 /= d_sig[ie, 2:3]
+        d_rv2 /= d_sig[ie, 1:2]
+        # таблицы iv, ive, cv - одним вызовом для набора строк (3 x блок энергий)
+        me_ = np.array(Elem.E)[ie, None]
+        xx_ = me_ / (1 + me_ * (1 - X) / phis.E0)
+        dd_ = xn.inverse_cdf(np.concatenate((d_rv1, d_rv1, d_rv2)),
+                             np.concatenate((X, xx_, X)), G).reshape(3, len(X), -1)
+        if ftmp_ is None:
+            D_[:, ie] = dd_
+        else:
+            for j in range(3):
+                ftmp_.seek((j * nE + ie.start) * nG_ * 8)
+                ftmp_.write(np.ascontiguousarray(dd_[j], dtype=float).tobytes())
+    if ftmp_ is not None:
+        ftmp_.flush()
+        D_ = [xox.FileTable(ftmp_, nG_, nE, j * nE * nG_ * 8) for j in range(3)]
 
-    me_ = np.transpose(np.tile(Elem.E, (len(Elem.G), 1)))
-    xx_ = me_ / (1 + me_ * (1 - X) / phis.E0)
-    DE = xox.xxGeTablePhoton((d_rv1), xx_, G)
+    s = '# output: distribution cos(tet) for Incoherent scattering (Klein-Nishina)'
+    Elem.xWrite_3D(FileOut + 'iv', D_[0], s)
     s = '# output: distribution Energy (eV) for Incoherent scattering (Klein-Nishina)'
-    Elem.xWrite_3D(FileOut + 'ive', list(DE), s)
-
-    D2 = xox.xxGeTablePhoton((d_rv2), X, G)
+    Elem.xWrite_3D(FileOut + 'ive', D_[1], s)
     s = '# output: distribution cos(tet) for Coherent Scattering (Thomson expression)'
-    Elem.xWrite_3D(FileOut + 'cv', list(D2), s)
+    Elem.xWrite_3D(FileOut + 'cv', D_[2], s)
+    del D_
+    if ftmp_ is not None:
+        ftmp_.close()
 
     d_eb /= d_sig[:, 4]
     s = """\
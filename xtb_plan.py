@@ -0,0 +1,130 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+## @package xtb_plan
+# Данный модуль определяет, какие таблицы композитов нужно пересчитать:
+#   - для композита и вида частиц (фотоны, электроны) вычисляется отпечаток
+#     входных данных: файл композита (.mrat), состав и плотность композита
+#     (плотность берётся из файла слоёв), параметры сеток (Init.xin),
+#     ключи элементов (контрольные суммы ENDF-файлов и данных ионов) и версия программы;
+#   - отпечаток и список записанных таблиц (размер, время изменения) хранятся
+#     в манифесте каталога композита mat-<композит> (xtb_manifest.txt);
+#   - таблицы пересчитываются, если отпечаток изменился или файлы в каталоге
+#     таблиц отличаются от записанных в манифест
+
+import os
+import hashlib
+
+import xxcache as xxc
+import xxfun as xox
+import xtb_electron as xel
+import xtb_photon as xph
+
+## Имя файла манифеста в каталоге композита
+xManifest = 'xtb_manifest.txt'
+
+## Версия отпечатка. Увеличивается при изменении состава отпечатка
+xVersion = 1
+
+## Параметры Init.xin, не влияющие на таблицы композита: данные текущего
+#  элемента и разбиение фотонных таблиц на блоки (результат тот же)
+xSkip = ('Z', 'Ro', 'A', 'Name', 'elem_dir_IN', 'elem_dir_OUT', 'ph_block')
+
+## Модули, от которых зависят таблицы (версия программы - хеш их текста)
+xCode = ('interface', 'xtb_photon', 'xtb_electron', 'para_photon', 'xxfun', 'xxnum',
+         'endf', 'ion_pkl', 'phisconst')
+
+
+## Версия программы: хеш текста модулей xCode (xxcache.code_hash)
+def code_version():
+    """
+    """
+    return xxc.code_hash(*xCode)
+
+
+## Отпечаток входных данных таблиц вида kind ('photon', 'electron') для композита mt
+#  (словарь Interface.Object: Composite, Density, Element, Shell) из файла matFile
+def fingerprint(xI, kind, mt, matFile):
+    """
+    """
+    hh_ = hashlib.sha1()
+    hh_.update(repr((xVersion, kind, code_version())).encode('utf-8'))
+    with open(matFile, 'rb') as ff:
+        hh_.update(ff.read())
+    hh_.update(repr((mt['Composite'], mt['Density'], mt['Element'], mt['Shell'])).encode('utf-8'))
+    hh_.update(repr(sorted((ky, vv) for ky, vv in xI.xin.items() if ky not in xSkip)).encode('utf-8'))
+    for el in mt['Element']:
+        xin_ = xI.def_element(el[0])
+        if kind == 'photon':
+            ky_ = xph.element_key(xin_)
+        else:
+            ky_ = xel.element_key(xin_, el[2])
+        hh_.update(repr(ky_).encode('utf-8'))
+    return hh_.hexdigest()
+
+
+## Файлы каталога dr: {имя: (размер, время изменения в нс)}.
+#  Двоичные копии таблиц (создаются при чтении, xxfun.read_kiam) не учитываются
+def dir_stamp(dr):
+    """
+    """
+    dd_ = {}
+    if not os.path.isdir(dr):
+        return dd_
+    for nm_ in os.listdir(dr):
+        if nm_.endswith(xox.xBinExt):
+            continue
+        st_ = os.stat(os.path.join(dr, nm_))
+        dd_[nm_] = (st_.st_size, st_.st_mtime_ns)
+    return dd_
+
+
+## Манифест каталога композита dir_: для каждого вида таблиц - отпечаток
+#  входных данных и файлы, записанные по этим данным
+class Plan:
+    """
+    """
+
+    def __init__(self, dir_):
+        self.dir = dir_
+        self.fl = os.path.join(dir_, xManifest)
+        self.rec = {}
+        try:
+            with open(self.fl, 'r', encoding='utf-8') as ff:
+                for ss_ in ff:
+                    ll_ = ss_.rstrip('\n').split('\t')
+                    if len(ll_) == 2:
+                        self.rec[ll_[0]] = (ll_[1], {})
+                    elif len(ll_) == 3 and ll_[0] in self.rec:
+                        self.rec[ll_[0]][1][ll_[1]] = tuple(map(int, ll_[2].split()))
+        except (OSError, ValueError):
+            self.rec = {}
+
+    ## Таблицы kind уже построены по данным с отпечатком fp и не изменялись
+    def fresh(self, kind, fp):
+        rec_ = self.rec.get(kind)
+        if rec_ is None or rec_[0] != fp or len(rec_[1]) == 0:
+            return False
+        return rec_[1] == dir_stamp(os.path.join(self.dir, kind))
+
+    ## Таблицы kind построены по данным с отпечатком fp
+    def done(self, kind, fp):
+        self.rec[kind] = (fp, dir_stamp(os.path.join(self.dir, kind)))
+        self.save()
+
+    ## Запись манифеста через временный файл (как xxcache.save_arrays)
+    def save(self):
+        ss_ = []
+        for kind, (fp, ff_) in sorted(self.rec.items()):
+            ss_.append('{0}\t{1}\n'.format(kind, fp))
+            for nm_, (sz_, tm_) in sorted(ff_.items()):
+                ss_.append('{0}\t{1}\t{2} {3}\n'.format(kind, nm_, sz_, tm_))
+        tmp_ = self.fl + '.tmp'
+        try:
+            os.makedirs(self.dir, exist_ok=True)
+            with open(tmp_, 'w', encoding='utf-8') as ff:
+                ff.write(''.join(ss_))
+            os.replace(tmp_, self.fl)
+        except OSError:
+            if os.path.exists(tmp_):
+                os.remove(tmp_)
+            print('Не удалось записать манифест %s' % self.fl)
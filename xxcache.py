@@ -0,0 +1,206 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+## @package xxcache
+# Данный модуль предназначен для хранения промежуточных данных на диске
+#   - определяет каталог кэша
+#   - вычисляет ключ записи по набору параметров и версию кода (хеш модулей)
+#   - записывает и считывает наборы массивов (формат npz)
+#   - записывает и считывает атрибуты объектов (числа, строки, списки, словари строк)
+#   - хранит в памяти ограниченное число последних результатов (Memo)
+
+import os
+import hashlib
+import tempfile
+import zipfile as z
+from collections import OrderedDict
+
+import numpy as np
+
+## Версия формата записей кэша. Увеличивается при изменении структуры данных
+CACHE_VERSION = 2
+
+## Корневой каталог кэша по умолчанию - каталог пользователя:
+# Windows - %LOCALAPPDATA%\xtb\cache, иначе $XDG_CACHE_HOME/xtb (~/.cache/xtb).
+# Каталог программы не используется: у установленной программы он обычно
+# закрыт для записи, у собранной в один файл - временный
+def default_root():
+    """
+    """
+    if os.name == 'nt':
+        bs_ = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), 'AppData', 'Local')
+        return os.path.join(bs_, 'xtb', 'cache')
+    bs_ = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(bs_, 'xtb')
+
+
+## Корневой каталог кэша
+CACHE_ROOT = default_root()
+
+## Каталоги кэша, которые не удалось создать (сообщение выводится один раз)
+xNoDir = set()
+
+
+## Задать корневой каталог кэша: параметр cache (param.golb), '' - каталог по умолчанию
+def set_cache_root(path=''):
+    """
+    """
+    global CACHE_ROOT
+    CACHE_ROOT = os.path.abspath(path) if path else default_root()
+    return CACHE_ROOT
+
+
+## Возвращает каталог кэша для заданного раздела, при необходимости создаёт его.
+# Если каталог создать нельзя (например, нет прав на запись), возвращает пустую строку
+def cache_dir(*names):
+    """
+    каталог кэша для раздела names
+    """
+    dr_ = os.path.join(CACHE_ROOT, *names)
+    try:
+        os.makedirs(dr_, exist_ok=True)
+    except OSError:
+        if CACHE_ROOT not in xNoDir:
+            xNoDir.add(CACHE_ROOT)
+            print('Каталог кэша %s недоступен, промежуточные данные не сохраняются' % CACHE_ROOT)
+        return ''
+    return dr_
+
+
+## Ключ записи кэша - sha1 от строкового представления параметров
+def cache_key(*parts):
+    """
+    ключ записи по набору параметров
+    """
+    ss_ = repr((CACHE_VERSION,) + parts)
+    return hashlib.sha1(ss_.encode('utf-8')).hexdigest()
+
+
+## Версия программы. Увеличивается с каждым выпуском программы: в собранной
+# программе исходных текстов модулей нет, и версия кода - это версия программы
+PROGRAM_VERSION = '1.0'
+
+## Хеши текста модулей программы (code_hash)
+xCodeHash = {}
+
+
+## Версия кода для ключей кэша - sha1 от текста модулей names (каталог программы).
+# Результаты, рассчитанные другой версией этих модулей, в кэше не находятся.
+# Если исходных текстов нет, версия кода определяется версией программы PROGRAM_VERSION
+def code_hash(*names):
+    """
+    """
+    if names not in xCodeHash:
+        hh_ = hashlib.sha1(repr((PROGRAM_VERSION,) + names).encode('utf-8'))
+        dr_ = os.path.dirname(os.path.abspath(__file__))
+        try:
+            for nm_ in names:
+                with open(os.path.join(dr_, nm_ + '.py'), 'rb') as ff:
+                    hh_.update(ff.read())
+        except OSError:
+            print('Исходные тексты модулей не найдены, версия кода для кэша - '
+                  'версия программы %s' % PROGRAM_VERSION)
+            hh_ = hashlib.sha1(repr((PROGRAM_VERSION,) + names).encode('utf-8'))
+        xCodeHash[names] = hh_.hexdigest()
+    return xCodeHash[names]
+
+
+## Атомарная запись набора массивов:
+# данные пишутся во временный файл того же каталога и переименовываются,
+# поэтому параллельно работающие программы не увидят недописанный файл
+def save_arrays(nfl, **arrays):
+    """
+    записать массивы в файл nfl (npz)
+    """
+    dr_ = os.path.dirname(nfl)
+    try:
+        fd_, tmp_ = tempfile.mkstemp(prefix='.tmp', suffix='.npz', dir=dr_)
+    except OSError:
+        return False
+    try:
+        with os.fdopen(fd_, 'wb') as ff:
+            np.savez(ff, **arrays)
+        os.replace(tmp_, nfl)
+    except OSError:
+        if os.path.exists(tmp_):
+            os.remove(tmp_)
+        return False
+    return True
+
+
+## Считывание набора массивов. При отсутствии или порче файла возвращает None
+def load_arrays(nfl):
+    """
+    считать массивы из файла nfl (npz)
+    """
+    if not os.path.isfile(nfl):
+        return None
+    try:
+        with np.load(nfl, allow_pickle=False) as dd_:
+            return {ky: dd_[ky] for ky in dd_.files}
+    except (OSError, ValueError, KeyError, EOFError, z.BadZipFile):
+        return None
+
+
+## Запись атрибутов names объекта obj в файл nfl (npz).
+# Списки и словари помечаются суффиксом имени, чтобы при чтении восстановить их тип
+def save_attrs(nfl, obj, names):
+    """
+    """
+    dd_ = {}
+    for nm_ in names:
+        vv_ = getattr(obj, nm_)
+        if isinstance(vv_, dict):
+            dd_[nm_ + '__keys'] = np.array(list(vv_.keys()))
+            dd_[nm_ + '__values'] = np.array(list(vv_.values()))
+        elif isinstance(vv_, list):
+            dd_[nm_ + '__list'] = np.array(vv_)
+        else:
+            dd_[nm_] = np.asarray(vv_)
+    return save_arrays(nfl, **dd_)
+
+
+## Считывание атрибутов объекта obj из файла nfl (save_attrs).
+# Возвращает False, если файла нет или он испорчен
+def load_attrs(nfl, obj):
+    """
+    """
+    dd_ = load_arrays(nfl)
+    if dd_ is None:
+        return False
+    for ky, vv_ in dd_.items():
+        if ky.endswith('__keys'):
+            nm_ = ky[:-6]
+            if nm_ + '__values' not in dd_:
+                return False
+            setattr(obj, nm_, dict(zip(vv_.tolist(), dd_[nm_ + '__values'].tolist())))
+        elif ky.endswith('__list'):
+            setattr(obj, ky[:-6], vv_.tolist() if vv_.ndim == 1 else list(vv_))
+        elif not ky.endswith('__values'):
+            setattr(obj, ky, vv_.item() if vv_.ndim == 0 else vv_)
+    return True
+
+
+## Хранение в памяти последних рассчитанных результатов.
+# При превышении maxsize удаляется запись, которая дольше всего не использовалась
+class Memo(OrderedDict):
+    """
+    """
+
+    def __init__(self, maxsize=16):
+        OrderedDict.__init__(self)
+        self.maxsize = maxsize
+
+    ## Результат по ключу key или None, если он не рассчитывался
+    def get(self, key, default=None):
+        if key not in self:
+            return default
+        self.move_to_end(key)
+        return self[key]
+
+    ## Сохранить результат val с ключом key
+    def put(self, key, val):
+        self[key] = val
+        self.move_to_end(key)
+        while len(self) > self.maxsize:
+            self.popitem(last=False)
+        return val
@@ -7,7 +7,11 @@
 import re
 import os,sys
 import math
+import tempfile
 import numpy as np
+
+import xxnum as xn
+import xxcache as xxc
 ##try:
 ##    import matplotlib.pyplot as plt
 ##    from mpl_toolkits.mplot3d.axes3d import Axes3D
@@ -30,6 +34,162 @@ xT={
         }
 
 
+## Размер буфера записи файлов таблиц (байт)
+xBuf = 1 << 20
+
+## Число чисел, форматируемых за одну операцию при записи таблиц
+xChunk = 1 << 16
+
+## Двоичная копия таблиц (файл nameFL + xBinExt рядом с текстовым файлом):
+#  первая строка - сигнатура, размер и время изменения текстового файла,
+#  далее заголовок таблицы (текст) и таблица в формате npy (float64),
+#  которая считывается через memmap без разбора текста.
+#  Копия создаётся при первом разборе текста (read_kiam).
+#  Если текстовый файл изменён после записи копии, копия не используется
+xBin = True
+xBinExt = '.kbin'
+xBinSign = 'KIAMBIN'
+xBinAlign = 64
+
+
+## Заголовок файла таблицы KIAM (список строк):
+#  v1 - (число строк, число столбцов, 2, число строк комментариев),
+#  vE - (lg Emin, lg Emax, число энергий, число строк комментариев),
+#  vInf - информация о веществе (Z, A, плотность, ...), vG - сетка по гамме,
+#  sss - описание данных, sfmt - строка формата данных (целиком, с '\n')
+def xHeadKiam(v1, vE, sss, sfmt, vInf=None, vG=None):
+    """
+    """
+    hh_ = ['{0} \n'.format(xT['f1']), (xT['f1'] + '\n') % v1, '{0} \n'.format(xT['s1']),
+           '%s \n' % (xT['fE']), (xT['fE'] + '\n') % vE, '{0} \n'.format(xT['sE'])]
+    if vInf is not None:
+        hh_ += ['{0} \n'.format(xT['fInf']), (xT['fInf'] + '\n') % vInf, '{0} \n'.format(xT['sInf'])]
+    if vG is not None:
+        hh_ += ['{0} \n'.format(xT['fG']), (xT['fG'] + '\n') % vG, '{0} \n'.format(xT['sG'])]
+    hh_ += ['{0} \n'.format(xT['sDB']), '{0} \n'.format(sss), sfmt, '{0} \n'.format(xT['sDE'])]
+    return hh_
+
+
+## Таблица nR x nC (float64), записанная в файл ff со смещением offset
+#  транспонированной (nC строк по nR чисел). Для xWriteKiam: блок строк
+#  считывается из файла по частям строк файла, поэтому в памяти процесса -
+#  только текущий блок (отображение файла в память подгружало бы соседние страницы)
+class FileTable:
+    """
+    """
+
+    def __init__(self, ff, nR, nC, offset=0):
+        self.ff = ff
+        self.shape = (nR, nC)
+        self.offset = offset
+
+    def __len__(self):
+        return self.shape[0]
+
+    ## Строки ii (срез с шагом 1)
+    def __getitem__(self, ii):
+        nR_, nC_ = self.shape
+        i0_, i1_, st_ = ii.indices(nR_)
+        bb_ = np.empty((nC_, max(i1_ - i0_, 0)))
+        for c in range(nC_):
+            self.ff.seek(self.offset + (c * nR_ + i0_) * 8)
+            self.ff.readinto(memoryview(bb_[c]).cast('B'))
+        return bb_.transpose()
+
+
+## Запись файла таблицы: заголовок head (список строк) и таблица d (nRow x nCol,
+#  массив или FileTable). Каждая строка таблицы - форматы fmt (один для всех
+#  столбцов или список по столбцам) и end. Числа форматируются блоками одной
+#  операцией, запись через большой буфер
+def xWriteKiam(nameFL, head, d, fmt='%+19.15f ', end='\n'):
+    """
+    """
+    if not isinstance(d, FileTable):
+        d = np.asarray(d, dtype=float)
+        if d.ndim == 1:
+            d = d.reshape(1, -1)
+    nR_, nC_ = d.shape
+    if isinstance(fmt, str):
+        fmt = [fmt] * nC_
+    fr_ = ''.join(fmt) + end
+    nb_ = max(1, xChunk // max(nC_, 1))
+    with open(nameFL, 'w', buffering=xBuf) as Out:
+        Out.write(''.join(head))
+        for k in range(0, nR_, nb_):
+            b_ = d[k:k + nb_]
+            Out.write((fr_ * len(b_)) % tuple(b_.ravel().tolist()))
+
+
+## Подпись текстового файла таблицы для проверки актуальности двоичной копии
+def kiam_stamp(nameFL):
+    """
+    """
+    st_ = os.stat(nameFL)
+    return '%s 1 %i %i' % (xBinSign, st_.st_size, st_.st_mtime_ns)
+
+
+## Запись двоичной копии таблицы d с заголовком head для файла nameFL.
+#  Копия пишется во временный файл и переименовывается (как xxcache.save_arrays),
+#  поэтому параллельно читающие программы не увидят недописанную копию
+def xWriteKiamBin(nameFL, head, d):
+    """
+    """
+    nfl_ = nameFL + xBinExt
+    try:
+        hh_ = (kiam_stamp(nameFL) + '\n' + ''.join(head)).encode('utf-8')
+        fd_, tmp_ = tempfile.mkstemp(prefix='.tmp', suffix=xBinExt,
+                                     dir=os.path.dirname(os.path.abspath(nfl_)))
+    except OSError:
+        return False
+    try:
+        with os.fdopen(fd_, 'wb') as Out:
+            Out.write(('%i\n' % len(hh_)).encode('ascii'))
+            Out.write(hh_)
+            Out.write(b'\0' * (-Out.tell() % xBinAlign))
+            np.lib.format.write_array(Out, np.ascontiguousarray(d, dtype=float))
+        os.chmod(tmp_, os.stat(nameFL).st_mode & 0o777)
+        os.replace(tmp_, nfl_)
+    except OSError:
+        if os.path.exists(tmp_):
+            os.remove(tmp_)
+        return False
+    return True
+
+
+## Считывание двоичной копии таблицы для файла nameFL (см. read_kiam_file).
+#  mmap - отобразить таблицу в память (файл остаётся открытым), иначе - прочитать.
+#  Если копии нет, она испорчена или устарела - None
+def read_kiam_bin(nameFL, mmap=False):
+    """
+    """
+    nfl_ = nameFL + xBinExt
+    try:
+        with open(nfl_, 'rb') as fIn:
+            nh_ = int(fIn.readline())
+            tt_ = fIn.read(nh_).decode('utf-8').splitlines(True)
+            if len(tt_) == 0 or tt_[0].rstrip('\n') != kiam_stamp(nameFL):
+                return None
+            fIn.seek(-fIn.tell() % xBinAlign, 1)
+            if not mmap:
+                d = np.lib.format.read_array(fIn, allow_pickle=False)
+            else:
+                vv_ = np.lib.format.read_magic(fIn)
+                if vv_ == (1, 0):
+                    sh_, fo_, dt_ = np.lib.format.read_array_header_1_0(fIn)
+                else:
+                    sh_, fo_, dt_ = np.lib.format.read_array_header_2_0(fIn)
+                d = np.memmap(nfl_, dtype=dt_, mode='c', offset=fIn.tell(), shape=sh_,
+                              order='F' if fo_ else 'C')
+    except (OSError, ValueError, UnicodeDecodeError):
+        return None
+    hh = []
+    for line in tt_[1:]:
+        if line.startswith('DATA'):
+            break
+        hh.append(line)
+    return np.asarray(d), hh
+
+
 def fixWindowsPath(cmdline):
     """
     change all / to \ in script filename path at front of cmdline;
@@ -84,37 +244,35 @@ def gavno2num(ss):
     num=num[::-1]
     return num
 
+## Результат вычислений xxnum в виде списка (или числа), как в исходных функциях:
+#  если среди аргументов есть массивы numpy, элементы имеют тип numpy.float64,
+#  иначе - float
+def xxList(r,*args):
+    for c in args:
+        if isinstance(c,np.ndarray) or isinstance(c,np.generic) or \
+                (isinstance(c,(list,tuple)) and len(c)>0 and isinstance(c[0],np.generic)):
+            return list(r) if np.ndim(r)>0 else r
+    return r.tolist()
+
 def xxCumTrapz(t,f):
     """
     Calculate cumulative integral (trapezium method)
 
     """
-    h=xxDiff(t);
-    s=[];
-    s.append(0);
-    for k in range(len(t)-1):
-        sm=s[k];
-        st=0.5*h[k]*(f[k+1]+f[k]);
-        s.append(sm+st);
-    return s
+    return xxList(xn.cumtrapz(t,f),t,f)
 
 
 def xxTrapz(t,f):
-    h=xxDiff(t);
-    st=[0.5*h[k]*(f[k+1]+f[k]) for k in range(len(t)-1)]
-    s=sum(st);
-    return s
+    return xxList(xn.trapz(t,f),t,f)
 
 def xxDiff(t):
-    d=[t[k+1]-t[k] for k in range(len(t)-1)]
-    return d
+    return xxList(xn.diff(t),t)
 
 def xxCalcEav(Eph,Pph):
     """
         вычисляем среднее значение
     """
-    EP=Eph[-1]*xxTrapz(Eph,Pph)-xxTrapz(Eph,xxCumTrapz(Eph,Pph))
-    return EP
+    return xxList(xn.calc_eav(Eph,Pph),Eph,Pph)
 
 def xxCalcEavF(Eph,Pph):
     """
@@ -130,37 +288,7 @@ def xxInterp1(a,b,c):
         input data a,b - b(a)
         output - u(c)
     """
-#    u=np.interp(c,a,b)
-#    return u
-    x=list(a);f=list(b);t=list(c)
-    M=len(t)
-    N=len(x)
-    if t[M-1]>x[N-1]:
-        x.append(t[M-1])
-        f.append(f[N-1])
-        N+=1
-
-
-    if t[0]<x[0]:
-        x.insert(0,t[0])
-        f.insert(0,f[0])
-        N+=1
-
-    u=[]
-
-    it=0;    ix=0;
-    while(it<M and ix<N-1):
-        if (t[it]-x[ix])*(t[it]-x[ix+1])>0:
-            ix+=1
-            continue
-        else:
-            hx=x[ix+1]-x[ix];
-            if hx==0.:
-                ix+=1
-                continue
-            u.append((f[ix]*(x[ix+1]-t[it])+f[ix+1]*(t[it]-x[ix]))/hx)
-            it+=1;
-    return u
+    return xxList(xn.interp1(a,b,c),a,b,c)
 
 def xxInterp_2D(x,y,f,X):
     """ 2-D data linear interpolation
@@ -207,84 +335,24 @@ def xxCreateTable(x,f,t):
 
     pass
 
-## Функция получения таблиц из распределений
+## Функции получения таблиц из распределений (сохранены для совместимости,
+#  расчёт выполняет xxnum.inverse_cdf)
 def xxGeTable(x, f, t):
     """
     """
-    r=[]
-    nDim=f.ndim
-    nRow,nCol=x.shape
-    if nDim==2:
-
-
-        for ie in range(nRow):
-            tt=xxInterp1(x[ie,:],(f[ie,:]),t)
-            tt=[math.log10(zx) for zx in tt]
-##        try:
-##            tt=[math.log10(zx) for zx in tt]
-##        except:
-##            pass
-            r.append(tt)
-    else:
-##        nRow=len(f)
-
-        for ie in range(nRow):
-            tt=xxInterp1(x[ie,:],(f),t)
-##            tt=[math.log10(zx) for zx in tt]
-            r.append(tt)
-##    return np.array(r)
-    return r
+    return xn.inverse_cdf(x,f,t,repair=False,kLog=(f.ndim==2)).tolist()
 
 
 def xxGeTableBrem(x,f,t):
     """
     """
-    r=[]
-    nDim=f.ndim
-    nRow,nCol=x.shape
-    if nDim==2:
-
-
-        for ie in range(nRow):
-            tt=xxInterp1(x[ie,:],(f[ie,:]),t)
-##        try:
-##            tt=[math.log10(zx) for zx in tt]
-##        except:
-##            pass
-            r.append(tt)
-    else:
-##        nRow=len(f)
-
-        for ie in range(nRow):
-            tt=xxInterp1(x[ie,:],(f),t)
-##            tt=[math.log10(zx) for zx in tt]
-            r.append(tt)
-##    return np.array(r)
-    return r
-
+    return xn.inverse_cdf(x,f,t,repair=False).tolist()
 
 
 def xxGeTablePhoton(x,f,t):
     """
     """
-    r=[]
-    nDim=f.ndim
-    nRow,nCol=x.shape
-    if nDim==2:
-
-
-        for ie in range(nRow):
-            tt=xxInterp1(x[ie,:],(f[ie,:]),t)
-            r.append(tt)
-    else:
-##        nRow=len(f)
-
-        for ie in range(nRow):
-            tt=xxInterp1(x[ie,:],(f),t)
-##            tt=[math.log10(zx) for zx in tt]
-            r.append(tt)
-##    return np.array(r)
-    return r
+    return xn.inverse_cdf(x,f,t,repair=False).tolist()
 
 
 def xxTrans(c):
@@ -332,9 +400,7 @@ def e_head(nmElement):
     return (D,Shell)
 
 def xxlinspace(a,b,n):
-    h=(b-a)/float(n-1)
-    t=[a+k*h for k in range(n)]
-    return t
+    return xxList(xn.linspace(a,b,n),a,b)
 
 def gamma_grid(nG):
     lG=-12
@@ -569,102 +635,127 @@ def read_endf_2d(nmElement,pp,mf,mt):
             if iPrintS:print(ss)
     return res
 
+## Таблица из файла KIAM: заголовок, разобранный по шаблонам xT, и данные.
+#  Поля заголовка, которых нет в файле, равны None:
+#   - nRow, nCol, nKom, nTot - размеры таблицы и число строк комментариев;
+#   - lEmin, lEmax, nE - десятичные логарифмы энергий (эВ) и число энергий;
+#   - Z, A, Ro - атомный номер, атомная масса, плотность;
+#   - lG0, nG - десятичный логарифм второй точки по гамме и число точек.
+#  data - таблица (только чтение), head - строки заголовка до строки DATA
+class KiamTable:
+    """
+    """
+
+    xFields = {'f1': (('nRow', int), ('nCol', int), ('nKom', int), ('nTot', int)),
+               'fE': (('lEmin', float), ('lEmax', float), ('nE', int)),
+               'fInf': (('Z', int), ('A', float), ('Ro', float)),
+               'fG': (('lG0', float), ('nG', int))}
+
+    def __init__(self, nameFL, d, hh):
+        self.name = nameFL
+        self.data = d
+        self.data.flags.writeable = False
+        self.head = hh
+        for fld_ in self.xFields.values():
+            for nm_, tp_ in fld_:
+                setattr(self, nm_, None)
+        for k, line in enumerate(hh[:-1]):
+            for ky, fld_ in self.xFields.items():
+                if line.strip() == xT[ky]:
+                    vv_ = hh[k + 1].split()
+                    for (nm_, tp_), v in zip(fld_, vv_):
+                        setattr(self, nm_, tp_(v))
+        if self.nRow is not None and self.nRow != len(d):
+            print('Файл {0}: в таблице {1} строк вместо {2}'.format(nameFL, len(d), self.nRow))
+
+    ## Сетка по энергии (эВ)
+    def energy(self):
+        return np.logspace(self.lEmin, self.lEmax, self.nE)
+
+
+## Считанные таблицы (ключ - путь, размер и время изменения файла)
+xKiamMemo = xxc.Memo(64)
+
+
+## Считывание таблицы из файла KIAM (KiamTable).
+#  Берётся двоичная копия (read_kiam_bin), если она актуальна, иначе
+#  разбирается текст. Результат запоминается: повторное чтение неизменённого
+#  файла не обращается к диску. mmap - см. read_kiam_bin
+def read_kiam(nameFL, mmap=False):
+    """
+    """
+    st_ = os.stat(nameFL)
+    ky_ = (os.path.abspath(nameFL), st_.st_size, st_.st_mtime_ns, mmap)
+    tb_ = xKiamMemo.get(ky_)
+    if tb_ is not None:
+        return tb_
+    rr_ = read_kiam_bin(nameFL, mmap) if xBin else None
+    if rr_ is None:
+        with open(nameFL,'r') as fIn:
+            hh=[]
+            for line in fIn:
+                if line.startswith('DATA'):
+                    break
+                hh.append(line)
+            ss_ = [c.split() for c in fIn.read().splitlines()]
+        ss_ = [c for c in ss_ if len(c) > 0]
+        nC_ = len(ss_[0]) if len(ss_) > 0 else 0
+        if all(len(c) == nC_ for c in ss_):
+            # все строки одной длины - разбор одним массивом
+            d = np.fromiter(map(float, (v for c in ss_ for v in c)), float,
+                            len(ss_) * nC_).reshape(len(ss_), nC_)
+            # при следующем чтении - двоичная копия вместо разбора текста
+            if xBin and d.size > 0:
+                xWriteKiamBin(nameFL, hh, d)
+        else:
+            d = np.array([[float(v) for v in c] for c in ss_], dtype=object)
+        rr_ = (d, hh)
+    return xKiamMemo.put(ky_, KiamTable(nameFL, *rr_))
+
+
 def read_kiam_file_1(nameFL):
     """
     """
-    with open(nameFL,'r') as xf:
-        """
-        """
-        hh=[]
-        tt=xf.readline()
-        nn=tt.split()
-        nRow=nn[0]
-        nCol=nn[1]
-        nKom=nn[3]
-        for i in range(nKom):
-            dummy=xf.readline()
-        d=[]
-        for i in range(nRow):
-            tt=xf.readline()
-            f=tt.split()
-            t=[float(c) for c in f]
-            d.append(t)
-    return d
+    return read_kiam(nameFL).data.tolist()
 
 def read_kiam_file_2(nameFL):
     """
     """
-    with open(nameFL,'r') as fIn:
-        hh=[]
-        for k,line in enumerate(fIn):
-            if line.startswith('DATA'):
-                break
-            else:
-                hh.append(line)
-        d=[]
-        for k,line in enumerate(fIn):
-            f=line.split()
-            t=[float(c) for c in f]
-            d.append(t)
-    return d,hh
+    tb_=read_kiam(nameFL)
+    return tb_.data.tolist(),list(tb_.head)
 
 
 def read_kiam_file(nameFL):
     """
     """
-    with open(nameFL,'r') as fIn:
-        hh=[]
-        for k,line in enumerate(fIn):
-            if line.startswith('DATA'):
-                break
-            else:
-                hh.append(line)
-        d=[]
-        for k,line in enumerate(fIn):
-            f=line.split()
-            t=[float(c) for c in f]
-            d.append(t)
-    return np.array(d),hh
+    tb_=read_kiam(nameFL)
+    return np.array(tb_.data),list(tb_.head)
 
 
 
 def xxWriteArray(nameFL,d):
     """
     """
-    nDim=d.ndim
-    if nDim==2:
+    d=np.asarray(d)
+    if d.ndim==2:
         nR, nC=d.shape
     else:
         nR=1
         nC=len(d)
-    with open(nameFL,'w') as Out:
-        Out.write(('%4i %4i\n') % (nR,nC))
-        # write data
-        for k in range(nR):
-             sf=''
-             for i in range(nC):
-                sf+='%+19.15e ' % (d[i] if nDim==1 else d[k,i])
-             sf+='\n'
-             Out.write(sf)
+    xWriteKiam(nameFL,['%4i %4i\n' % (nR,nC)],d,'%+19.15e ')
 
 
 def xxReadArray(nameFL):
     """
     """
-##    nE,nG=d.shape
     with open(nameFL,'r') as xf:
         tt=xf.readline()
         nn=tt.split()
         nG=int(nn[0])
         nE=int(nn[1])
-##        d=np.zeros((nE,nG))
         # read data
-        d=[]
-        for k,line in enumerate(xf):
-            f=line.split()
-            t=[float(c) for c in f]
-            d.append(t)
-    return np.array(d)
+        d=np.fromiter(map(float,xf.read().split()),float)
+    return d.reshape(-1,nE)
 
 
 
@@ -675,55 +766,19 @@ def xWrite3_log(nameFL,lE,lG,d,sss,acca='full'):
     nE=len(lE)
     nG=len(lG)
     G0=np.log10(lG[1])
-    with open(nameFL,'w') as Out:
-        # write heap
-        Out.write('{0} \n'.format(xT['f1']))
-        Out.write((xT['f1']+'\n') % (nG,nE,2,11))
-        Out.write('{0} \n'.format(xT['s1']))
-        Out.write('%s \n' % (xT['fE']))
-        Out.write((xT['fE']+'\n') % (np.log10(lE[0]),np.log10(lE[-1]),nE,2))
-        Out.write('{0} \n'.format(xT['sE']))
-        Out.write('{0} \n'.format(xT['fG']))
-        Out.write((xT['fG']+'\n')%(G0, nG,5))
-        Out.write('{0} \n'.format(xT['sG']))
-        Out.write('{0} \n'.format(xT['sDB']))
-        Out.write('{0} \n'.format(sss))
-        Out.write('{0}(%+19.15f )\n'.format(nE))
-        Out.write('{0} \n'.format(xT['sDE']))
-        # write data
-        for k in range(nG):
-            sf='';#str();
-            for i in range(nE):
-                sf+='%+19.15f ' % (d[i][k])
-            sf+='\n';
-            Out.write(sf);
+    hh=xHeadKiam((nG,nE,2,11),(np.log10(lE[0]),np.log10(lE[-1]),nE,2),sss,
+                 '{0}(%+19.15f )\n'.format(nE),vG=(G0, nG,5))
+    # строки файла - точки по гамме, столбцы - энергии
+    xWriteKiam(nameFL,hh,np.asarray(d,dtype=float)[:nE,:nG].transpose())
 
 def xWrite3_lin(nameFL,lE,lG,d,sss,acca='full'):
     """
     """
     nE=len(lE)
     nG=len(lG)
-    with open(nameFL,'w') as Out:
-        # write heap
-        Out.write('{0} \n'.format(xT['f1']))
-        Out.write((xT['f1']+'\n') % (nG,nE,2,8))
-        Out.write('{0} \n'.format(xT['s1']))
-
-        Out.write('%s \n' % (xT['fE']))
-        Out.write((xT['fE']+'\n') % (np.log10(lE[0]),np.log10(lE[-1]),nE,5))
-
-        Out.write('{0} \n'.format(xT['sE']))
-        Out.write('{0} \n'.format(xT['sDB']))
-        Out.write('{0} \n'.format(sss))
-        Out.write('{0}(%+19.15f )\n'.format(nE))
-        Out.write('{0} \n'.format(xT['sDE']))
-        # write data
-        for k in range(nG):
-            sf='';#str();
-            for i in range(nE):
-                sf+='%+19.15f ' % (d[i][k])
-            sf+='\n';
-            Out.write(sf);
+    hh=xHeadKiam((nG,nE,2,8),(np.log10(lE[0]),np.log10(lE[-1]),nE,5),sss,
+                 '{0}(%+19.15f )\n'.format(nE))
+    xWriteKiam(nameFL,hh,np.asarray(d,dtype=float)[:nE,:nG].transpose())
 
 def xxformat(vv_):
     ex_ = np.trunc(np.log10(vv_))
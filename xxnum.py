@@ -0,0 +1,279 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+## @package xxnum
+# Данный модуль содержит векторизованные (numpy) варианты вычислительных
+# функций модуля xxfun:
+#   - interp1   - линейная интерполяция (xxInterp1)
+#   - cumtrapz  - накопленный интеграл методом трапеций (xxCumTrapz)
+#   - trapz     - интеграл методом трапеций (xxTrapz)
+#   - diff      - разности соседних точек (xxDiff)
+#   - linspace  - равномерная сетка (xxlinspace)
+#   - calc_eav  - среднее значение по распределению (xxCalcEav)
+#   - inverse_cdf - таблицы для розыгрыша по функциям распределения (xxGeTable*)
+#   - interp_cols - np.interp сразу для всех столбцов таблицы
+#   - interp_rows - np.interp сразу для всех строк таблицы (у каждой строки своя сетка)
+#   - pad_rows    - набор строк разной длины в виде прямоугольной таблицы
+#   - row_blocks  - разбиение строк таблицы на блоки
+# Результаты совпадают с функциями xxfun до последнего бита:
+# арифметические операции выполняются в том же порядке, суммы накапливаются
+# последовательно. Функции принимают как одномерные массивы, так и
+# двумерные (набор строк, например таблица nE x nG), обработка идёт по последней оси
+
+import math
+
+import numpy as np
+
+
+## Линейная интерполяция b(a) в точках c по алгоритму xxInterp1:
+#  - за пределами a значение продолжается константой (крайнее значение b);
+#  - интервалы нулевой длины пропускаются;
+#  - точка на границе интервалов относится к левому интервалу.
+# a, b - одномерные массивы или двумерные (по строкам); c - одномерный массив
+# (общий для всех строк) или двумерный
+def interp1(a, b, c):
+    """
+        1-D data linear interpolation
+        input data a,b - b(a)
+        output - u(c)
+    """
+    x = np.asarray(a, dtype=float)
+    f = np.asarray(b, dtype=float)
+    t = np.asarray(c, dtype=float)
+    if x.ndim < 2:
+        return interp1_row(x, f, t)
+    nR_ = x.shape[0]
+    f = np.broadcast_to(f, x.shape)
+    t = np.broadcast_to(t, (nR_, t.shape[-1]))
+    u_ = np.full(t.shape, np.nan)
+    for i in range(nR_):
+        uu_ = interp1_row(x[i], f[i], t[i])
+        u_[i, :len(uu_)] = uu_
+    return u_
+
+
+## Интерполяция для одной строки (см. interp1).
+#  Для неупорядоченных данных используется исходный алгоритм (interp1_loop)
+def interp1_row(x, f, t):
+    """
+    """
+    M_ = len(t)
+    if M_ == 0:
+        return np.zeros(0)
+    if len(x) > 0 and t[-1] > x[-1]:
+        x = np.append(x, t[-1])
+        f = np.append(f, f[-1])
+    if len(x) > 0 and t[0] < x[0]:
+        x = np.insert(x, 0, t[0])
+        f = np.insert(f, 0, f[0])
+    N_ = len(x)
+    if N_ < 2 or not (np.all(np.diff(x) >= 0.) and np.all(np.diff(t) >= 0.)):
+        return np.array(interp1_loop(x.tolist(), f.tolist(), t.tolist()))
+
+    # левый конец интервала: последняя точка сетки, меньшая t;
+    # если таких нет (t совпадает с x[0]) - последняя точка, равная t
+    ix_ = np.searchsorted(x, t, 'left') - 1
+    i0_ = ix_ < 0
+    if i0_.any():
+        ix_[i0_] = np.searchsorted(x, t[i0_], 'right') - 1
+    if ix_[-1] > N_ - 2:
+        # все интервалы, содержащие t, нулевой длины
+        return np.array(interp1_loop(x.tolist(), f.tolist(), t.tolist()))
+    xl_ = x[ix_]
+    xr_ = x[ix_ + 1]
+    return (f[ix_] * (xr_ - t) + f[ix_ + 1] * (t - xl_)) / (xr_ - xl_)
+
+
+## Исходный алгоритм xxInterp1 (после продолжения сетки за края).
+#  Используется для неупорядоченных данных
+def interp1_loop(x, f, t):
+    """
+    """
+    M = len(t)
+    N = len(x)
+    u = []
+    it = 0
+    ix = 0
+    while (it < M and ix < N - 1):
+        if (t[it] - x[ix]) * (t[it] - x[ix + 1]) > 0:
+            ix += 1
+            continue
+        else:
+            hx = x[ix + 1] - x[ix]
+            if hx == 0.:
+                ix += 1
+                continue
+            u.append((f[ix] * (x[ix + 1] - t[it]) + f[ix + 1] * (t[it] - x[ix])) / hx)
+            it += 1
+    return u
+
+
+## Линейная интерполяция столбцов таблицы fp(xp) (xp - по первой оси) в точках x.
+#  Результат для каждого столбца совпадает с np.interp(x, xp, fp[:, i]):
+#  вне xp - крайние значения, в узлах xp - значения fp в узлах
+def interp_cols(x, xp, fp):
+    """
+    """
+    x = np.asarray(x, dtype=float)
+    xp = np.asarray(xp, dtype=float)
+    fp = np.asarray(fp, dtype=float)
+    n_ = len(xp)
+    j_ = np.searchsorted(xp, x, 'right') - 1
+    jl_ = np.clip(j_, 0, max(n_ - 2, 0))
+    jr_ = np.minimum(jl_ + 1, n_ - 1)
+    sh_ = (-1,) + (1,) * (fp.ndim - 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sl_ = (fp[jr_] - fp[jl_]) / (xp[jr_] - xp[jl_]).reshape(sh_)
+        r_ = sl_ * (x - xp[jl_]).reshape(sh_) + fp[jl_]
+        # если получилось nan, считаем от правого узла (как np.interp)
+        in_ = np.isnan(r_)
+        if in_.any():
+            r2_ = sl_ * (x - xp[jr_]).reshape(sh_) + fp[jr_]
+            r_[in_] = r2_[in_]
+            eq_ = np.isnan(r_) & (fp[jl_] == fp[jr_])
+            r_[eq_] = fp[jl_][eq_]
+    ex_ = (j_ >= 0) & (j_ < n_) & (xp[np.clip(j_, 0, n_ - 1)] == x)
+    r_[ex_] = fp[j_[ex_]]
+    r_[j_ < 0] = fp[0]
+    r_[j_ >= n_ - 1] = fp[n_ - 1]
+    r_[np.isnan(x)] = np.nan
+    return r_
+
+
+## Линейная интерполяция строк таблицы: для каждой строки i результат совпадает с
+#  np.interp(x[i], xp[i], fp[i]). x, fp - одномерные (общие для всех строк)
+#  или двумерные массивы, xp - двумерный (nR x n), строки xp - неубывающие
+def interp_rows(x, xp, fp):
+    """
+    """
+    xp = np.asarray(xp, dtype=float)
+    nR_, n_ = xp.shape
+    x = np.broadcast_to(np.asarray(x, dtype=float), (nR_, np.shape(x)[-1]))
+    fp = np.broadcast_to(np.asarray(fp, dtype=float), (nR_, n_))
+    r_ = np.zeros(x.shape)
+    j_ = np.zeros(x.shape, dtype=int)
+    for i in range(nR_):
+        j_[i] = np.searchsorted(xp[i], x[i], 'right') - 1
+    jl_ = np.clip(j_, 0, max(n_ - 2, 0))
+    jr_ = np.minimum(jl_ + 1, n_ - 1)
+    xl_ = np.take_along_axis(xp, jl_, 1)
+    xr_ = np.take_along_axis(xp, jr_, 1)
+    fl_ = np.take_along_axis(fp, jl_, 1)
+    fr_ = np.take_along_axis(fp, jr_, 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sl_ = (fr_ - fl_) / (xr_ - xl_)
+        r_ = sl_ * (x - xl_) + fl_
+        # если получилось nan, считаем от правого узла (как np.interp)
+        in_ = np.isnan(r_)
+        if in_.any():
+            r2_ = sl_ * (x - xr_) + fr_
+            r_[in_] = r2_[in_]
+            eq_ = np.isnan(r_) & (fl_ == fr_)
+            r_[eq_] = fl_[eq_]
+    jc_ = np.clip(j_, 0, n_ - 1)
+    ex_ = (j_ >= 0) & (np.take_along_axis(xp, jc_, 1) == x)
+    r_[ex_] = np.take_along_axis(fp, jc_, 1)[ex_]
+    r_[j_ < 0] = np.broadcast_to(fp[:, :1], x.shape)[j_ < 0]
+    r_[j_ >= n_ - 1] = np.broadcast_to(fp[:, -1:], x.shape)[j_ >= n_ - 1]
+    r_[np.isnan(x)] = np.nan
+    return r_
+
+
+## Набор строк разной длины rows в виде таблицы (nR x max(len)).
+#  Короткие строки дополняются своим последним значением, поэтому для
+#  сеток дополнение - интервалы нулевой длины, которые не меняют
+#  интегралов (cumtrapz, trapz, calc_eav) и результатов interp_rows
+def pad_rows(rows):
+    """
+    """
+    n_ = max(len(c) for c in rows)
+    r_ = np.zeros((len(rows), n_))
+    for i, c in enumerate(rows):
+        r_[i, :len(c)] = c
+        r_[i, len(c):] = c[-1]
+    return r_
+
+
+## Разбиение n строк на блоки по nb строк (список срезов).
+#  При nb <= 0 - один блок со всеми строками
+def row_blocks(n, nb):
+    """
+    """
+    if nb <= 0 or nb >= n:
+        return [slice(0, n)]
+    return [slice(i, min(i + nb, n)) for i in range(0, n, nb)]
+
+
+## Разности соседних точек по последней оси
+def diff(t):
+    """
+    """
+    return np.diff(np.asarray(t, dtype=float), axis=-1)
+
+
+## Накопленный интеграл f(t) методом трапеций по последней оси.
+#  Первая точка - 0, суммирование последовательное (как в xxCumTrapz)
+def cumtrapz(t, f):
+    """
+    Calculate cumulative integral (trapezium method)
+    """
+    t = np.asarray(t, dtype=float)
+    f = np.asarray(f, dtype=float)
+    st_ = 0.5 * np.diff(t, axis=-1) * (f[..., 1:] + f[..., :-1])
+    sh_ = np.broadcast_shapes(t.shape[:-1], f.shape[:-1]) + (st_.shape[-1] + 1,)
+    s_ = np.zeros(sh_)
+    np.cumsum(st_, axis=-1, out=s_[..., 1:])
+    return s_
+
+
+## Интеграл f(t) методом трапеций по последней оси (последовательное суммирование)
+def trapz(t, f):
+    """
+    """
+    return cumtrapz(t, f)[..., -1][()]
+
+
+## Среднее значение по распределению Pph(Eph) (xxCalcEav)
+def calc_eav(Eph, Pph):
+    """
+        вычисляем среднее значение
+    """
+    Eph = np.asarray(Eph, dtype=float)
+    return Eph[..., -1] * trapz(Eph, Pph) - trapz(Eph, cumtrapz(Eph, Pph))
+
+
+## Равномерная сетка из n точек от a до b (xxlinspace)
+def linspace(a, b, n):
+    """
+    """
+    h = (b - a) / float(n - 1)
+    return a + np.arange(n) * h
+
+
+## Десятичный логарифм, совпадающий с math.log10 (np.log10 может отличаться
+#  в последнем бите, что меняет записанные таблицы). Для нуля - ошибка ValueError
+def log10(a):
+    """
+    """
+    a = np.asarray(a, dtype=float)
+    return np.fromiter(map(math.log10, a.ravel().tolist()), float, a.size).reshape(a.shape)
+
+
+## Таблица для розыгрыша величины x по функции распределения F (обратная функция
+#  распределения) сразу для всех строк (энергий):
+#  F - функции распределения (nR x n), x - значения величины (n) или (nR x n),
+#  g - значения вероятности (nG), общие для всех строк.
+#  repair - восстановить монотонность F (накопленный максимум по строке);
+#      для неубывающих F ничего не меняет.
+#  Участки постоянства F пропускаются (берётся левый конец участка),
+#  при g вне [F[:, 0], F[:, -1]] выдаётся крайнее значение x.
+#  kLog - выдать десятичный логарифм таблицы (log10)
+def inverse_cdf(F, x, g, repair=True, kLog=False):
+    """
+    """
+    F = np.asarray(F, dtype=float)
+    if repair:
+        F = np.maximum.accumulate(F, axis=-1)
+    u_ = interp1(F, x, g)
+    if kLog:
+        u_ = log10(u_)
+    return u_